@@ -0,0 +1,144 @@
+"""
+Admin-only debugging hooks for chasing production performance problems.
+
+All of it is disabled unless DEBUG_TOKEN is set; callers then authenticate
+with an `X-Debug-Token` header (the Authorization header stays free for the
+user's Google token, so a real request can be profiled as that user).
+
+- Sampling profiles of the whole worker (see `POST /api/_debug/profile`).
+- Per-request cProfile: send `X-Profile: 1` with the debug token and the
+  response carries an `X-Profile-Id` whose pstats summary is kept in memory
+  for `GET /api/_debug/profile/requests/{id}`.
+- tracemalloc baselines and diffs, alongside an inventory of the caches held
+  by `api/deps` and each cached `CRMManager`.
+"""
+import cProfile
+import functools
+import hmac
+import inspect
+import os
+import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from fastapi import Header, HTTPException
+from fastapi.routing import APIRoute
+
+from src.services.profiling import pstats_summary
+
+# Enables the /api/_debug endpoints and per-request profiling when set
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN")
+# Per-request profile summaries kept for retrieval (oldest dropped first)
+MAX_REQUEST_PROFILES = 20
+
+_request_profiler: ContextVar[Optional[cProfile.Profile]] = ContextVar("request_profiler", default=None)
+_request_profiles: "OrderedDict[str, str]" = OrderedDict()
+
+
+def _token_ok(supplied: Optional[str]) -> bool:
+    return bool(DEBUG_TOKEN) and hmac.compare_digest(supplied or "", DEBUG_TOKEN)
+
+
+def require_debug_token(x_debug_token: Optional[str] = Header(None)):
+    """Dependency guarding the debug endpoints; 404 when debugging is disabled."""
+    if not DEBUG_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not _token_ok(x_debug_token):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+
+
+def request_profile(profile_id: str) -> Optional[str]:
+    return _request_profiles.get(profile_id)
+
+
+def _profiled(endpoint):
+    """Run a sync endpoint under the request's cProfile, if one was requested."""
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        profiler = _request_profiler.get()
+        if profiler is None:
+            return endpoint(*args, **kwargs)
+        # Enabled here because sync endpoints run in a threadpool thread,
+        # which a profiler enabled by the middleware would not see
+        profiler.enable()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profiler.disable()
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route class making sync endpoints profilable per request. Async endpoints
+    (the SSE stream) are left alone: profiling them would also catch every
+    other coroutine sharing the event loop.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = _profiled(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+class RequestProfileMiddleware:
+    """Profiles requests sent with `X-Profile: 1` and a valid `X-Debug-Token`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not DEBUG_TOKEN:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+        if headers.get(b"x-profile") not in (b"1", b"true") or \
+                not _token_ok(headers.get(b"x-debug-token", b"").decode("latin-1")):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = cProfile.Profile()
+        profile_id = uuid.uuid4().hex[:12]
+        token = _request_profiler.set(profiler)
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                # The endpoint has returned by now; store its summary before the body goes out
+                _request_profiles[profile_id] = pstats_summary(profiler) if profiler.getstats() else ""
+                while len(_request_profiles) > MAX_REQUEST_PROFILES:
+                    _request_profiles.popitem(last=False)
+                print(f"[Profile] {scope.get('method')} {scope.get('path')} profiled as {profile_id}")
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            _request_profiler.reset(token)
+
+
+def cache_inventory() -> Dict[str, Any]:
+    """Entry counts of the caches held by api/deps and each cached CRMManager."""
+    from api import deps
+
+    sessions = []
+    for key, crm in list(deps._user_sessions.items()):
+        token_hash, _, sheet = key.partition("::")
+        sessions.append({
+            "session": f"{token_hash[:12]}::{sheet}",
+            "cached_rows": {ws: len(rows) for ws, rows in crm._cache.items()},
+            "row_hashes": {ws: len(hashes) for ws, hashes in crm._row_hashes.items()},
+            "pending_echoes": {ws: len(ids) for ws, ids in crm._pending_echoes.items()},
+            "change_log": len(crm._change_log),
+        })
+    return {
+        "deps": {
+            "user_sessions": len(deps._user_sessions),
+            "session_expiry": len(deps._session_expiry),
+            "token_cache": len(deps._token_cache),
+            "sheet_managers": len(deps._sheet_managers),
+        },
+        "sessions": sessions,
+    }
@@ -1,14 +1,165 @@
 from fastapi import Header, HTTPException, Depends
-from typing import Dict, Optional
-import gspread
+from fastapi.concurrency import run_in_threadpool
+from typing import Dict, Optional, Tuple
+import hashlib
+import time
+import requests
 from google.oauth2.credentials import Credentials
 from src.sheets import SheetManager
 from src.crm.manager import CRMManager
+from src.crm.snapshots import default_store
+from src.services.metrics import registry
+from src.google_client import authorize
 import os
 
 # Cache CRM sessions by Access Token to preserve data caching (Quota protection)
 # In a real production app, use Redis or Memcached.
 _user_sessions: Dict[str, CRMManager] = {}
+# Expiry (epoch seconds) of the token behind each session, for eviction
+_session_expiry: Dict[str, float] = {}
+
+# -----------------------------------------------------------------------------
+# Token validation cache
+# -----------------------------------------------------------------------------
+# Validating a token used to mean a full Drive listing per request. Instead we
+# ask Google's tokeninfo endpoint once and cache the answer by token hash until
+# the token expires. Invalid tokens are remembered briefly so a client stuck
+# retrying with a dead token doesn't hammer Google.
+
+TOKENINFO_URL = os.getenv("GOOGLE_TOKENINFO_URL", "https://oauth2.googleapis.com/tokeninfo")
+TOKENINFO_TIMEOUT = 5  # seconds
+NEGATIVE_CACHE_TTL = 30  # seconds an invalid token stays rejected without re-checking
+DEFAULT_TOKEN_TTL = 300  # used when tokeninfo doesn't report expires_in
+
+# token hash -> (expires_at, is_valid)
+_token_cache: Dict[str, Tuple[float, bool]] = {}
+# token hash -> (expires_at, SheetManager) for validated tokens
+_sheet_managers: Dict[str, Tuple[float, SheetManager]] = {}
+
+
+registry.collector("crm_sessions", "gauge", "Cached sessions and credentials held by the API.", lambda: [
+    ("crm_sessions", {"kind": "crm_session"}, len(_user_sessions)),
+    ("crm_sessions", {"kind": "sheet_manager"}, len(_sheet_managers)),
+    ("crm_sessions", {"kind": "validated_token"}, len(_token_cache)),
+])
+
+
+def _token_key(token: str) -> str:
+    """Hash tokens so raw credentials are never used as long-lived cache keys."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _cached_token_expiry(token: str) -> Optional[float]:
+    """
+    Expiry of a known-valid token, None if unknown.
+    Raises 401 for a negatively cached token.
+    """
+    entry = _token_cache.get(_token_key(token))
+    if entry is None or entry[0] <= time.time():
+        return None
+    if not entry[1]:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return entry[0]
+
+
+def validate_token(token: str) -> float:
+    """
+    Validate an OAuth access token, returning its expiry (epoch seconds).
+    Results are cached by token hash; raises 401 for invalid tokens.
+    """
+    expires_at = _cached_token_expiry(token)
+    if expires_at is not None:
+        return expires_at
+
+    key = _token_key(token)
+    now = time.time()
+    try:
+        res = requests.get(TOKENINFO_URL, params={"access_token": token}, timeout=TOKENINFO_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"[Auth] Token validation request failed: {e}")
+        raise HTTPException(status_code=503, detail="Could not reach Google to validate the session. Please retry.")
+
+    if res.status_code in (400, 401):
+        _token_cache[key] = (now + NEGATIVE_CACHE_TTL, False)
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    if res.status_code != 200:
+        # Google-side trouble: don't cache either way
+        print(f"[Auth] Unexpected tokeninfo status: {res.status_code}")
+        raise HTTPException(status_code=503, detail="Could not validate the session. Please retry.")
+
+    try:
+        expires_in = int(res.json().get("expires_in", DEFAULT_TOKEN_TTL))
+    except (ValueError, TypeError):
+        expires_in = DEFAULT_TOKEN_TTL
+    expires_at = now + expires_in
+    _token_cache[key] = (expires_at, True)
+    _prune_expired(now)
+    return expires_at
+
+
+def get_pooled_sheet_manager(token: str) -> SheetManager:
+    """Return a SheetManager for a validated token, reusing one per token."""
+    expires_at = validate_token(token)
+    key = _token_key(token)
+    pooled = _sheet_managers.get(key)
+    if pooled is not None:
+        return pooled[1]
+
+    creds = Credentials(token=token)
+    sm = SheetManager(authorize(creds, allow_replay=False))
+    _sheet_managers[key] = (expires_at, sm)
+    return sm
+
+
+def _prune_expired(now: float):
+    """Drop cache entries and sessions whose tokens have expired."""
+    for key in [k for k, (exp, _) in _token_cache.items() if exp <= now]:
+        del _token_cache[key]
+    for key in [k for k, (exp, _) in _sheet_managers.items() if exp <= now]:
+        del _sheet_managers[key]
+    for key in [k for k, exp in _session_expiry.items() if exp <= now]:
+        _session_expiry.pop(key, None)
+        _user_sessions.pop(key, None)
+
+
+async def _pooled_sheet_manager(token: str) -> Tuple[SheetManager, float]:
+    """Async wrapper: only leaves the event loop when Google must be contacted."""
+    expires_at = _cached_token_expiry(token)
+    pooled = _sheet_managers.get(_token_key(token))
+    if expires_at is not None and pooled is not None:
+        return pooled[1], expires_at
+    sm = await run_in_threadpool(get_pooled_sheet_manager, token)
+    return sm, validate_token(token)
+
+
+async def get_sheet_manager(authorization: Optional[str] = Header(None)):
+    """Dependency that returns an authenticated SheetManager (without a CRM session)."""
+    # Require Bearer token
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Authorization header required. Please sign in.")
+
+    token = authorization.replace("Bearer ", "").strip()
+    if not token:
+        raise HTTPException(status_code=401, detail="Invalid authorization header")
+
+    # MOCK MODE check
+    if os.getenv("MOCK_DATA_MODE") == "true":
+        print(f"[Auth] Mock Mode enabled. Using MockSheetManager.")
+        from src.services.local_json import MockSheetManager
+        return MockSheetManager()
+
+    try:
+        sm, _ = await _pooled_sheet_manager(token)
+        return sm
+    except HTTPException as e:
+        if e.status_code != 401:
+            raise
+        print("[Auth] Token auth failed")
+        raise HTTPException(
+            status_code=401,
+            detail="Google authentication failed. Please sign out and sign in again to refresh your session."
+        )
+
 
 async def get_crm_session(
     authorization: Optional[str] = Header(None),
@@ -29,15 +180,15 @@ async def get_crm_session(
              # This uses local token.json or Service Account Env
              # This uses local token.json or Service Account Env
              gc, _ = authenticate()
-             
+
              # Use a fixed key for local dev session
              cache_key = f"local_dev::{x_sheet_id or 'default'}"
-             
+
              if cache_key in _user_sessions:
                  return _user_sessions[cache_key]
-                 
+
              sheet_name = x_sheet_id or "Sales Pipeline 2026"
-             crm = CRMManager(SheetManager(gc), sheet_name=sheet_name)
+             crm = CRMManager(SheetManager(gc), sheet_name=sheet_name, snapshots=default_store())
              _user_sessions[cache_key] = crm
              return crm
         except Exception as e:
@@ -54,36 +205,32 @@ async def get_crm_session(
         # Accept any token, or specific mock token
         print(f"[MockMode] Using Mock Data Service for token: {token[:10]}...")
         from src.services.local_json import MockSheetManager
-        
+
         # We can cache mock sessions too if we want, but it's file based so cheap to re-init
         sm = MockSheetManager() # Uses data/mock_crm.json
         sheet_name = x_sheet_id if x_sheet_id else "Sales Pipeline 2026"
         return CRMManager(sm, sheet_name=sheet_name)
 
-    # Return cached session if available
-    # Note: Tokens rotate, so this dict will grow. We should clear it periodically?
-    # For MVP, it's fine.
-    cache_key = f"{token}::{x_sheet_id or 'default'}"
+    # Validate (cached) and reuse the pooled SheetManager for this token.
+    # Sessions are evicted once their token expires.
+    sm, expires_at = await _pooled_sheet_manager(token)
+
+    cache_key = f"{_token_key(token)}::{x_sheet_id or 'default'}"
     if cache_key in _user_sessions:
         return _user_sessions[cache_key]
 
     try:
-        # Create Credentials from Access Token
-        # NOTE: We only have access_token here. Refresh handled by Frontend (NextAuth).
-        creds = Credentials(token=token)
-        gc = gspread.authorize(creds)
-        
         # Instantiate CRM Manager for this user
         # We assume the user has the "Sales Pipeline 2026" sheet.
         # If not, errors will occur in methods, can be handled there.
-        sm = SheetManager(gc)
         # Use provided sheet_id or default
         sheet_name = x_sheet_id if x_sheet_id else "Sales Pipeline 2026"
-        crm = CRMManager(sm, sheet_name=sheet_name)
-        
+        crm = CRMManager(sm, sheet_name=sheet_name, snapshots=default_store())
+
         _user_sessions[cache_key] = crm
+        _session_expiry[cache_key] = expires_at
         return crm
-        
+
     except Exception as e:
         print(f"Auth Error: {e}")
         raise HTTPException(status_code=401, detail="Invalid or expired token")
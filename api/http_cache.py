@@ -0,0 +1,54 @@
+"""
+Conditional GET support (ETag / If-None-Match) for read endpoints.
+
+ETags are derived from CRMManager snapshot versions, so a poll that finds the
+worksheets unchanged is answered with 304 before any rows are parsed into
+Pydantic models or encoded to JSON.
+"""
+from typing import Optional
+
+from fastapi import Request, Response
+
+from src.crm.manager import CRMManager
+from api.responses import ENCODING_ETAG_SUFFIXES
+
+# Browsers must revalidate on every poll; the ETag makes that cheap.
+CACHE_CONTROL = "private, no-cache"
+VARY = "Authorization, X-Sheet-ID, Accept-Encoding"
+
+
+def _strip_encoding(etag: str) -> str:
+    """Map the ETag of a compressed representation back to its snapshot ETag."""
+    for suffix in ENCODING_ETAG_SUFFIXES.values():
+        if etag.endswith(suffix + '"'):
+            return etag[:-len(suffix) - 1] + '"'
+    return etag
+
+
+def _etag_matches(if_none_match: str, etag: str) -> Optional[str]:
+    """Return the client's matching ETag from an If-None-Match header, if any."""
+    if if_none_match.strip() == "*":
+        return etag
+    for candidate in (c.strip() for c in if_none_match.split(",")):
+        if _strip_encoding(candidate) == etag:
+            return candidate
+    return None
+
+
+def not_modified(request: Request, response: Response, crm: CRMManager, *worksheets: str) -> Optional[Response]:
+    """
+    Attach the ETag for `worksheets` to `response`.
+    Returns a ready 304 response if the client already has this version, else None.
+    """
+    etag = crm.snapshot_etag(*worksheets)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": VARY}
+
+    if_none_match = request.headers.get("if-none-match")
+    matched = _etag_matches(if_none_match, etag) if if_none_match else None
+    if matched:
+        # Echo the representation-specific tag the client already holds
+        headers["ETag"] = matched
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,132 @@
+"""
+Job queue wiring for the API: handlers for CRM background work and helpers
+for enqueueing it on behalf of a session.
+
+Jobs are keyed by spreadsheet so one tenant never sees another's jobs. A job
+runs with the CRMManager that enqueued it; after a restart that session is
+gone, so the job waits until a live session for the same spreadsheet exists.
+
+Archiving (moving long-closed deals and old activities to archive worksheets)
+can also run on a schedule: every ARCHIVE_INTERVAL_HOURS (off by default) an
+archive job is queued for each spreadsheet with a live session.
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from src.crm.manager import CRMManager
+from src.crm.bulk_enrichment import BulkEnrichmentPipeline
+from src.services.jobs import JobQueue, JobDeferred, PRIORITY_NORMAL, PRIORITY_LOW
+from src.services.metrics import registry
+
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL_HOURS", "0")) * 3600  # 0 = no schedule
+
+job_queue = JobQueue()
+
+registry.collector("crm_jobs", "gauge", "Background jobs by status (queue depth is status=\"queued\").",
+                   lambda: [("crm_jobs", {"status": status}, n) for status, n in job_queue.stats().items()])
+
+
+def _resolve_session(job: Dict[str, Any], crm: Optional[CRMManager]) -> CRMManager:
+    """The CRMManager a job should run with, or defer until one is available."""
+    if crm is not None:
+        return crm
+    from api.deps import _user_sessions
+    for session in list(_user_sessions.values()):
+        try:
+            if session.spreadsheet_key == job["sheet"]:
+                return session
+        except Exception:
+            continue  # session whose token no longer works
+    raise JobDeferred("Waiting for an active session for this spreadsheet")
+
+
+def _run_enrich_lead(job: Dict[str, Any], crm: Optional[CRMManager]):
+    _resolve_session(job, crm).enrich_lead(job["target"])
+
+
+def _run_score_lead(job: Dict[str, Any], crm: Optional[CRMManager]):
+    _resolve_session(job, crm).score_lead(job["target"])
+
+
+def _run_enrich_bulk(job: Dict[str, Any], crm: Optional[CRMManager]):
+    # Resumable: a retried or recovered job skips leads already Completed
+    payload = job["payload"] or {}
+    pipeline = BulkEnrichmentPipeline(
+        _resolve_session(job, crm),
+        on_progress=lambda progress: job_queue.update_progress(job["id"], progress),
+    )
+    return pipeline.run(lead_ids=payload.get("lead_ids"), retry_failed=payload.get("retry_failed", True))
+
+
+def _run_score_bulk(job: Dict[str, Any], crm: Optional[CRMManager]):
+    payload = job["payload"] or {}
+    return _resolve_session(job, crm).score_leads(payload.get("lead_ids"), force=payload.get("force", False))
+
+
+def _run_archive(job: Dict[str, Any], crm: Optional[CRMManager]):
+    payload = job["payload"] or {}
+    return _resolve_session(job, crm).archive(**payload)
+
+
+job_queue.register("enrich_lead", _run_enrich_lead)
+job_queue.register("score_lead", _run_score_lead)
+job_queue.register("enrich_bulk", _run_enrich_bulk)
+job_queue.register("score_bulk", _run_score_bulk)
+job_queue.register("archive", _run_archive)
+
+
+def enqueue_for(
+    crm: CRMManager,
+    kind: str,
+    target: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL,
+    payload: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Enqueue a job for the session's spreadsheet, running it with that session."""
+    return job_queue.enqueue(
+        kind,
+        sheet=crm.spreadsheet_key,
+        target=target,
+        priority=priority,
+        payload=payload,
+        context=crm,
+    )
+
+
+def enqueue_archiving() -> List[Dict[str, Any]]:
+    """Queue an archive run for every spreadsheet with a live session."""
+    from api.deps import _user_sessions
+    jobs, seen = [], set()
+    for session in list(_user_sessions.values()):
+        try:
+            key = session.spreadsheet_key
+        except Exception:
+            continue  # session whose token no longer works
+        if key not in seen:
+            seen.add(key)
+            jobs.append(enqueue_for(session, "archive", priority=PRIORITY_LOW))
+    return jobs
+
+
+_archive_stop = threading.Event()
+
+
+def _archive_schedule():
+    while not _archive_stop.wait(ARCHIVE_INTERVAL):
+        try:
+            jobs = enqueue_archiving()
+            print(f"[Archive] Queued archiving for {len(jobs)} spreadsheets")
+        except Exception as e:
+            print(f"[Archive] Scheduling failed: {e}")
+
+
+def start_archive_schedule():
+    if ARCHIVE_INTERVAL <= 0:
+        return
+    _archive_stop.clear()
+    threading.Thread(target=_archive_schedule, name="archive-schedule", daemon=True).start()
+
+
+def stop_archive_schedule():
+    _archive_stop.set()
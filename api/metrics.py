@@ -0,0 +1,59 @@
+"""
+HTTP metrics for the API: a pure ASGI middleware timing every request, and
+the `/metrics` response in the Prometheus text format.
+
+Requests are labelled by route template (e.g. `/api/leads/{lead_id}`), not
+the raw path, so label cardinality stays bounded. Long-lived streams such as
+`/api/events` are recorded when they close.
+"""
+import hmac
+import os
+import time
+from typing import Optional
+
+from fastapi import HTTPException, Response
+
+from src.services.metrics import registry, HTTP_REQUESTS, HTTP_LATENCY
+
+# If set, /metrics requires "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsMiddleware:
+    """Counts requests and observes their latency by method, route and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500  # if the app raises before responding
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_LATENCY.observe(time.perf_counter() - started, method, route)
+            HTTP_REQUESTS.inc(method, route, str(status))
+
+
+def metrics_response(authorization: Optional[str] = None) -> Response:
+    """Render every registered metric; enforces METRICS_TOKEN when configured."""
+    if METRICS_TOKEN:
+        supplied = (authorization or "").replace("Bearer ", "", 1)
+        if not hmac.compare_digest(supplied, METRICS_TOKEN):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,70 @@
+"""
+Fast-path JSON responses with optional gzip/brotli compression.
+
+Endpoints that return large lists build the payload from `entity_dict()` and
+hand it to `fast_json()`, which skips FastAPI's `jsonable_encoder` pass.
+"""
+import gzip
+import os
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+from src.crm.serialization import dumps
+from src.services.timing import span
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; compressing them costs more
+# CPU than it saves on the wire.
+COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "16384"))
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+# Suffixes appended to the ETag of compressed representations
+ENCODING_ETAG_SUFFIXES = {"br": "-br", "gzip": "-gzip"}
+
+
+def _accepted_encodings(request: Request) -> set:
+    header = request.headers.get("accept-encoding", "")
+    return {part.split(";")[0].strip().lower() for part in header.split(",") if part.strip()}
+
+
+def _compress(request: Request, body: bytes):
+    """Return (body, content_encoding) using the best encoding the client accepts."""
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return body, None
+    accepted = _accepted_encodings(request)
+    if brotli is not None and "br" in accepted:
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    if "gzip" in accepted:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), "gzip"
+    return body, None
+
+
+def fast_json(request: Request, payload: Any, response: Optional[Response] = None, status_code: int = 200) -> Response:
+    """
+    Encode `payload` straight to JSON bytes and wrap it in a Response.
+    Headers already set on the injected `response` (e.g. ETag) are carried over.
+    """
+    with span("encode"):
+        body = dumps(payload)
+    with span("compress"):
+        body, encoding = _compress(request, body)
+
+    headers = dict(response.headers) if response is not None else {}
+    headers.pop("content-length", None)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        etag = headers.get("etag")
+        if etag and etag.endswith('"'):
+            headers["etag"] = etag[:-1] + ENCODING_ETAG_SUFFIXES[encoding] + '"'
+    vary = headers.pop("vary", "")
+    if "accept-encoding" not in vary.lower():
+        vary = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+    headers["Vary"] = vary
+
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
@@ -2,69 +2,52 @@
 FastAPI Server for Sales CRM.
 Provides REST API endpoints for the Next.js dashboard.
 """
-from fastapi import FastAPI, HTTPException, Query, Header, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, field_validator
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
 from datetime import date
 
 import sys
+import time
 import os
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.auth import authenticate
 from src.sheets import SheetManager
-from src.crm.manager import CRMManager
-from api.deps import get_crm_session
+from src.crm.manager import (
+    CRMManager, LEADS_WS, OPPS_WS, ACTIVITIES_WS, ARCHIVE_CLOSED_AFTER_DAYS, ARCHIVE_ACTIVITIES_AFTER_DAYS
+)
+from api.deps import get_crm_session, get_sheet_manager
+from api.jobs import job_queue, enqueue_for, start_archive_schedule, stop_archive_schedule
+from src.services.jobs import PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW, QUEUED, RUNNING, DONE, FAILED
+from api.http_cache import not_modified
+from api.responses import fast_json
+from api.metrics import MetricsMiddleware, metrics_response
+from api.timing import ServerTimingMiddleware
+from api.debug import ProfiledRoute, RequestProfileMiddleware, require_debug_token, request_profile, cache_inventory
+from src.services.profiling import SamplingProfiler, ProfilerBusy, MAX_PROFILE_SECONDS, start_tracemalloc, stop_tracemalloc, tracemalloc_diff
+from src.crm.serialization import entity_dict
+from src.crm.events import change_hub
+from src.crm.enrichment import enrichment_service
+from src.crm.snapshots import default_store, SNAPSHOT_PRELOAD
+from src.services.outbound import outbound
 from fastapi import Depends
 from src.crm.models import (
     Lead, Opportunity, Activity,
     LeadStatus, LeadSource, PipelineStage, ActivityType, CompanySize
 )
 
-# New dependency for just authenticated SheetManager (without CRM session)
-async def get_sheet_manager(authorization: Optional[str] = Header(None)):
-    from src.auth import authenticate
-    from google.oauth2.credentials import Credentials
-    from src.sheets import SheetManager
-    import gspread
-    
-    # Require Bearer token
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header required. Please sign in.")
-    
-    token = authorization.replace("Bearer ", "").strip()
-    if not token:
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-    
-    # MOCK MODE check
-    if os.getenv("MOCK_DATA_MODE") == "true":
-        print(f"[Auth] Mock Mode enabled. Using MockSheetManager.")
-        from src.services.local_json import MockSheetManager
-        return MockSheetManager()
-
-    try:
-        print(f"[Auth] Attempting token auth (first 20 chars): {token[:20]}...")
-        creds = Credentials(token=token)
-        gc = gspread.authorize(creds)
-        # Test the connection
-        gc.list_spreadsheet_files()
-        print("[Auth] Token auth successful")
-        return SheetManager(gc)
-    except Exception as e:
-        print(f"[Auth] Token auth failed: {e}")
-        raise HTTPException(
-            status_code=401, 
-            detail="Google authentication failed. Please sign out and sign in again to refresh your session."
-        )
-
 app = FastAPI(
     title="Sales CRM API",
     description="REST API for Sales Pipeline CRM backed by Google Sheets",
     version="0.52.0"
 )
+# Lets X-Profile requests run sync endpoints under cProfile (see api/debug.py)
+app.router.route_class = ProfiledRoute
 
 # CORS for Next.js frontend
 app.add_middleware(
@@ -84,11 +67,43 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(RequestProfileMiddleware)
 
 
 # Global CRM manager removed in favor of Dependency Injection (api.deps)
 
 
+@app.on_event("startup")
+def start_job_queue():
+    # Resumes jobs left queued or running by a previous process
+    job_queue.start()
+    start_archive_schedule()
+
+
+@app.on_event("startup")
+def preload_snapshots():
+    # Runs before the server accepts connections, so first requests skip the disk read
+    store = default_store()
+    if store is None:
+        return
+    store.prune()
+    if not SNAPSHOT_PRELOAD:
+        return
+    started = time.perf_counter()
+    loaded = store.preload([s.strip() for s in SNAPSHOT_PRELOAD.split(",") if s.strip()])
+    print(f"[Snapshots] Preloaded {len(loaded)} worksheets ({sum(loaded.values()):,} rows) "
+          f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+@app.on_event("shutdown")
+def stop_job_queue():
+    stop_archive_schedule()
+    job_queue.stop()
+    outbound.close()
+
+
 
 # =============================================================================
 # Request/Response Models
@@ -181,6 +196,21 @@ class StageUpdate(BaseModel):
     stage: str
 
 
+class BulkEnrichRequest(BaseModel):
+    lead_ids: Optional[List[str]] = None  # default: every lead not yet enriched
+    retry_failed: bool = True
+
+
+class BulkScoreRequest(BaseModel):
+    lead_ids: Optional[List[str]] = None  # default: every lead
+    force: bool = False  # rescore even if nothing changed
+
+
+class ArchiveRequest(BaseModel):
+    closed_after_days: int = Field(ARCHIVE_CLOSED_AFTER_DAYS, ge=0)
+    activities_after_days: int = Field(ARCHIVE_ACTIVITIES_AFTER_DAYS, ge=0)
+
+
 # =============================================================================
 # Root & Health
 # =============================================================================
@@ -195,6 +225,66 @@ def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus metrics: HTTP, Google Sheets calls, caches, sessions, LLM calls and jobs."""
+    return metrics_response(authorization)
+
+
+# =============================================================================
+# Debug (admin only, enabled by DEBUG_TOKEN)
+# =============================================================================
+
+@app.post("/api/_debug/profile", include_in_schema=False, dependencies=[Depends(require_debug_token)])
+def debug_profile(seconds: float = Query(30, gt=0, le=MAX_PROFILE_SECONDS),
+                  interval_ms: float = Query(10, ge=1, le=1000),
+                  idle: bool = False):
+    """
+    Sample every thread in this worker for `seconds` and return collapsed
+    stacks (flamegraph.pl / speedscope input). Idle threads are skipped
+    unless `idle=true`.
+    """
+    try:
+        profiler = SamplingProfiler(interval=interval_ms / 1000, idle=idle).run(seconds)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    print(f"[Profile] Sampled {profiler.samples} times over {seconds}s ({len(profiler.stacks)} distinct stacks)")
+    return Response(content=profiler.collapsed(), media_type="text/plain",
+                    headers={"X-Profile-Samples": str(profiler.samples)})
+
+
+@app.get("/api/_debug/profile/requests/{profile_id}", include_in_schema=False,
+         dependencies=[Depends(require_debug_token)])
+def debug_request_profile(profile_id: str):
+    """cProfile summary of a request sent with `X-Profile: 1`."""
+    summary = request_profile(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found (only the most recent are kept)")
+    return Response(content=summary, media_type="text/plain")
+
+
+@app.post("/api/_debug/tracemalloc", include_in_schema=False, dependencies=[Depends(require_debug_token)])
+def debug_tracemalloc_start():
+    """Start tracemalloc if needed and take the baseline snapshot for later diffs."""
+    return {**start_tracemalloc(), "caches": cache_inventory()}
+
+
+@app.get("/api/_debug/tracemalloc", include_in_schema=False, dependencies=[Depends(require_debug_token)])
+def debug_tracemalloc_diff(limit: int = Query(25, ge=1, le=500), group_by: str = "lineno"):
+    """Top allocation growth since the baseline, with current cache sizes."""
+    try:
+        return {**tracemalloc_diff(limit, group_by), "caches": cache_inventory()}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.delete("/api/_debug/tracemalloc", include_in_schema=False, dependencies=[Depends(require_debug_token)])
+def debug_tracemalloc_stop():
+    """Stop tracing and drop the baseline (tracemalloc slows allocations while on)."""
+    stop_tracemalloc()
+    return {"tracing": False}
+
+
 @app.get("/api/sheets")
 def list_available_sheets(sm: SheetManager = Depends(get_sheet_manager)):
     """List all Google Sheets available to the user."""
@@ -202,6 +292,10 @@ def list_available_sheets(sm: SheetManager = Depends(get_sheet_manager)):
     return {"sheets": files}
 
 
+class SummaryModeUpdate(BaseModel):
+    mode: str  # "formula" or "materialized"
+
+
 class CreateSheetRequest(BaseModel):
     name: str = "Sales Pipeline 2026"
 
@@ -256,12 +350,18 @@ def ensure_schema_sheet(sheet_id: str, sm: SheetManager = Depends(get_sheet_mana
 
 @app.get("/api/leads")
 def list_leads(
+    request: Request,
+    response: Response,
     status: Optional[str] = Query(None, description="Filter by status"),
     source: Optional[str] = Query(None, description="Filter by source"),
     crm: CRMManager = Depends(get_crm_session),
 ):
     """Get all leads, optionally filtered."""
     # crm = get_crm() -> Injected
+    cached = not_modified(request, response, crm, LEADS_WS)
+    if cached:
+        return cached
+
     leads = crm.get_leads()
 
     if status:
@@ -269,12 +369,16 @@ def list_leads(
     if source:
         leads = [l for l in leads if l.source.value == source]
 
-    return {"leads": [l.model_dump() for l in leads], "count": len(leads)}
+    return fast_json(request, {"leads": [entity_dict(l) for l in leads], "count": len(leads)}, response)
 
 
 @app.get("/api/leads/{lead_id}")
-def get_lead(lead_id: str, crm: CRMManager = Depends(get_crm_session)):
+def get_lead(lead_id: str, request: Request, response: Response, crm: CRMManager = Depends(get_crm_session)):
     """Get a specific lead by ID."""
+    cached = not_modified(request, response, crm, LEADS_WS)
+    if cached:
+        return cached
+
     lead = crm.get_lead(lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
@@ -284,7 +388,6 @@ def get_lead(lead_id: str, crm: CRMManager = Depends(get_crm_session)):
 @app.post("/api/leads", status_code=201)
 def create_lead(
     data: LeadCreate, 
-    background_tasks: BackgroundTasks,
     crm: CRMManager = Depends(get_crm_session)
 ):
     """Create a new lead."""
@@ -307,7 +410,7 @@ def create_lead(
     
     # Trigger enrichment if company name is present
     if created.company_name:
-        background_tasks.add_task(crm.enrich_lead, created.lead_id)
+        enqueue_for(crm, "enrich_lead", created.lead_id, priority=PRIORITY_NORMAL)
         
     return created.model_dump()
 
@@ -358,7 +461,6 @@ def update_lead(lead_id: str, data: LeadUpdate, crm: CRMManager = Depends(get_cr
 @app.post("/api/leads/{lead_id}/enrich")
 def enrich_lead(
     lead_id: str, 
-    background_tasks: BackgroundTasks,
     crm: CRMManager = Depends(get_crm_session)
 ):
     """Manually trigger enrichment for a lead."""
@@ -366,14 +468,54 @@ def enrich_lead(
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
     
-    background_tasks.add_task(crm.enrich_lead, lead_id)
-    return {"message": "Enrichment started", "lead_id": lead_id}
+    job = enqueue_for(crm, "enrich_lead", lead_id, priority=PRIORITY_HIGH)
+    return {"message": "Enrichment started", "lead_id": lead_id, "job_id": job["id"]}
+
+
+@app.post("/api/leads/enrich-bulk", status_code=202)
+def enrich_leads_bulk(data: BulkEnrichRequest, crm: CRMManager = Depends(get_crm_session)):
+    """
+    Enrich many leads in one background job (concurrent search/extract, batched writes).
+    Poll `GET /api/jobs/{job_id}` for progress. Re-posting while a run is active
+    returns the same job; re-posting after an interruption resumes where it stopped.
+    """
+    job = enqueue_for(
+        crm,
+        "enrich_bulk",
+        priority=PRIORITY_LOW,
+        payload={"lead_ids": data.lead_ids, "retry_failed": data.retry_failed},
+    )
+    return {"message": "Bulk enrichment started", "job_id": job["id"], "status": job["status"]}
+
+
+@app.post("/api/leads/score-bulk", status_code=202)
+def score_leads_bulk(data: BulkScoreRequest, crm: CRMManager = Depends(get_crm_session)):
+    """
+    AI-score many leads in one background job, several leads per LLM request.
+    Leads unchanged since their last scoring are skipped unless `force` is set.
+    """
+    job = enqueue_for(
+        crm,
+        "score_bulk",
+        priority=PRIORITY_LOW,
+        payload={"lead_ids": data.lead_ids, "force": data.force},
+    )
+    return {"message": "Bulk scoring started", "job_id": job["id"], "status": job["status"]}
+
+
+@app.post("/api/leads/rescore")
+def rescore_leads(crm: CRMManager = Depends(get_crm_session)):
+    """
+    Recompute scores and heat levels for every lead in one vectorized pass
+    (trained win model if present, else the heuristic), written back as a
+    single batch update of the changed rows. No LLM calls.
+    """
+    return crm.rescore_leads()
 
 
 @app.post("/api/leads/{lead_id}/score")
 def score_lead(
     lead_id: str, 
-    background_tasks: BackgroundTasks,
     crm: CRMManager = Depends(get_crm_session)
 ):
     """Manually trigger AI scoring for a lead."""
@@ -381,8 +523,8 @@ def score_lead(
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
     
-    background_tasks.add_task(crm.score_lead, lead_id)
-    return {"message": "Scoring started", "lead_id": lead_id}
+    job = enqueue_for(crm, "score_lead", lead_id, priority=PRIORITY_HIGH)
+    return {"message": "Scoring started", "lead_id": lead_id, "job_id": job["id"]}
 
 
 @app.delete("/api/leads/{lead_id}")
@@ -400,25 +542,65 @@ def delete_lead(lead_id: str, crm: CRMManager = Depends(get_crm_session)):
 
 @app.get("/api/opportunities")
 def list_opportunities(
+    request: Request,
+    response: Response,
     stage: Optional[str] = Query(None, description="Filter by pipeline stage"),
     lead_id: Optional[str] = Query(None, description="Filter by lead"),
+    include_archived: bool = Query(False, description="Also read deals moved to archive worksheets"),
     crm: CRMManager = Depends(get_crm_session),
 ):
     """Get all opportunities, optionally filtered."""
-    opps = crm.get_opportunities()
+    archives = crm.archive_worksheets(OPPS_WS) if include_archived else []
+    cached = not_modified(request, response, crm, OPPS_WS, *archives)
+    if cached:
+        return cached
+
+    opps = crm.get_opportunities(include_archived)
 
     if stage:
         opps = [o for o in opps if o.stage.value == stage]
     if lead_id:
         opps = [o for o in opps if o.lead_id == lead_id]
 
-    return {"opportunities": [o.model_dump() for o in opps], "count": len(opps)}
+    return fast_json(request, {"opportunities": [entity_dict(o) for o in opps], "count": len(opps)}, response)
+
+
+@app.get("/api/opportunities/risk")
+def opportunities_risk(
+    top_n: int = Query(10, ge=0, le=50, description="How many of the riskiest deals get an AI analysis"),
+    limit: int = Query(100, ge=1, le=1000),
+    ai: bool = Query(True, description="Set false for heuristics only"),
+    crm: CRMManager = Depends(get_crm_session),
+):
+    """
+    Rank every open deal by risk (age, inactivity, probability) in one pass.
+    Only the top-N riskiest deals are sent to the LLM, concurrently and cached.
+    """
+    deals = crm.analyze_portfolio_risk(top_n=top_n, use_ai=ai)
+    return {
+        "deals": deals[:limit],
+        "count": min(len(deals), limit),
+        "open_deals": len(deals),
+        "high_risk": sum(1 for d in deals if d["risk_level"] == "High"),
+        "analyzed": sum(1 for d in deals if d["ai_analyzed"]),
+    }
 
 
 @app.get("/api/opportunities/{opp_id}")
-def get_opportunity(opp_id: str, crm: CRMManager = Depends(get_crm_session)):
+def get_opportunity(
+    opp_id: str,
+    request: Request,
+    response: Response,
+    include_archived: bool = Query(False, description="Also look in archive worksheets"),
+    crm: CRMManager = Depends(get_crm_session),
+):
     """Get a specific opportunity by ID."""
-    opp = crm.get_opportunity(opp_id)
+    archives = crm.archive_worksheets(OPPS_WS) if include_archived else []
+    cached = not_modified(request, response, crm, OPPS_WS, *archives)
+    if cached:
+        return cached
+
+    opp = crm.get_opportunity(opp_id, include_archived)
     if not opp:
         raise HTTPException(status_code=404, detail="Opportunity not found")
     return opp.model_dump()
@@ -518,13 +700,21 @@ def delete_opportunity(opp_id: str, crm: CRMManager = Depends(get_crm_session)):
 
 @app.get("/api/activities")
 def list_activities(
+    request: Request,
+    response: Response,
     lead_id: Optional[str] = Query(None),
     opp_id: Optional[str] = Query(None),
+    include_archived: bool = Query(False, description="Also read activities moved to archive worksheets"),
     crm: CRMManager = Depends(get_crm_session),
 ):
     """Get activities, optionally filtered by lead or opportunity."""
-    activities = crm.get_activities(lead_id=lead_id, opp_id=opp_id)
-    return {"activities": [a.model_dump() for a in activities], "count": len(activities)}
+    archives = crm.archive_worksheets(ACTIVITIES_WS) if include_archived else []
+    cached = not_modified(request, response, crm, ACTIVITIES_WS, *archives)
+    if cached:
+        return cached
+
+    activities = crm.get_activities(lead_id=lead_id, opp_id=opp_id, include_archived=include_archived)
+    return fast_json(request, {"activities": [entity_dict(a) for a in activities], "count": len(activities)}, response)
 
 
 @app.post("/api/activities", status_code=201)
@@ -553,27 +743,66 @@ def create_activity(data: ActivityCreate, crm: CRMManager = Depends(get_crm_sess
 # =============================================================================
 
 @app.get("/api/dashboard")
-def get_dashboard(crm: CRMManager = Depends(get_crm_session)):
+def get_dashboard(request: Request, response: Response, crm: CRMManager = Depends(get_crm_session)):
     """Get dashboard summary data."""
+    # The totals include archived deals
+    cached = not_modified(request, response, crm, LEADS_WS, OPPS_WS, *crm.archive_worksheets(OPPS_WS))
+    if cached:
+        return cached
+
     return crm.get_pipeline_summary()
 
 
+@app.get("/api/summary/mode")
+def get_summary_mode(crm: CRMManager = Depends(get_crm_session)):
+    """Whether the Summary worksheet uses live formulas or server-written values."""
+    return {"mode": crm.summary_mode}
+
+
+@app.put("/api/summary/mode")
+def set_summary_mode(data: SummaryModeUpdate, crm: CRMManager = Depends(get_crm_session)):
+    """
+    Switch the Summary worksheet between whole-column formulas ("formula") and
+    precomputed values written by the server after changes ("materialized").
+    """
+    try:
+        return crm.set_summary_mode(data.mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/summary/refresh")
+def refresh_summary(crm: CRMManager = Depends(get_crm_session)):
+    """Rewrite the materialized Summary worksheet now instead of waiting for the debounce."""
+    if crm.summary_mode != "materialized":
+        raise HTTPException(status_code=409, detail="Summary sheet is in formula mode")
+    return crm.materialize_summary()
+
+
 @app.get("/api/pipeline")
-def get_pipeline(crm: CRMManager = Depends(get_crm_session)):
+def get_pipeline(request: Request, response: Response, crm: CRMManager = Depends(get_crm_session)):
     """Get pipeline data formatted for Kanban view."""
+    cached = not_modified(request, response, crm, LEADS_WS, OPPS_WS)
+    if cached:
+        return cached
+
     opps = crm.get_opportunities()
-    leads = {l.lead_id: l for l in crm.get_leads()}
+    # Each lead is converted once, even if it has several opportunities
+    leads = {l.lead_id: entity_dict(l) for l in crm.get_leads()}
+
+    # Group by stage in a single pass
+    by_stage = {stage: [] for stage in PipelineStage}
+    for o in opps:
+        by_stage[o.stage].append(o)
 
-    # Group by stage
     pipeline = {}
-    for stage in PipelineStage:
-        stage_opps = [o for o in opps if o.stage == stage]
+    for stage, stage_opps in by_stage.items():
         pipeline[stage.value] = {
             "stage": stage.value,
             "opportunities": [
                 {
-                    **o.model_dump(),
-                    "lead": leads.get(o.lead_id).model_dump() if o.lead_id in leads else None
+                    **entity_dict(o),
+                    "lead": leads.get(o.lead_id),
                 }
                 for o in stage_opps
             ],
@@ -581,10 +810,119 @@ def get_pipeline(crm: CRMManager = Depends(get_crm_session)):
             "total_value": sum(o.value for o in stage_opps),
         }
 
-    return {
+    return fast_json(request, {
         "pipeline": pipeline,
         "stages": [s.value for s in PipelineStage],
-    }
+    }, response)
+
+
+# =============================================================================
+# Change Events (Server-Sent Events)
+# =============================================================================
+
+@app.get("/api/events")
+async def stream_events(
+    last_event_id: Optional[str] = Header(None),
+    crm: CRMManager = Depends(get_crm_session),
+):
+    """
+    Stream entity-level changes (created/updated/deleted) for the current spreadsheet.
+    Resumable via the standard `Last-Event-ID` header; a `resync` event means the
+    client missed too much and should refetch.
+    """
+    key = await run_in_threadpool(lambda: crm.spreadsheet_key)
+    stream = change_hub.subscribe(
+        key,
+        last_event_id=last_event_id,
+        poll=crm.poll_external_changes,
+        poll_interval=crm.CACHE_TTL,
+    )
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# =============================================================================
+# Delta Sync
+# =============================================================================
+
+@app.get("/api/sync")
+def sync_changes(
+    request: Request,
+    since: int = Query(0, ge=0, description="Snapshot version the client already has"),
+    epoch: Optional[str] = Query(None, description="Epoch returned with that version"),
+    crm: CRMManager = Depends(get_crm_session),
+):
+    """
+    Return only the leads, opportunities and activities changed since `since`.
+    `full_resync: true` means the version is no longer covered and the client
+    must reload everything, then continue syncing from the returned version.
+    """
+    changes = crm.changes_since(since)
+    if epoch and epoch != changes["epoch"] and not changes["full_resync"]:
+        # Version numbers from another server process are meaningless here
+        changes = {"version": changes["version"], "epoch": changes["epoch"], "full_resync": True}
+    return fast_json(request, changes)
+
+
+# =============================================================================
+# Archiving
+# =============================================================================
+
+@app.get("/api/archive/preview")
+def preview_archive(
+    closed_after_days: int = Query(ARCHIVE_CLOSED_AFTER_DAYS, ge=0),
+    activities_after_days: int = Query(ARCHIVE_ACTIVITIES_AFTER_DAYS, ge=0),
+    crm: CRMManager = Depends(get_crm_session),
+):
+    """How many closed deals and old activities an archive run would move, per archive worksheet."""
+    return crm.archive(closed_after_days, activities_after_days, dry_run=True)
+
+
+@app.post("/api/archive", status_code=202)
+def start_archive(data: ArchiveRequest, crm: CRMManager = Depends(get_crm_session)):
+    """
+    Move long-closed deals and old activities into yearly archive worksheets
+    (Opportunities_Archive_YYYY, Activities_YYYY) in a background job. Lists
+    skip archived rows unless called with `include_archived=true`.
+    """
+    job = enqueue_for(crm, "archive", priority=PRIORITY_LOW, payload=data.model_dump())
+    return {"message": "Archiving started", "job_id": job["id"], "status": job["status"]}
+
+
+# =============================================================================
+# Background Jobs
+# =============================================================================
+
+@app.get("/api/jobs")
+def list_jobs(
+    status: Optional[str] = Query(None, description="queued, running, done or failed"),
+    limit: int = Query(50, ge=1, le=500),
+    crm: CRMManager = Depends(get_crm_session),
+):
+    """List recent background jobs (enrichment, scoring, archiving) for the current spreadsheet."""
+    if status is not None and status not in (QUEUED, RUNNING, DONE, FAILED):
+        raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+    sheet = crm.spreadsheet_key
+    jobs = job_queue.list(sheet=sheet, status=status, limit=limit)
+    return {"jobs": jobs, "count": len(jobs), "stats": job_queue.stats(sheet=sheet)}
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str, crm: CRMManager = Depends(get_crm_session)):
+    """Get the status, attempts and last error of a background job."""
+    job = job_queue.get(job_id)
+    if not job or job["sheet"] != crm.spreadsheet_key:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/api/enrichment/cache")
+def enrichment_cache_stats(crm: CRMManager = Depends(get_crm_session)):
+    """Enrichment cache size, hit rate and estimated latency saved (since server start)."""
+    return enrichment_service.cache.stats()
 
 
 @app.get("/api/config")
@@ -605,6 +943,8 @@ def get_config():
 
 @app.get("/api/search")
 def search_all(
+    request: Request,
+    response: Response,
     q: str = Query(..., min_length=1, description="Search query"),
     crm: CRMManager = Depends(get_crm_session),
 ):
@@ -612,6 +952,10 @@ def search_all(
     Global search across leads and opportunities.
     Returns results grouped by entity type.
     """
+    cached = not_modified(request, response, crm, LEADS_WS, OPPS_WS)
+    if cached:
+        return cached
+
     query = q.lower().strip()
     
     # Search leads
@@ -636,24 +980,24 @@ def search_all(
         or (o.lead_id in leads_by_id and query in leads_by_id[o.lead_id].company_name.lower())
     ]
     
-    return {
+    return fast_json(request, {
         "query": q,
         "results": {
             "leads": [
                 {
-                    **l.model_dump(),
+                    **entity_dict(l),
                     "type": "lead",
                 }
                 for l in matching_leads[:10]  # Limit to 10 results
             ],
             "opportunities": [
                 {
-                    **o.model_dump(),
+                    **entity_dict(o),
                     "type": "opportunity",
-                    "lead": leads_by_id.get(o.lead_id).model_dump() if o.lead_id in leads_by_id else None,
+                    "lead": entity_dict(leads_by_id[o.lead_id]) if o.lead_id in leads_by_id else None,
                 }
                 for o in matching_opps[:10]
             ],
         },
         "total": len(matching_leads) + len(matching_opps),
-    }
+    }, response)
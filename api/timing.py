@@ -0,0 +1,89 @@
+"""
+Server-Timing for the API: a pure ASGI middleware that times each request's
+spans (Sheets I/O, row decoding, JSON encoding, compression, outbound calls,
+and the remainder as business logic) and reports them in a `Server-Timing`
+header, visible in the browser devtools network panel.
+
+Requests slower than SLOW_REQUEST_MS also print a one-line JSON breakdown,
+so a slow endpoint shows where its time went without re-running it under a
+profiler. The header is sent with the response start, so streamed responses
+(`/api/events`) only report what happened before the first byte.
+"""
+import json
+import os
+
+from src.services.timing import begin_request, end_request
+
+# Set SERVER_TIMING=0 to stop sending the header (slow-request logging stays on)
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING", "1").lower() not in ("0", "false", "no", "off")
+# Requests at or above this many milliseconds are logged with their breakdown
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+
+SPAN_DESCRIPTIONS = {
+    "sheets": "Google Sheets I/O",
+    "decode": "Row decoding",
+    "encode": "JSON encoding",
+    "compress": "Response compression",
+    "outbound": "OpenAI / Brave calls",
+    "logic": "Business logic",
+    "total": "Total",
+}
+
+
+def _header_value(total_ms: float, spans: dict) -> bytes:
+    parts = []
+    for name, (ms, count) in spans.items():
+        desc = SPAN_DESCRIPTIONS.get(name, name)
+        if name != "logic":
+            desc = f"{desc} ({count} call{'s' if count != 1 else ''})"
+        parts.append(f'{name};dur={ms:.1f};desc="{desc}"')
+    parts.append(f'total;dur={total_ms:.1f};desc="{SPAN_DESCRIPTIONS["total"]}"')
+    return ", ".join(parts).encode("latin-1", "replace")
+
+
+class ServerTimingMiddleware:
+    """Adds a Server-Timing header and logs the span breakdown of slow requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer, token = begin_request()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING_HEADER:
+                    total_ms, spans = timer.breakdown()
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _header_value(total_ms, spans)))
+                    # Cross-origin pages (the Next.js frontend) only see the
+                    # timings when the origin is allowed to
+                    for key, value in scope.get("headers", []):
+                        if key == b"origin":
+                            headers.append((b"timing-allow-origin", value))
+                            break
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request(token)
+            total_ms, spans = timer.breakdown()
+            if total_ms >= SLOW_REQUEST_MS:
+                record = {
+                    "method": scope.get("method", ""),
+                    "route": getattr(scope.get("route"), "path", None) or "unmatched",
+                    "path": scope.get("path", ""),
+                    "status": status,
+                    "total_ms": round(total_ms, 1),
+                    "spans": {name: {"ms": round(ms, 1), "count": count} for name, (ms, count) in spans.items()},
+                }
+                print(f"[SlowRequest] {json.dumps(record)}")
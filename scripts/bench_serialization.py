@@ -0,0 +1,122 @@
+"""
+Benchmark: default FastAPI serialization vs the fast JSON path.
+
+Compares CPU time per request for a list response of N leads/opportunities:
+  - default: model_dump() per row -> jsonable_encoder -> json.dumps (what
+    FastAPI + Starlette's JSONResponse do for a returned dict)
+  - fast:    entity_dict() per row -> serialization.dumps (orjson if installed)
+  - fast+gzip: the above plus response compression
+
+Usage:
+    python scripts/bench_serialization.py --rows 10000 --iterations 20
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from rich.console import Console
+from rich.table import Table
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+
+from src.crm.models import Lead, Opportunity, LeadStatus, LeadSource, CompanySize, PipelineStage
+from src.crm.serialization import dumps, entity_dict, orjson
+
+console = Console()
+
+
+def make_rows(count: int):
+    """Deterministic synthetic Lead and Opportunity rows (sheet format)."""
+    rng = random.Random(42)
+    base = datetime(2026, 1, 1)
+    leads, opps = [], []
+    for i in range(count):
+        created = base + timedelta(minutes=i)
+        lead = Lead(
+            lead_id=f"L{i:07d}",
+            company_name=f"Company {i}",
+            contact_name=f"Contact {i}",
+            contact_email=f"contact{i}@example.com",
+            status=rng.choice(list(LeadStatus)[:-1]),
+            source=rng.choice(list(LeadSource)),
+            company_size=rng.choice(list(CompanySize)),
+            notes="Met at the expo, interested in the annual plan.",
+            created_at=created,
+            updated_at=created,
+        )
+        leads.append(lead.to_row())
+        opp = Opportunity(
+            opp_id=f"O{i:07d}",
+            lead_id=lead.lead_id,
+            title=f"Deal {i}",
+            stage=rng.choice(list(PipelineStage)[:-1]),
+            value=round(rng.uniform(1000, 50000), 2),
+            probability=rng.randint(0, 100),
+            created_at=created,
+            updated_at=created,
+        )
+        opps.append(opp.to_row())
+    return leads, opps
+
+
+def default_path(key: str, models) -> bytes:
+    content = jsonable_encoder({key: [m.model_dump() for m in models], "count": len(models)})
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(key: str, models) -> bytes:
+    return dumps({key: [entity_dict(m) for m in models], "count": len(models)})
+
+
+def fast_gzip_path(key: str, models) -> bytes:
+    return gzip.compress(fast_path(key, models), compresslevel=5)
+
+
+def cpu_ms_per_call(fn, iterations: int) -> float:
+    fn()  # warm up
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) * 1000 / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization paths.")
+    parser.add_argument("--rows", type=int, default=10000, help="Rows per response")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed iterations per path")
+    args = parser.parse_args()
+
+    lead_rows, opp_rows = make_rows(args.rows)
+    leads = [Lead.from_row(r) for r in lead_rows]
+    opps = [Opportunity.from_row(r) for r in opp_rows]
+
+    # Sanity check: both paths must produce the same document
+    assert json.loads(default_path("leads", leads)) == json.loads(fast_path("leads", leads))
+
+    table = Table(title=f"Serialization CPU per request ({args.rows:,} rows, encoder: {'orjson' if orjson else 'json'})")
+    table.add_column("Entity", style="bold")
+    table.add_column("Path")
+    table.add_column("CPU ms/request", justify="right")
+    table.add_column("Speedup", justify="right", style="green")
+    table.add_column("Body size", justify="right")
+
+    for key, models in (("leads", leads), ("opportunities", opps)):
+        baseline = cpu_ms_per_call(lambda: default_path(key, models), args.iterations)
+        for name, fn in (("default", default_path), ("fast", fast_path), ("fast+gzip", fast_gzip_path)):
+            ms = baseline if name == "default" else cpu_ms_per_call(lambda: fn(key, models), args.iterations)
+            size = len(fn(key, models))
+            table.add_row(key, name, f"{ms:.1f}", f"{baseline / ms:.1f}x", f"{size / 1024:,.0f} KB")
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
 import os
 import pickle
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-import gspread
+
+# google_auth_oauthlib (the browser login flow) and the gspread client setup
+# are imported only when needed: most processes never run the local login
 
 # If modifying these scopes, delete the file token.json.
 SCOPES = [
@@ -17,6 +17,8 @@ TOKEN_FILE = "token.json"
 
 def authenticate(profile: str = "default"):
     """Authenticates the user and returns gspread client and google credentials."""
+    from .google_client import authorize
+
     # Check for Service Account JSON in Env (Production/Render)
     if os.environ.get("GOOGLE_SERVICE_ACCOUNT_JSON"):
         try:
@@ -24,7 +26,7 @@ def authenticate(profile: str = "default"):
             from google.oauth2.service_account import Credentials as ServiceAccountCredentials
             info = json.loads(os.environ["GOOGLE_SERVICE_ACCOUNT_JSON"])
             creds = ServiceAccountCredentials.from_service_account_info(info, scopes=SCOPES)
-            gc = gspread.authorize(creds)
+            gc = authorize(creds)
             return gc, creds
         except Exception as e:
             print(f"Warning: Failed to load Service Account from Env: {e}")
@@ -55,6 +57,7 @@ def authenticate(profile: str = "default"):
     # If there are no (valid) credentials available, let the user log in.
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
+            from google.auth.transport.requests import Request
             creds.refresh(Request())
         else:
             # Server-side: Cannot open browser for login if we are here
@@ -63,7 +66,8 @@ def authenticate(profile: str = "default"):
 
             if not os.path.exists(CREDENTIALS_FILE):
                 raise FileNotFoundError(f"Could not find {CREDENTIALS_FILE}. Please download it from Google Cloud Console.")
-            
+
+            from google_auth_oauthlib.flow import InstalledAppFlow
             flow = InstalledAppFlow.from_client_secrets_file(
                 CREDENTIALS_FILE, SCOPES
             )
@@ -74,5 +78,5 @@ def authenticate(profile: str = "default"):
             with open(token_filename, "w") as token:
                 token.write(creds.to_json())
 
-    gc = gspread.authorize(creds)
+    gc = authorize(creds)
     return gc, creds
@@ -1,66 +1,221 @@
 import os
 import json
+import threading
+import time
 from datetime import datetime, date
-from typing import List, Optional, Dict, Any
-from .models import Opportunity, Activity, PipelineStage
-from openai import OpenAI
+from typing import List, Optional, Dict, Any, Tuple
+from .models import Lead, Opportunity, Activity, OPEN_STAGES, CLOSED_STAGES
+from .win_model import WinModelStore, win_model_store, deal_features
+from ..services.outbound import LLMClient
+
+INSIGHT_CACHE_TTL = 6 * 3600  # seconds
+INSIGHT_CACHE_MAX_ENTRIES = 5000
+
 
 class DealAnalyzer:
-    def __init__(self, openai_api_key: Optional[str] = None):
+    def __init__(self, openai_api_key: Optional[str] = None, models: WinModelStore = win_model_store):
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         if self.openai_api_key:
-            self.client = OpenAI(api_key=self.openai_api_key)
+            self.client = LLMClient(self.openai_api_key)
         else:
             self.client = None
+        self.models = models
+        # (opp_id, inputs) -> (expires_at, insight); inputs include the day-level
+        # metrics, so a cached insight never outlives the facts it was based on
+        self._insight_cache: Dict[Tuple, Tuple[float, Dict[str, Any]]] = {}
+        self._insight_lock = threading.Lock()
 
-    def analyze_opportunity(self, opp: Opportunity, activities: List[Activity]) -> Dict[str, Any]:
+    @staticmethod
+    def heuristic_risk(opp: Opportunity, last_activity_date: Optional[datetime], activity_count: int,
+                       today: Optional[datetime] = None, win_probability: Optional[int] = None) -> Dict[str, Any]:
         """
-        Analyzes an opportunity for risk and provides insights.
+        Rule-based risk metrics for a deal; no LLM involved. `win_probability`
+        (0-100, from the trained win model) replaces the rep-entered probability
+        when given.
         """
-        # 1. Calculate basic metrics
-        today = datetime.now()
+        today = today or datetime.now()
         age_days = (today - opp.created_at).days
-        
-        last_activity_date = None
-        if activities:
-            last_activity_date = max(a.date for a in activities)
+        if last_activity_date is not None:
             days_since_last_activity = (today - last_activity_date).days
         else:
             days_since_last_activity = age_days
 
-        # 2. Heuristic risk assessment
         is_stale = days_since_last_activity > 14
-        is_old = age_days > 90 and opp.stage not in [PipelineStage.CLOSED_WON, PipelineStage.CLOSED_LOST]
-        
+        is_old = age_days > 90 and opp.stage not in CLOSED_STAGES
+
         risk_score = 0
         if is_stale: risk_score += 40
         if is_old: risk_score += 30
-        if opp.probability < 20: risk_score += 20
-        
-        # 3. AI-powered deep analysis
-        ai_insight = self._get_ai_insight(opp, activities, age_days, days_since_last_activity)
+        probability = win_probability if win_probability is not None else opp.probability
+        if probability < 20: risk_score += 20
+
+        metrics = {
+            "age_days": age_days,
+            "days_since_last_activity": days_since_last_activity,
+            "activity_count": activity_count,
+        }
+        if win_probability is not None:
+            metrics["win_probability"] = win_probability
+        return {
+            "risk_score": risk_score,
+            "risk_level": "High" if risk_score > 60 else "Medium" if risk_score > 30 else "Low",
+            "metrics": metrics,
+        }
+
+    def win_probabilities(self, opps: List[Opportunity], leads: Optional[List[Lead]],
+                          activities: List[Activity], sheet: str = "") -> List[Optional[int]]:
+        """Model win probability (0-100) per deal, or None for all if `sheet` has no trained model."""
+        model = self.models.get(sheet)
+        if model is None or leads is None or not opps:
+            return [None] * len(opps)
+        probabilities = model.predict_proba(deal_features(opps, leads, activities))
+        return [int(round(p * 100)) for p in probabilities.tolist()]
+
+    def analyze_opportunity(self, opp: Opportunity, activities: List[Activity], lead: Optional[Lead] = None,
+                            lead_activities: Optional[List[Activity]] = None, sheet: str = "") -> Dict[str, Any]:
+        """
+        Analyzes an opportunity for risk and provides insights.
+        `lead`/`lead_activities` feed the win model, if one is trained for `sheet`.
+        """
+        # 1. Heuristic risk assessment
+        last_activity_date = max(a.date for a in activities) if activities else None
+        win_probability = None
+        if opp.stage in OPEN_STAGES and lead is not None:
+            win_probability = self.win_probabilities(
+                [opp], [lead], lead_activities if lead_activities is not None else activities, sheet)[0]
+        risk = self.heuristic_risk(opp, last_activity_date, len(activities), win_probability=win_probability)
+        metrics = risk["metrics"]
         
+        # 2. AI-powered deep analysis
+        ai_insight = self._get_ai_insight(opp, activities, metrics["age_days"], metrics["days_since_last_activity"])
+        return self._combine(opp, risk, ai_insight)
+
+    @staticmethod
+    def _combine(opp: Opportunity, risk: Dict[str, Any], ai_insight: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "opp_id": opp.opp_id,
-            "risk_score": min(risk_score + ai_insight.get("score_adjustment", 0), 100),
-            "risk_level": "High" if risk_score > 60 else "Medium" if risk_score > 30 else "Low",
+            "risk_score": min(risk["risk_score"] + ai_insight.get("score_adjustment", 0), 100),
+            "risk_level": risk["risk_level"],
             "risk_reason": ai_insight.get("reason", "No immediate risks identified."),
             "next_best_action": ai_insight.get("next_action", "Continue regular follow-up."),
-            "metrics": {
-                "age_days": age_days,
-                "days_since_last_activity": days_since_last_activity,
-                "activity_count": len(activities)
-            }
+            "metrics": risk["metrics"],
+        }
+
+    def analyze_portfolio(self, opps: List[Opportunity], activities: List[Activity],
+                          top_n: int = 10, use_ai: bool = True,
+                          leads: Optional[List[Lead]] = None, sheet: str = "") -> List[Dict[str, Any]]:
+        """
+        Rank every open deal by heuristic risk in one grouped pass over the
+        activities, then get AI insights (cached, fetched concurrently through
+        the shared OpenAI client) for the `top_n` riskiest deals only.
+        With `leads` and a win model trained for `sheet`, every deal also gets a model
+        win probability (one vectorized pass).
+        """
+        open_opps = [o for o in opps if o.stage in OPEN_STAGES]
+        win_probabilities = self.win_probabilities(open_opps, leads, activities, sheet)
+        wanted = {o.opp_id for o in open_opps}
+
+        # Group activities by deal once: count, latest date, 5 most recent (sheet order)
+        by_opp: Dict[str, List[Activity]] = {}
+        for activity in activities:
+            if activity.opp_id in wanted:
+                by_opp.setdefault(activity.opp_id, []).append(activity)
+
+        today = datetime.now()
+        ranked = []
+        for opp, win_probability in zip(open_opps, win_probabilities):
+            acts = by_opp.get(opp.opp_id, [])
+            last_date = max(a.date for a in acts) if acts else None
+            ranked.append((opp, acts, self.heuristic_risk(opp, last_date, len(acts), today, win_probability)))
+        # Riskiest first; among equals, the bigger and more neglected deals first
+        ranked.sort(key=lambda r: (r[2]["risk_score"], r[0].value, r[2]["metrics"]["days_since_last_activity"]),
+                    reverse=True)
+
+        top = ranked[:max(0, top_n)] if use_ai and self.client else []
+        insights = self._top_insights(top)
+
+        results = []
+        for position, (opp, _, risk) in enumerate(ranked):
+            ai_insight = insights[position] if position < len(insights) else {}
+            ai_analyzed = bool(ai_insight) and self.client is not None
+            if not ai_analyzed:
+                metrics = risk["metrics"]
+                ai_insight = self._heuristic_insight(metrics["age_days"], metrics["days_since_last_activity"])
+            results.append({
+                **self._combine(opp, risk, ai_insight),
+                "title": opp.title,
+                "lead_id": opp.lead_id,
+                "stage": opp.stage.value,
+                "value": opp.value,
+                "probability": opp.probability,
+                "ai_analyzed": ai_analyzed,
+            })
+        return results
+
+    @staticmethod
+    def _insight_key(opp: Opportunity, activities: List[Activity], age: int, inactive_days: int) -> Tuple:
+        """Everything the insight prompt contains."""
+        return (
+            opp.opp_id, opp.title, opp.stage.value, opp.value, opp.probability, age, inactive_days,
+            tuple((a.date.date(), a.type.value, a.subject) for a in activities[-5:]),
+        )
+
+    def _top_insights(self, top: List[Tuple]) -> List[Dict[str, Any]]:
+        """AI insights for (opp, activities, risk) entries: cached ones reused, the rest fetched concurrently."""
+        now = time.time()
+        keys = [self._insight_key(opp, acts, risk["metrics"]["age_days"], risk["metrics"]["days_since_last_activity"])
+                for opp, acts, risk in top]
+        insights: List[Dict[str, Any]] = [{} for _ in top]
+        missing = []
+        with self._insight_lock:
+            for i, key in enumerate(keys):
+                entry = self._insight_cache.get(key)
+                if entry is not None and entry[0] > now:
+                    insights[i] = entry[1]
+                else:
+                    missing.append(i)
+        if not missing:
+            return insights
+
+        requests = [
+            self._insight_request(top[i][0], top[i][1], top[i][2]["metrics"]["age_days"],
+                                  top[i][2]["metrics"]["days_since_last_activity"])
+            for i in missing
+        ]
+        for i, response in zip(missing, self.client.chat_many(requests)):
+            insights[i] = self._parse_insight(response)
+
+        with self._insight_lock:
+            if len(self._insight_cache) + len(missing) > INSIGHT_CACHE_MAX_ENTRIES:
+                # Drop expired entries, then the oldest if still full
+                for k in [k for k, (exp, _) in self._insight_cache.items() if exp <= now]:
+                    del self._insight_cache[k]
+                while self._insight_cache and len(self._insight_cache) + len(missing) > INSIGHT_CACHE_MAX_ENTRIES:
+                    del self._insight_cache[next(iter(self._insight_cache))]
+            for i in missing:
+                if insights[i]:
+                    self._insight_cache[keys[i]] = (now + INSIGHT_CACHE_TTL, insights[i])
+        return insights
+
+    @staticmethod
+    def _heuristic_insight(age: int, inactive_days: int) -> Dict[str, Any]:
+        return {
+            "score_adjustment": 0,
+            "reason": f"Deal is {age} days old. Last activity was {inactive_days} days ago.",
+            "next_action": "Schedule a follow-up meeting."
         }
 
     def _get_ai_insight(self, opp: Opportunity, activities: List[Activity], age: int, inactive_days: int) -> Dict[str, Any]:
         if not self.client:
-            return {
-                "score_adjustment": 0,
-                "reason": f"Deal is {age} days old. Last activity was {inactive_days} days ago.",
-                "next_action": "Schedule a follow-up meeting."
-            }
+            return self._heuristic_insight(age, inactive_days)
+        try:
+            response = self.client.chat(**self._insight_request(opp, activities, age, inactive_days))
+        except Exception as e:
+            response = e
+        return self._parse_insight(response)
 
+    def _insight_request(self, opp: Opportunity, activities: List[Activity], age: int, inactive_days: int) -> Dict[str, Any]:
+        """Chat completion arguments for one deal's risk insight."""
         activity_summary = "\n".join([
             f"- {a.date.date()}: {a.type.value} - {a.subject}"
             for a in activities[-5:] # Last 5 activities
@@ -91,15 +246,20 @@ class DealAnalyzer:
         }}
         """
 
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": "You are a sales performance analyzer."},
+                {"role": "user", "content": prompt}
+            ],
+            "response_format": {"type": "json_object"},
+        }
+
+    @staticmethod
+    def _parse_insight(response: Any) -> Dict[str, Any]:
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a sales performance analyzer."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
-            )
+            if isinstance(response, BaseException):
+                raise response
             return json.loads(response.choices[0].message.content)
         except Exception as e:
             print(f"[Analyzer] AI error: {e}")
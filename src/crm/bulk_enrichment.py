@@ -0,0 +1,255 @@
+"""
+Bulk Enrichment - streams many leads through search, extract and write stages.
+
+Enriching one lead at a time means a Brave search, then an OpenAI call, then
+several row writes, all in sequence. For an imported list of thousands of
+leads the pipeline below overlaps those steps instead:
+
+    leads -> [search workers] -> [extract workers] -> [writer] -> sheet
+
+Each stage has its own concurrency limit (search and LLM providers have
+different rate limits) and the stages are connected by bounded queues, so a
+slow stage applies backpressure instead of buffering the whole list. The
+writer collects results and writes them back in batches, one sheet request
+per batch.
+
+Progress is reported after every batch. The pipeline is resumable: leads
+already marked `Completed` are skipped, so re-running after an interruption
+only processes what is left.
+"""
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .models import Lead
+from .enrichment import enrichment_service, EnrichmentService
+
+SEARCH_CONCURRENCY = int(os.getenv("ENRICH_SEARCH_CONCURRENCY", "4"))
+EXTRACT_CONCURRENCY = int(os.getenv("ENRICH_EXTRACT_CONCURRENCY", "4"))
+WRITE_BATCH_SIZE = int(os.getenv("ENRICH_WRITE_BATCH_SIZE", "50"))
+FLUSH_INTERVAL = 5.0  # seconds; max time a finished lead waits to be written
+QUEUE_DEPTH = 100  # items buffered between stages
+
+_DONE = object()  # end-of-stream marker
+
+
+class BulkEnrichmentPipeline:
+    """Concurrent search -> extract -> batched write pipeline for many leads."""
+
+    def __init__(
+        self,
+        crm,
+        service: EnrichmentService = enrichment_service,
+        search_concurrency: int = SEARCH_CONCURRENCY,
+        extract_concurrency: int = EXTRACT_CONCURRENCY,
+        batch_size: int = WRITE_BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.crm = crm
+        self.service = service
+        self.search_concurrency = max(1, search_concurrency)
+        self.extract_concurrency = max(1, extract_concurrency)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.on_progress = on_progress
+
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.progress: Dict[str, Any] = {}
+
+    def stop(self):
+        """Stop feeding new leads; in-flight leads are finished and written."""
+        self._stop.set()
+
+    # -------------------------------------------------------------------------
+    # Running
+    # -------------------------------------------------------------------------
+
+    def pending_leads(self, lead_ids: Optional[List[str]] = None, retry_failed: bool = True) -> Tuple[List[Lead], int]:
+        """Leads still to enrich, and how many were skipped as already done."""
+        wanted = set(lead_ids) if lead_ids else None
+        pending, skipped = [], 0
+        for lead in self.crm.get_leads():
+            if wanted is not None and lead.lead_id not in wanted:
+                continue
+            if not lead.company_name:
+                continue
+            if lead.enrichment_status == "Completed" or (lead.enrichment_status == "Failed" and not retry_failed):
+                skipped += 1
+                continue
+            pending.append(lead)
+        return pending, skipped
+
+    def run(self, lead_ids: Optional[List[str]] = None, retry_failed: bool = True) -> Dict[str, Any]:
+        """
+        Enrich all pending leads (or only `lead_ids`) and return the final progress.
+        Blocks until every started lead has been written.
+        """
+        leads, skipped = self.pending_leads(lead_ids, retry_failed)
+        started = time.time()
+        self.progress = {
+            "total": len(leads) + skipped,
+            "pending": len(leads),
+            "skipped": skipped,
+            "cache_hits": 0,
+            "searched": 0,
+            "extracted": 0,
+            "completed": 0,
+            "failed": 0,
+            "written": 0,
+            "started_at": started,
+            "elapsed": 0.0,
+            "stopped": False,
+        }
+        if not leads:
+            self._report()
+            return self.progress
+
+        print(f"[BulkEnrichment] Enriching {len(leads)} leads ({skipped} already done)")
+        # Show the whole batch as in progress up front, in one write
+        for lead in leads:
+            lead.enrichment_status = "Enriching"
+        self.crm.update_leads(leads)
+
+        search_q: queue.Queue = queue.Queue(maxsize=QUEUE_DEPTH)
+        extract_q: queue.Queue = queue.Queue(maxsize=QUEUE_DEPTH)
+        write_q: queue.Queue = queue.Queue(maxsize=QUEUE_DEPTH)
+
+        searchers = [threading.Thread(target=self._search_worker, args=(search_q, extract_q), daemon=True)
+                     for _ in range(self.search_concurrency)]
+        extractors = [threading.Thread(target=self._extract_worker, args=(extract_q, write_q), daemon=True)
+                      for _ in range(self.extract_concurrency)]
+        writer_errors: List[Exception] = []
+        writer = threading.Thread(target=self._writer, args=(write_q, writer_errors), daemon=True)
+        for thread in searchers + extractors + [writer]:
+            thread.start()
+
+        for lead in leads:
+            if self._stop.is_set():
+                break
+            search_q.put(lead)
+
+        # Drain stage by stage so every lead that entered is written
+        for _ in searchers:
+            search_q.put(_DONE)
+        for thread in searchers:
+            thread.join()
+        for _ in extractors:
+            extract_q.put(_DONE)
+        for thread in extractors:
+            thread.join()
+        write_q.put(_DONE)
+        writer.join()
+
+        self.progress["stopped"] = self._stop.is_set()
+        self._report()
+        if writer_errors:
+            raise writer_errors[0]
+        print(f"[BulkEnrichment] Done: {self.progress['completed']} completed, "
+              f"{self.progress['failed']} failed in {self.progress['elapsed']:.0f}s")
+        return self.progress
+
+    # -------------------------------------------------------------------------
+    # Stages
+    # -------------------------------------------------------------------------
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.progress[key] += n
+
+    def _search_worker(self, inbox: queue.Queue, outbox: queue.Queue):
+        while True:
+            lead = inbox.get()
+            if lead is _DONE:
+                return
+            if self._stop.is_set():
+                continue  # drop; still "Enriching" and picked up on resume
+            cached = self.service.lookup_cached(lead)
+            if cached is not None:
+                # Another lead at the same company was already enriched
+                self._count("cache_hits")
+                outbox.put((lead, None, cached, 0.0))
+                continue
+            started = time.perf_counter()
+            results = self.service.search_company(lead.company_name)
+            self._count("searched")
+            outbox.put((lead, results, None, (time.perf_counter() - started) * 1000))
+
+    def _extract_worker(self, inbox: queue.Queue, outbox: queue.Queue):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            lead, search_results, data, search_ms = item
+            if data is None:
+                started = time.perf_counter()
+                try:
+                    data = self.service.extract_details(lead.company_name, search_results)
+                except Exception as e:
+                    print(f"[BulkEnrichment] Extraction failed for {lead.lead_id}: {e}")
+                    data = {}
+                self._count("extracted")
+                if data:
+                    self.service.remember(lead, search_results, data,
+                                          search_ms + (time.perf_counter() - started) * 1000)
+            outbox.put((lead.lead_id, data))
+
+    def _writer(self, inbox: queue.Queue, errors: List[Exception]):
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        deadline = time.time() + self.flush_interval
+        while True:
+            try:
+                item = inbox.get(timeout=max(0.05, deadline - time.time()))
+            except queue.Empty:
+                item = None
+            if item is not None and item is not _DONE:
+                batch.append(item)
+            if batch and (item is _DONE or len(batch) >= self.batch_size or time.time() >= deadline):
+                try:
+                    self._flush(batch)
+                except Exception as e:
+                    print(f"[BulkEnrichment] Batch write failed: {e}")
+                    errors.append(e)
+                    self.stop()
+                batch = []
+            if item is None or not batch:
+                deadline = time.time() + self.flush_interval
+            if item is _DONE:
+                return
+
+    def _flush(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        """Apply results to the current version of each lead and write them in one request."""
+        # Re-read so edits made while the lead was in flight aren't overwritten
+        current = {lead.lead_id: lead for lead in self.crm.get_leads()}
+        updated, completed, failed = [], 0, 0
+        for lead_id, data in batch:
+            lead = current.get(lead_id)
+            if lead is None:
+                continue  # deleted meanwhile
+            if data:
+                self.service.apply_to_lead(lead, data)
+                lead.enrichment_status = "Completed"
+                completed += 1
+            else:
+                lead.enrichment_status = "Failed"
+                failed += 1
+            updated.append(lead)
+
+        written = self.crm.update_leads(updated)
+        self._count("completed", completed)
+        self._count("failed", failed)
+        self._count("written", written)
+        self._report()
+
+    def _report(self):
+        with self._lock:
+            self.progress["elapsed"] = round(time.time() - self.progress["started_at"], 1)
+            snapshot = dict(self.progress)
+        if self.on_progress is not None:
+            try:
+                self.on_progress(snapshot)
+            except Exception as e:
+                print(f"[BulkEnrichment] Progress callback failed: {e}")
@@ -1,24 +1,37 @@
 import os
 import json
+import time
 from typing import Optional, Dict, Any
-import requests
-from openai import OpenAI
+from ..services.outbound import outbound, LLMClient, BRAVE_SEARCH_URL
+from ..services.metrics import registry
 from .models import Lead, CompanySize
+from .enrichment_cache import EnrichmentCache, company_identity
 
 class EnrichmentService:
-    def __init__(self, openai_api_key: Optional[str] = None, brave_api_key: Optional[str] = None):
+    def __init__(self, openai_api_key: Optional[str] = None, brave_api_key: Optional[str] = None,
+                 cache: Optional[EnrichmentCache] = None):
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         self.brave_api_key = brave_api_key or os.getenv("BRAVE_API_KEY")
         if self.openai_api_key:
-            self.client = OpenAI(api_key=self.openai_api_key)
+            self.client = LLMClient(self.openai_api_key)
         else:
             self.client = None
+        self.cache = cache if cache is not None else EnrichmentCache()
+
+    def lookup_cached(self, lead: Lead) -> Optional[Dict[str, Any]]:
+        """Cached enrichment for the lead's company, or None."""
+        return self.cache.get(*company_identity(lead))
+
+    def remember(self, lead: Lead, search_results: Optional[str], data: Dict[str, Any], cost_ms: float):
+        """Cache a successful enrichment for every other lead at the same company."""
+        name, domain = company_identity(lead)
+        self.cache.put(name, domain, search_results, data, cost_ms)
 
     def search_company(self, company_name: str) -> str:
         if not self.brave_api_key:
             return f"No Brave API key. Searching for: {company_name}"
         
-        url = "https://api.search.brave.com/res/v1/web/search"
+        url = BRAVE_SEARCH_URL
         headers = {
             "Accept": "application/json",
             "X-Subscription-Token": self.brave_api_key
@@ -29,9 +42,7 @@ class EnrichmentService:
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-            return json.dumps(response.json())
+            return json.dumps(outbound.get_json("brave", url, headers=headers, params=params))
         except Exception as e:
             print(f"[Enrichment] Brave search error: {e}")
             return f"Search failed: {e}"
@@ -41,17 +52,36 @@ class EnrichmentService:
         Enriches lead data using search and AI.
         Returns a dictionary of updated fields.
         """
+        cached = self.lookup_cached(lead)
+        if cached is not None:
+            print(f"[Enrichment] Cache hit for: {lead.company_name}")
+            return cached
+
         if not self.client:
             print("[Enrichment] OpenAI client not initialized")
             return {}
 
         print(f"[Enrichment] Enriching lead: {lead.company_name}")
+        started = time.perf_counter()
         search_results = self.search_company(lead.company_name)
-        
+        data = self.extract_details(lead.company_name, search_results)
+        if data:
+            self.remember(lead, search_results, data, (time.perf_counter() - started) * 1000)
+        return data
+
+    def extract_details(self, company_name: str, search_results: str) -> Dict[str, Any]:
+        """
+        Extracts structured company details from search results with the LLM.
+        Returns an empty dict if the client is missing or extraction fails.
+        """
+        if not self.client:
+            print("[Enrichment] OpenAI client not initialized")
+            return {}
+
         prompt = f"""
         You are a lead enrichment assistant. Given a company name and search results, extract the following details.
         
-        Company Name: {lead.company_name}
+        Company Name: {company_name}
         Search Results: {search_results}
         
         Return ONLY a JSON object with these keys:
@@ -65,7 +95,7 @@ class EnrichmentService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = self.client.chat(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that extracts structured data from search results."},
@@ -85,4 +115,31 @@ class EnrichmentService:
             print(f"[Enrichment] AI enrichment error: {e}")
             return {}
 
+    @staticmethod
+    def apply_to_lead(lead: Lead, data: Dict[str, Any]):
+        """Fill empty lead fields from enrichment data (existing values win)."""
+        if data.get("website") and not lead.website:
+            lead.website = data["website"]
+        if data.get("linkedin_url") and not lead.linkedin_url:
+            lead.linkedin_url = data["linkedin_url"]
+        if data.get("logo_url") and not lead.logo_url:
+            lead.logo_url = data["logo_url"]
+        if data.get("industry") and not lead.industry:
+            lead.industry = data["industry"]
+        if data.get("company_size") and not lead.company_size:
+            try:
+                lead.company_size = CompanySize(data["company_size"])
+            except ValueError:
+                pass
+
 enrichment_service = EnrichmentService()
+
+
+def _cache_samples():
+    stats = enrichment_service.cache.stats()
+    return [("crm_enrichment_cache", {"stat": key}, stats[key])
+            for key in ("entries", "hits", "misses", "evictions", "latency_saved_ms")]
+
+
+registry.collector("crm_enrichment_cache", "gauge", "Enrichment cache size and lifetime hit/miss/eviction counts.",
+                   _cache_samples)
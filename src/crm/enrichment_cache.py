@@ -0,0 +1,162 @@
+"""
+Enrichment Cache - on-disk cache of enrichment results per company.
+
+Several leads often belong to the same company (multiple contacts at one
+org). Enrichment results are cached by a normalized company identity (name
+plus domain, when known) so only the first lead pays for the web search and
+the LLM call. Entries expire after a TTL and the least recently used ones are
+evicted once the cache is full.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+ENRICHMENT_CACHE_PATH = os.getenv("ENRICHMENT_CACHE_PATH", "data/enrichment_cache.sqlite3")
+ENRICHMENT_CACHE_TTL = float(os.getenv("ENRICHMENT_CACHE_TTL_DAYS", "30")) * 86400
+ENRICHMENT_CACHE_MAX_ENTRIES = int(os.getenv("ENRICHMENT_CACHE_MAX_ENTRIES", "10000"))
+
+# Legal-form suffixes that don't distinguish companies ("Acme Inc." == "ACME")
+_LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation", "co", "company",
+    "gmbh", "ag", "sa", "sas", "bv", "nv", "plc", "pty", "pvt", "srl", "oy", "ab",
+}
+# Email domains that say nothing about the contact's company
+_FREEMAIL_DOMAINS = {
+    "gmail.com", "googlemail.com", "yahoo.com", "hotmail.com", "outlook.com", "live.com",
+    "icloud.com", "me.com", "aol.com", "proton.me", "protonmail.com", "gmx.com", "mail.com",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS enrichment (
+    key TEXT PRIMARY KEY,
+    search_results TEXT,
+    data TEXT NOT NULL,
+    cost_ms REAL NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS enrichment_lru ON enrichment (accessed_at);
+"""
+
+
+def normalize_company_name(name: str) -> str:
+    """Lowercase, strip punctuation and legal suffixes: "Acme, Inc." -> "acme"."""
+    words = re.sub(r"[^\w\s]", " ", (name or "").lower()).split()
+    while len(words) > 1 and words[-1] in _LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def normalize_domain(value: Optional[str]) -> str:
+    """Bare domain from a URL or email address: "https://www.acme.com/about" -> "acme.com"."""
+    if not value:
+        return ""
+    value = value.strip().lower()
+    if "@" in value and "/" not in value:
+        domain = value.rsplit("@", 1)[1]
+        return "" if domain in _FREEMAIL_DOMAINS else domain
+    value = re.sub(r"^[a-z][a-z0-9+.-]*://", "", value)
+    domain = value.split("/", 1)[0].split(":", 1)[0]
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def company_identity(lead) -> Tuple[str, str]:
+    """(normalized name, domain) for a lead; the domain comes from its website or work email."""
+    domain = normalize_domain(lead.website) or normalize_domain(lead.contact_email)
+    return normalize_company_name(lead.company_name), domain
+
+
+class EnrichmentCache:
+    """SQLite-backed TTL + LRU cache of enrichment results with hit/latency counters."""
+
+    def __init__(self, path: str = ENRICHMENT_CACHE_PATH, ttl: float = ENRICHMENT_CACHE_TTL,
+                 max_entries: int = ENRICHMENT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.latency_saved_ms = 0.0
+
+    def _conn(self) -> sqlite3.Connection:
+        """Open the cache lazily. Call with the lock held."""
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    @staticmethod
+    def _key(name: str, domain: str) -> str:
+        return f"{name}|{domain}"
+
+    def get(self, name: str, domain: str = "") -> Optional[Dict[str, Any]]:
+        """Cached extracted fields for a company, or None on a miss."""
+        if not name:
+            return None
+        key = self._key(name, domain)
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            row = db.execute("SELECT data, cost_ms, created_at FROM enrichment WHERE key = ?", (key,)).fetchone()
+            if row is None or row["created_at"] + self.ttl <= now:
+                if row is not None:
+                    db.execute("DELETE FROM enrichment WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            db.execute("UPDATE enrichment SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            self.latency_saved_ms += row["cost_ms"]
+        return json.loads(row["data"])
+
+    def put(self, name: str, domain: str, search_results: Optional[str], data: Dict[str, Any], cost_ms: float):
+        """Store a result along with what it cost to produce (for the latency-saved counter)."""
+        if not name or not data:
+            return
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO enrichment (key, search_results, data, cost_ms, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (self._key(name, domain), search_results, json.dumps(data), cost_ms, now, now),
+            )
+            size = db.execute("SELECT COUNT(*) FROM enrichment").fetchone()[0]
+            if size > self.max_entries:
+                excess = size - self.max_entries
+                db.execute(
+                    "DELETE FROM enrichment WHERE key IN"
+                    " (SELECT key FROM enrichment ORDER BY accessed_at LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+
+    def clear(self):
+        with self._lock:
+            self._conn().execute("DELETE FROM enrichment")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn().execute("SELECT COUNT(*) FROM enrichment").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_days": self.ttl / 86400,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "latency_saved_ms": round(self.latency_saved_ms, 1),
+            }
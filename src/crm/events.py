@@ -0,0 +1,223 @@
+"""
+Change Events - fan-out of entity-level CRM changes to live subscribers.
+
+CRMManager publishes an event for every write it performs and for every row it
+sees change between two fetches of a worksheet (edits made directly in the
+spreadsheet). Events are grouped into channels, one per spreadsheet, so all
+sessions looking at the same spreadsheet share one stream.
+
+Each event is encoded once, as a Server-Sent Events frame, and kept in a
+bounded per-channel buffer. Subscribers read from that buffer at their own
+cursor, which is what makes `Last-Event-ID` resumption work.
+
+A channel without subscribers drops its poll callback (and with it the last
+subscriber's session) right away, and the channel itself once nothing was
+published to it for `CHANNEL_IDLE_SECONDS`. Event ids carry a per-channel
+epoch, so a client resuming into a recreated channel is told to resync.
+"""
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from itertools import islice
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .serialization import dumps
+
+BUFFER_SIZE = 1000
+HEARTBEAT_SECONDS = 15.0
+# Channels with no subscribers and no events for this long are dropped
+CHANNEL_IDLE_SECONDS = float(os.getenv("EVENTS_CHANNEL_IDLE_SECONDS", "600"))
+
+
+class _Channel:
+    """Event buffer and subscriber registry for one spreadsheet."""
+
+    def __init__(self, buffer_size: int):
+        # Event ids are only meaningful within one channel's lifetime
+        self.epoch = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.last_active = time.monotonic()
+        self.frames: Deque[Tuple[int, bytes]] = deque(maxlen=buffer_size)
+        self.waiters: Dict[asyncio.AbstractEventLoop, Set[asyncio.Event]] = {}
+        self.subscribers = 0
+        self.poll: Optional[Callable[[], None]] = None
+        self.watcher: Optional[asyncio.Task] = None
+
+    def since(self, cursor: int) -> Optional[List[bytes]]:
+        """Frames after `cursor`, or None if the cursor fell out of the buffer. Call under the hub lock."""
+        if not self.frames or cursor >= self.seq:
+            return []
+        first_id = self.frames[0][0]
+        if cursor < first_id - 1:
+            return None
+        start = cursor - first_id + 1
+        return [frame for _, frame in islice(self.frames, start, None)]
+
+
+class ChangeHub:
+    """Thread-safe publish/subscribe hub for CRM change events."""
+
+    def __init__(self, buffer_size: int = BUFFER_SIZE, idle_seconds: float = CHANNEL_IDLE_SECONDS):
+        self.buffer_size = buffer_size
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._channels: Dict[str, _Channel] = {}
+        self._last_sweep = time.monotonic()
+
+    def _channel(self, key: str) -> _Channel:
+        """The spreadsheet's channel, created if needed. Call under the hub lock."""
+        self._sweep()
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _Channel(self.buffer_size)
+        return channel
+
+    def _sweep(self) -> None:
+        """Drop idle channels without subscribers. Call under the hub lock."""
+        now = time.monotonic()
+        if now - self._last_sweep < min(self.idle_seconds, 60.0):
+            return
+        self._last_sweep = now
+        for key, channel in list(self._channels.items()):
+            if channel.subscribers == 0 and now - channel.last_active >= self.idle_seconds:
+                del self._channels[key]
+
+    @staticmethod
+    def _event_id(channel: _Channel, seq: int) -> str:
+        return f"{channel.epoch}-{seq}"
+
+    @staticmethod
+    def _parse_event_id(channel: _Channel, event_id: Optional[str]) -> Optional[int]:
+        """Sequence number from a Last-Event-ID, or None if it is from another process or channel."""
+        if not event_id:
+            return None
+        epoch, _, seq = event_id.strip().rpartition("-")
+        if epoch != channel.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def publish(self, key: str, event: Dict[str, Any]) -> None:
+        """
+        Publish an event to every subscriber of a spreadsheet.
+        Safe to call from worker threads; the frame is encoded exactly once.
+        """
+        with self._lock:
+            channel = self._channel(key)
+            channel.seq += 1
+            channel.last_active = time.monotonic()
+            event_id = self._event_id(channel, channel.seq)
+            payload = {**event, "event_id": event_id, "ts": datetime.now().isoformat()}
+            frame = b"id: " + event_id.encode() + b"\nevent: change\ndata: " + dumps(payload) + b"\n\n"
+            channel.frames.append((channel.seq, frame))
+            waiters = [(loop, list(events)) for loop, events in channel.waiters.items()]
+
+        # One cross-thread hop per event loop, not per subscriber
+        for loop, events in waiters:
+            loop.call_soon_threadsafe(_wake_all, events)
+
+    def subscriber_count(self, key: str) -> int:
+        with self._lock:
+            channel = self._channels.get(key)
+            return channel.subscribers if channel is not None else 0
+
+    async def subscribe(
+        self,
+        key: str,
+        last_event_id: Optional[str] = None,
+        poll: Optional[Callable[[], None]] = None,
+        poll_interval: float = 30.0,
+        heartbeat: float = HEARTBEAT_SECONDS,
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield SSE frames for a spreadsheet until the consumer stops iterating.
+
+        `poll` is called periodically (in a worker thread) while the channel has
+        subscribers so that edits made directly in the sheet are detected even
+        when nobody is hitting the read endpoints.
+        """
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+
+        with self._lock:
+            channel = self._channel(key)
+            channel.waiters.setdefault(loop, set()).add(wake)
+            channel.subscribers += 1
+            cursor = self._parse_event_id(channel, last_event_id)
+            if cursor is None:
+                # New subscriber (or unknown id): start from the live edge
+                resync = last_event_id is not None
+                cursor = channel.seq
+            else:
+                resync = False
+            if poll is not None:
+                channel.poll = poll
+            if channel.watcher is None or channel.watcher.done():
+                channel.watcher = loop.create_task(self._watch(channel, poll_interval))
+
+        try:
+            yield b"retry: 3000\n\n"
+            if resync:
+                yield _resync_frame()
+
+            while True:
+                wake.clear()
+                with self._lock:
+                    frames = channel.since(cursor)
+                    live_edge = channel.seq
+                if frames is None:
+                    # Client fell too far behind; it must refetch everything
+                    yield _resync_frame()
+                    cursor = live_edge
+                    continue
+                if frames:
+                    cursor += len(frames)
+                    for frame in frames:
+                        yield frame
+                    continue
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": heartbeat\n\n"
+        finally:
+            with self._lock:
+                loop_waiters = channel.waiters.get(loop)
+                if loop_waiters is not None:
+                    loop_waiters.discard(wake)
+                    if not loop_waiters:
+                        del channel.waiters[loop]
+                channel.subscribers -= 1
+                if channel.subscribers == 0:
+                    # Don't keep the last subscriber's session (and its credentials) alive
+                    channel.poll = None
+                    channel.last_active = time.monotonic()
+                    if channel.watcher is not None:
+                        channel.watcher.cancel()
+                        channel.watcher = None
+
+    async def _watch(self, channel: _Channel, interval: float) -> None:
+        """Periodically poll the spreadsheet for external edits while subscribed."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            if channel.poll is None:
+                continue
+            try:
+                await loop.run_in_executor(None, channel.poll)
+            except Exception as e:
+                print(f"[ChangeHub] External change poll failed: {e}")
+
+
+def _wake_all(events: List[asyncio.Event]) -> None:
+    for event in events:
+        event.set()
+
+
+def _resync_frame() -> bytes:
+    return b"event: resync\ndata: {}\n\n"
+
+
+change_hub = ChangeHub()
@@ -1,20 +1,33 @@
 """
 CRM Manager - Business logic layer for CRM operations.
 """
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+import hashlib
+import itertools
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Deque, Tuple
 from rich.console import Console
 from rich.table import Table
 
 from ..sheets import SheetManager
 from .models import (
     Lead, Opportunity, Activity,
-    LeadStatus, PipelineStage, ActivityType, LeadSource, CompanySize
+    LeadStatus, PipelineStage, ActivityType, LeadSource, CompanySize,
+    CLOSED_STAGES,
 )
-from .templates import CRMTemplates
-from .enrichment import enrichment_service
-from .analyzer import deal_analyzer
-from .scoring import scoring_service
+from .templates import CRMTemplates, WORKSHEET_SPECS, summary_spec, spec_grid
+# enrichment, analyzer, scoring and win_model (numpy, LLM clients) are imported
+# where they are used, so importing the manager stays cheap on cold start
+from .serialization import entity_dict
+from .events import change_hub
+from .snapshots import SnapshotStore, SnapshotMissing
+from ..services.metrics import CACHE_LOOKUPS, CACHE_AGE
+from ..services.timing import span
 import gspread
 
 console = Console()
@@ -26,24 +39,120 @@ OPPS_WS = "Opportunities"
 ACTIVITIES_WS = "Activities"
 SUMMARY_WS = "Summary"
 
+# Snapshot versions come from one process-wide counter so that two managers
+# (e.g. two sessions, or a session re-created after eviction) can never hand
+# out the same version for different data. The epoch distinguishes processes.
+_version_counter = itertools.count(1)
+SNAPSHOT_EPOCH = uuid.uuid4().hex[:8]
+
+# Entity name used in change events, per worksheet
+ENTITY_NAMES = {LEADS_WS: "lead", OPPS_WS: "opportunity", ACTIVITIES_WS: "activity"}
+
+# A refetch that changes more rows than this publishes one "resync" event
+# instead of an event per row (e.g. after a bulk paste into the sheet).
+MAX_EVENTS_PER_REFRESH = 200
+
+# Number of changes kept for delta sync (`changes_since`)
+CHANGE_LOG_SIZE = 5000
+
+# Summary worksheet: "formula" keeps the whole-column formulas from the
+# template; "materialized" has the server write precomputed values instead,
+# refreshed at most once per debounce window after writes.
+SUMMARY_MODES = ("formula", "materialized")
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "formula")
+SUMMARY_REFRESH_DEBOUNCE = float(os.getenv("SUMMARY_REFRESH_DEBOUNCE", "10"))  # seconds
+
+# Summary mode chosen per spreadsheet at runtime; outlives the manager so a
+# re-created session keeps it
+_summary_modes: Dict[str, str] = {}
+
+# Hot/cold tiering: deals closed and activities logged longer ago than these
+# are moved by `archive` into yearly archive worksheets, which reads skip
+# unless asked for `include_archived`.
+ARCHIVE_CLOSED_AFTER_DAYS = int(os.getenv("ARCHIVE_CLOSED_AFTER_DAYS", "180"))
+ARCHIVE_ACTIVITIES_AFTER_DAYS = int(os.getenv("ARCHIVE_ACTIVITIES_AFTER_DAYS", "365"))
+ARCHIVE_WORKSHEETS = {OPPS_WS: "Opportunities_Archive_{year}", ACTIVITIES_WS: "Activities_{year}"}
+_ARCHIVE_PATTERNS = {ws: re.compile("^" + name.replace("{year}", r"\d{4}") + "$")
+                     for ws, name in ARCHIVE_WORKSHEETS.items()}
+# Archive worksheets only gain rows that leave a hot worksheet, so they are
+# cached longer and expired early when a hot refetch shows rows removed (an
+# archive run from any process, or a delete)
+ARCHIVE_CACHE_TTL = int(os.getenv("ARCHIVE_CACHE_TTL", "3600"))
+# Closed deals with no delivery or invoicing work left
+ARCHIVABLE_STAGES = (PipelineStage.CLOSED_WON, PipelineStage.CLOSED_LOST, PipelineStage.CASH_IN_BANK)
+
+# Leads columns written by the bulk rescore (adjacent: score, heat_level)
+LEAD_SCORE_COL = Lead.headers().index("score")
+LEAD_SCORE_RANGE = ("O", "P")
+
+
+def _row_hash(row: list) -> bytes:
+    """Compact fingerprint of a worksheet row, used to spot edits made in the sheet."""
+    return hashlib.blake2b("\x1f".join(str(c) for c in row).encode("utf-8"), digest_size=8).digest()
+
 
 class CRMManager:
     """Manages CRM operations against Google Sheets."""
 
-    def __init__(self, sheet_manager: SheetManager, sheet_name: str = SHEET_NAME):
+    def __init__(self, sheet_manager: Optional[SheetManager], sheet_name: str = SHEET_NAME,
+                 snapshots: Optional[SnapshotStore] = None, warm_start: bool = True, offline: bool = False):
+        """
+        With a snapshot store, fetched worksheets are saved to disk. On first
+        access a worksheet is served from its snapshot if `warm_start` (and
+        revalidated against the sheet in the background), or only ever from
+        snapshots if `offline`, in which case no sheet manager is needed.
+        """
         self.sm = sheet_manager
         self.sheet_name = sheet_name
-        
-        # Caching
-        self._cache: Dict[str, List[Any]] = {}
-        self._last_fetch: Dict[str, datetime] = {}
-        self.templates = CRMTemplates(self.sm.gc)
-        
+        self.snapshots = snapshots
+        self.warm_start = warm_start
+        self.offline = offline
+        if offline and snapshots is None:
+            raise ValueError("Offline mode needs a snapshot store")
+
+        self.templates = CRMTemplates(self.sm.gc) if self.sm is not None else None
+
         # Caching
         self._cache: Dict[str, List[Any]] = {}
         self._last_fetch: Dict[str, datetime] = {}
         self.CACHE_TTL = 30  # seconds
 
+        # Snapshot versions per worksheet, bumped whenever the cached rows change
+        self._versions: Dict[str, int] = {}
+
+        # IDs written by this manager since the last fetch of each worksheet.
+        # Their rows come back reformatted by Sheets, which must not be
+        # mistaken for external edits.
+        self._pending_echoes: Dict[str, set] = {}
+        self._spreadsheet_key: Optional[str] = None
+        if offline:
+            self._spreadsheet_key = snapshots.resolve(sheet_name) or sheet_name
+
+        # Snapshot version last saved to disk, worksheets being revalidated,
+        # and worksheets whose cached rows came from a snapshot (read-only:
+        # writes fetch fresh rows before using row positions)
+        self._saved_versions: Dict[str, int] = {}
+        self._revalidating: set = set()
+        self._from_snapshot: set = set()
+
+        # (fetched at, titles) of the spreadsheet's worksheets, for finding archives
+        self._worksheet_titles: Optional[Tuple[float, List[str]]] = None
+
+        # Row hashes per worksheet from the last fetch, keyed by entity ID
+        self._row_hashes: Dict[str, Dict[str, bytes]] = {}
+
+        # Bounded change log for delta sync: (version, worksheet, action, id, payload).
+        # The payload is an entity dict for our own writes, or the raw row for
+        # edits detected in the sheet (parsed lazily when a client syncs).
+        self._change_log: Deque[Tuple[int, str, str, str, Any]] = deque(maxlen=CHANGE_LOG_SIZE)
+        self._log_lock = threading.Lock()
+        # Clients at or above this version can be served from the log
+        self._log_floor = next(_version_counter)
+
+        # Pending debounced refresh of a materialized Summary sheet
+        self._summary_timer: Optional[threading.Timer] = None
+        self._summary_lock = threading.Lock()
+
     def _ensure_worksheet_exists(self, worksheet_name: str):
         """Ensure worksheet exists using templates."""
         sh = self.sm.get_sheet(self.sheet_name)
@@ -55,12 +164,28 @@ class CRMManager:
         now = datetime.now()
         if worksheet in self._last_fetch:
             age = (now - self._last_fetch[worksheet]).total_seconds()
-            if age < self.CACHE_TTL:
+            archived = any(pattern.match(worksheet) for pattern in _ARCHIVE_PATTERNS.values())
+            if age < (ARCHIVE_CACHE_TTL if archived else self.CACHE_TTL):
+                CACHE_LOOKUPS.inc(worksheet, "hit")
+                CACHE_AGE.observe(age, worksheet)
                 return self._cache.get(worksheet)
+            CACHE_LOOKUPS.inc(worksheet, "expired")
+        else:
+            CACHE_LOOKUPS.inc(worksheet, "miss")
         return None
 
     def _set_cached_data(self, worksheet: str, data: List[List[str]]):
-        """Update cache."""
+        """Update cache, bumping the snapshot version if the rows changed."""
+        previous = self._cache.get(worksheet)
+        changed = previous is not data and previous != data
+        if worksheet not in self._versions or changed:
+            self._bump_version(worksheet)
+        if previous is not data:
+            # A fresh fetch: anything we wrote before it is now reflected in `data`
+            self._from_snapshot.discard(worksheet)
+            echoes = self._pending_echoes.pop(worksheet, set())
+            if previous is None or changed:
+                self._detect_external_changes(worksheet, data, echoes)
         self._cache[worksheet] = data
         self._last_fetch[worksheet] = datetime.now()
 
@@ -68,6 +193,276 @@ class CRMManager:
         """Invalidate cache for a worksheet."""
         if worksheet in self._last_fetch:
             del self._last_fetch[worksheet]
+        self._bump_version(worksheet)
+
+    def _bump_version(self, worksheet: str):
+        """Assign a fresh snapshot version to a worksheet."""
+        self._versions[worksheet] = next(_version_counter)
+
+    def _get_data(self, worksheet: str) -> Optional[List[List[str]]]:
+        """Get raw worksheet rows, from cache, a snapshot or the sheet."""
+        data = self._get_cached_data(worksheet)
+        if data is None and self.snapshots is not None and worksheet not in self._cache:
+            data = self._load_snapshot(worksheet)
+        if data is None:
+            if self.offline:
+                return self._cache.get(worksheet)
+            data = self.sm.read_data(self.sheet_name, worksheet)
+            if data:
+                self._set_cached_data(worksheet, data)
+                self._save_snapshot(worksheet)
+        return data
+
+    def _get_data_for_write(self, worksheet: str) -> Optional[List[List[str]]]:
+        """Rows to locate a write by: never a snapshot, whose row positions may be stale."""
+        data = self._get_data(worksheet)
+        if worksheet in self._from_snapshot and not self.offline:
+            fresh = self.sm.read_data(self.sheet_name, worksheet)
+            if fresh:
+                self._set_cached_data(worksheet, fresh)
+                self._save_snapshot(worksheet)
+            else:
+                self._invalidate_cache(worksheet)
+            data = fresh
+        return data
+
+    # -------------------------------------------------------------------------
+    # Snapshots
+    # -------------------------------------------------------------------------
+
+    def _load_snapshot(self, worksheet: str) -> Optional[List[List[str]]]:
+        """First access in this process: serve the on-disk snapshot, if allowed and present."""
+        if self.offline:
+            # Stale data beats none offline, whatever its age
+            data = self.snapshots.load(self.spreadsheet_key, worksheet, max_age=0)
+            if data is None:
+                raise SnapshotMissing(f"No snapshot of '{worksheet}' for '{self.sheet_name}'; "
+                                      f"run the command once online first")
+        elif self.warm_start:
+            # spreadsheet_key opens the sheet with this session's credentials,
+            # so a snapshot is only served to someone who can read the sheet
+            data = self.snapshots.load(self.spreadsheet_key, worksheet)
+        else:
+            return None
+        if data is None:
+            return None
+        self._set_cached_data(worksheet, data)
+        self._from_snapshot.add(worksheet)
+        self._saved_versions[worksheet] = self._versions[worksheet]
+        if not self.offline:
+            self._revalidate(worksheet, data)
+        return data
+
+    def _save_snapshot(self, worksheet: str):
+        """Persist a freshly fetched worksheet if it changed since the last save."""
+        version = self._versions.get(worksheet)
+        if self.snapshots is None or self._saved_versions.get(worksheet) == version:
+            return
+        try:
+            with span("snapshot"):
+                self.snapshots.save(self.spreadsheet_key, worksheet, self._cache[worksheet], self.sheet_name)
+            self._saved_versions[worksheet] = version
+        except OSError as e:
+            print(f"[CRMManager] Could not save snapshot of {worksheet}: {e}")
+
+    def _revalidate(self, worksheet: str, snapshot: List[List[str]]):
+        """Fetch a worksheet served from a snapshot in the background and swap in the fresh rows."""
+        if worksheet in self._revalidating:
+            return
+        self._revalidating.add(worksheet)
+        version = self._versions[worksheet]
+
+        def run():
+            try:
+                data = self.sm.read_data(self.sheet_name, worksheet)
+                if not data or worksheet not in self._from_snapshot:
+                    # Nothing fetched, or a write already swapped in fresh rows
+                    return
+                if self._cache.get(worksheet) is snapshot and self._versions.get(worksheet) == version:
+                    # Edits made in the sheet since the snapshot become change events here
+                    self._set_cached_data(worksheet, data)
+                    self._save_snapshot(worksheet)
+                else:
+                    # We wrote on top of the snapshot meanwhile; refetch on next read
+                    self._invalidate_cache(worksheet)
+            except Exception as e:
+                print(f"[CRMManager] Revalidating {worksheet} failed: {e}")
+                self._invalidate_cache(worksheet)
+            finally:
+                self._revalidating.discard(worksheet)
+
+        threading.Thread(target=run, name=f"revalidate-{worksheet}", daemon=True).start()
+
+    def poll_external_changes(self):
+        """Refresh stale worksheets so edits made directly in the sheet are published."""
+        for worksheet in ENTITY_NAMES:
+            try:
+                self._get_data(worksheet)
+            except gspread.exceptions.WorksheetNotFound:
+                pass
+
+    def snapshot_versions(self, *worksheets: str) -> Dict[str, int]:
+        """
+        Return the current snapshot version of each worksheet.
+        Refreshes stale worksheets first but never parses rows into models.
+        """
+        versions = {}
+        for worksheet in worksheets:
+            try:
+                self._get_data(worksheet)
+            except gspread.exceptions.WorksheetNotFound:
+                pass
+            if worksheet not in self._versions:
+                self._bump_version(worksheet)
+            versions[worksheet] = self._versions[worksheet]
+        return versions
+
+    def snapshot_etag(self, *worksheets: str) -> str:
+        """Strong ETag derived from the snapshot versions of the given worksheets."""
+        versions = self.snapshot_versions(*worksheets)
+        tag = "-".join(str(versions[ws]) for ws in worksheets)
+        return f'"{SNAPSHOT_EPOCH}-{tag}"'
+
+    # -------------------------------------------------------------------------
+    # Change Events
+    # -------------------------------------------------------------------------
+
+    @property
+    def spreadsheet_key(self) -> str:
+        """Stable identifier of the underlying spreadsheet, used as the event channel."""
+        if self._spreadsheet_key is None:
+            sh = self.sm.get_sheet(self.sheet_name)
+            self._spreadsheet_key = getattr(sh, "id", None) or self.sheet_name
+        return self._spreadsheet_key
+
+    def _row_to_dict(self, worksheet: str, row: list) -> Optional[Dict[str, Any]]:
+        """Parse a raw worksheet row into an entity dict for an event payload."""
+        try:
+            if worksheet == LEADS_WS:
+                return entity_dict(self._lead_from_row(row))
+            if worksheet == OPPS_WS:
+                return entity_dict(Opportunity.from_row(row))
+            if worksheet == ACTIVITIES_WS:
+                return entity_dict(Activity.from_row(row))
+        except Exception as e:
+            print(f"[CRMManager] Could not parse {worksheet} row for change event: {e}")
+        return None
+
+    def _log_change(self, worksheet: str, action: str, entity_id: str, payload: Any = None) -> int:
+        """Append a change to the delta-sync log and return its version."""
+        with self._log_lock:
+            # The version is assigned under the lock so a concurrent sync can
+            # never see a version without its log entry.
+            self._bump_version(worksheet)
+            version = self._versions[worksheet]
+            if len(self._change_log) == self._change_log.maxlen:
+                self._log_floor = self._change_log[0][0]
+            self._change_log.append((version, worksheet, action, entity_id, payload))
+        if worksheet in (LEADS_WS, OPPS_WS) and self.summary_mode == "materialized":
+            self._schedule_summary_refresh()
+        return version
+
+    def _publish_change(self, worksheet: str, action: str, entity_id: str,
+                        data: Optional[Dict[str, Any]], source: str, version: Optional[int]):
+        """Publish an entity-level change event to live subscribers."""
+        event = {
+            "entity": ENTITY_NAMES[worksheet],
+            "action": action,
+            "id": entity_id,
+            "data": data,
+            "source": source,
+            "version": version,
+        }
+        try:
+            change_hub.publish(self.spreadsheet_key, event)
+        except Exception as e:
+            print(f"[CRMManager] Failed to publish change event: {e}")
+
+    def _record_change(self, worksheet: str, action: str, entity_id: str,
+                       data: Optional[Dict[str, Any]] = None):
+        """Log and publish a change made through this manager."""
+        if action == "deleted":
+            # Already gone from our view; the next fetch must not report it again
+            self._row_hashes.get(worksheet, {}).pop(entity_id, None)
+        else:
+            self._pending_echoes.setdefault(worksheet, set()).add(entity_id)
+        version = self._log_change(worksheet, action, entity_id, data)
+        self._publish_change(worksheet, action, entity_id, data, "api", version)
+
+    def _detect_external_changes(self, worksheet: str, data: List[List[str]], echoes: set):
+        """Diff a fresh fetch against the previous row hashes and record what changed."""
+        if worksheet not in ENTITY_NAMES:
+            return
+
+        new_hashes = {row[0]: _row_hash(row) for row in data[1:] if row and row[0]}
+        old_hashes = self._row_hashes.get(worksheet)
+        self._row_hashes[worksheet] = new_hashes
+        if old_hashes is None:
+            # First fetch: nothing to compare against yet
+            return
+
+        changed_ids = [
+            entity_id for entity_id, digest in new_hashes.items()
+            if old_hashes.get(entity_id) != digest and entity_id not in echoes
+        ]
+        deleted_ids = old_hashes.keys() - new_hashes.keys()
+        if deleted_ids and worksheet in ARCHIVE_WORKSHEETS:
+            # The rows may have moved to an archive tier
+            self._expire_archives(worksheet)
+        if not changed_ids and not deleted_ids:
+            return
+
+        rows_by_id = {row[0]: row for row in data[1:] if row and row[0]} if changed_ids else {}
+        changes = [
+            ("created" if entity_id not in old_hashes else "updated", entity_id, rows_by_id[entity_id])
+            for entity_id in changed_ids
+        ] + [("deleted", entity_id, None) for entity_id in deleted_ids]
+
+        versions = [self._log_change(worksheet, action, entity_id, row) for action, entity_id, row in changes]
+
+        if len(changes) > MAX_EVENTS_PER_REFRESH:
+            self._publish_change(worksheet, "resync", "", None, "sheet", versions[-1])
+            return
+        for (action, entity_id, row), version in zip(changes, versions):
+            data_dict = self._row_to_dict(worksheet, row) if row else None
+            self._publish_change(worksheet, action, entity_id, data_dict, "sheet", version)
+
+    def changes_since(self, since: int) -> Dict[str, Any]:
+        """
+        Leads, opportunities and activities created, updated or deleted after
+        snapshot version `since`. Sets `full_resync` when the log no longer
+        covers that version and the client must refetch everything.
+        """
+        # Refresh stale worksheets first so edits made in the sheet are logged
+        self.snapshot_versions(*ENTITY_NAMES)
+
+        with self._log_lock:
+            version = max(self._versions.get(ws, 0) for ws in ENTITY_NAMES)
+            full_resync = since < self._log_floor or since > version
+            entries = [] if full_resync else [e for e in self._change_log if e[0] > since]
+
+        result: Dict[str, Any] = {"version": version, "epoch": SNAPSHOT_EPOCH, "full_resync": full_resync}
+        if full_resync:
+            return result
+
+        # Keep only the latest change per entity
+        latest: Dict[Tuple[str, str], Tuple[str, Any]] = {}
+        for _, worksheet, action, entity_id, payload in entries:
+            latest[(worksheet, entity_id)] = (action, payload)
+
+        groups = {ws: {"upserted": [], "deleted": []} for ws in ENTITY_NAMES}
+        for (worksheet, entity_id), (action, payload) in latest.items():
+            if action == "deleted":
+                groups[worksheet]["deleted"].append(entity_id)
+                continue
+            data = self._row_to_dict(worksheet, payload) if isinstance(payload, list) else payload
+            if data is not None:
+                groups[worksheet]["upserted"].append(data)
+
+        result["leads"] = groups[LEADS_WS]
+        result["opportunities"] = groups[OPPS_WS]
+        result["activities"] = groups[ACTIVITIES_WS]
+        return result
 
     # -------------------------------------------------------------------------
     # Lead Operations
@@ -84,56 +479,52 @@ class CRMManager:
             self.sm.append_row(self.sheet_name, lead.to_row(), LEADS_WS)
             
         self._invalidate_cache(LEADS_WS)
+        self._record_change(LEADS_WS, "created", lead.lead_id, entity_dict(lead))
         return lead
 
     def get_leads(self) -> List[Lead]:
         """Retrieve all leads."""
-        data = self._get_cached_data(LEADS_WS)
-        if data is None:
-            try:
-                data = self.sm.read_data(self.sheet_name, LEADS_WS)
-                
-                # Migrate schema if needed
-                if data and len(data) > 0:
-                    headers = data[0]
-                    expected_headers = Lead.headers()
-                    if len(headers) < len(expected_headers):
-                        print(f"[CRMManager] Migrating Leads sheet schema for {self.sheet_name}")
-                        # Update headers
-                        self.sm.update_row(self.sheet_name, 1, expected_headers, LEADS_WS)
-                        # Re-read data after update (optional, but safer)
-                        data[0] = expected_headers
-                        self._set_cached_data(LEADS_WS, data)
-
-            except gspread.exceptions.WorksheetNotFound:
-                return []
-                
-            if data:
-                self._set_cached_data(LEADS_WS, data)
-        
+        data = self._get_lead_rows()
         if not data or len(data) < 2:
             return []
-        
-        # Check if we need to adjust row length for migration
-        processed_leads = []
-        headers = data[0]
-        for row in data[1:]:
-            if not row or not row[0]: continue
-            
-            # If row is shorter than expected, it's likely an old format
-            # Old format had created_at at index 10.
-            # New format has website at index 10.
-            if len(row) < 17 and len(row) >= 11:
-                # Basic migration: shift columns from index 10 onwards
-                # created_at (10) -> 14
-                # updated_at (11) -> 15
-                # owner (12) -> 16
-                new_row = row[:10] + ["", "", "", ""] + row[10:]
-                processed_leads.append(Lead.from_row(new_row))
-            else:
-                processed_leads.append(Lead.from_row(row))
-                
-        return processed_leads
+
+        with span("decode"):
+            return [self._lead_from_row(row) for row in data[1:] if row and row[0]]
+
+    def _get_lead_rows(self, for_write: bool = False) -> Optional[List[List[str]]]:
+        """Raw Leads rows (header first), migrating the header to the current schema."""
+        try:
+            data = self._get_data_for_write(LEADS_WS) if for_write else self._get_data(LEADS_WS)
+        except gspread.exceptions.WorksheetNotFound:
+            return None
+
+        # Migrate schema if needed (offline, rows are decoded as they are)
+        if data and len(data[0]) < len(Lead.headers()) and not self.offline:
+            print(f"[CRMManager] Migrating Leads sheet schema for {self.sheet_name}")
+            expected_headers = Lead.headers()
+            self.sm.update_row(self.sheet_name, 1, expected_headers, LEADS_WS)
+            data[0] = expected_headers
+            self._set_cached_data(LEADS_WS, data)
+            self._bump_version(LEADS_WS)
+        return data
+
+    @staticmethod
+    def _is_legacy_lead_row(row: list) -> bool:
+        # If row is shorter than expected, it's likely an old format
+        # Old format had created_at at index 10.
+        # New format has website at index 10.
+        return 11 <= len(row) < 17
+
+    @classmethod
+    def _lead_from_row(cls, row: list) -> Lead:
+        """Parse a Leads row, migrating the old column layout if needed."""
+        if cls._is_legacy_lead_row(row):
+            # Basic migration: shift columns from index 10 onwards
+            # created_at (10) -> 14
+            # updated_at (11) -> 15
+            # owner (12) -> 16
+            return Lead.from_row(row[:10] + ["", "", "", ""] + row[10:])
+        return Lead.from_row(row)
 
     def get_lead(self, lead_id: str) -> Optional[Lead]:
         """Get a specific lead by ID."""
@@ -142,11 +533,7 @@ class CRMManager:
 
     def update_lead(self, lead: Lead) -> bool:
         """Update an existing lead."""
-        data = self._get_cached_data(LEADS_WS)
-        if not data:
-            data = self.sm.read_data(self.sheet_name, LEADS_WS)
-            if data: self._set_cached_data(LEADS_WS, data)
-            
+        data = self._get_data_for_write(LEADS_WS)
         if not data: return False
 
         # Iterate raw data to find ID (col 0)
@@ -161,14 +548,43 @@ class CRMManager:
                 # Optimistic cache update
                 data[i] = new_row
                 self._set_cached_data(LEADS_WS, data)
+                self._bump_version(LEADS_WS)
+                self._record_change(LEADS_WS, "updated", lead.lead_id, entity_dict(lead))
                 return True
         return False
 
+    def update_leads(self, leads: List[Lead]) -> int:
+        """Update many leads with one batched sheet write. Returns how many were found."""
+        data = self._get_data_for_write(LEADS_WS)
+        if not data: return 0
+
+        row_of = {row[0]: i for i, row in enumerate(data) if i > 0 and row}
+        now = datetime.now()
+        updates: Dict[int, list] = {}
+        written: List[Lead] = []
+        for lead in leads:
+            i = row_of.get(lead.lead_id)
+            if i is None:
+                continue
+            lead.updated_at = now
+            updates[i + 1] = lead.to_row()  # 1-indexed sheet
+            written.append(lead)
+        if not updates:
+            return 0
+
+        self.sm.update_rows(self.sheet_name, updates, LEADS_WS)
+        # Optimistic cache update
+        for row_index, new_row in updates.items():
+            data[row_index - 1] = new_row
+        self._set_cached_data(LEADS_WS, data)
+        self._bump_version(LEADS_WS)
+        for lead in written:
+            self._record_change(LEADS_WS, "updated", lead.lead_id, entity_dict(lead))
+        return len(written)
+
     def delete_lead(self, lead_id: str) -> bool:
         """Delete a lead by ID."""
-        data = self._get_cached_data(LEADS_WS)
-        if not data:
-            data = self.sm.read_data(self.sheet_name, LEADS_WS)
+        data = self._get_data_for_write(LEADS_WS)
         
         if not data: return False
 
@@ -180,11 +596,15 @@ class CRMManager:
                 # Optimistic cache update
                 data.pop(i)
                 self._set_cached_data(LEADS_WS, data)
+                self._bump_version(LEADS_WS)
+                self._record_change(LEADS_WS, "deleted", lead_id)
                 return True
         return False
 
     def enrich_lead(self, lead_id: str):
         """Perform AI enrichment for a lead."""
+        from .enrichment import enrichment_service
+
         lead = self.get_lead(lead_id)
         if not lead:
             return
@@ -199,63 +619,215 @@ class CRMManager:
             
             if enriched_data:
                 # 3. Update lead with new data
-                if enriched_data.get("website") and not lead.website:
-                    lead.website = enriched_data["website"]
-                if enriched_data.get("linkedin_url") and not lead.linkedin_url:
-                    lead.linkedin_url = enriched_data["linkedin_url"]
-                if enriched_data.get("logo_url") and not lead.logo_url:
-                    lead.logo_url = enriched_data["logo_url"]
-                if enriched_data.get("industry") and not lead.industry:
-                    lead.industry = enriched_data["industry"]
-                if enriched_data.get("company_size") and not lead.company_size:
-                    try:
-                        lead.company_size = CompanySize(enriched_data["company_size"])
-                    except ValueError:
-                        pass
-                
+                enrichment_service.apply_to_lead(lead, enriched_data)
                 lead.enrichment_status = "Completed"
             else:
                 lead.enrichment_status = "Failed"
             
             # 4. Save updates
             self.update_lead(lead)
-
-            # 5. Automatically score after enrichment
-            self.score_lead(lead_id)
             
         except Exception as e:
             print(f"[CRMManager] Enrichment failed for {lead_id}: {e}")
             lead.enrichment_status = "Failed"
             self.update_lead(lead)
+            # Re-raise so the job queue can retry
+            raise
 
-    def score_lead(self, lead_id: str):
-        """Perform AI scoring for a lead."""
-        lead = self.get_lead(lead_id)
-        if not lead:
-            return
+        # 5. Automatically score after enrichment (a scoring failure
+        # shouldn't make the enrichment itself count as failed)
+        try:
+            self.score_lead(lead_id)
+        except Exception as e:
+            print(f"[CRMManager] Post-enrichment scoring failed for {lead_id}: {e}")
 
-        activities = self.get_activities(lead_id=lead_id)
-        
+    def score_lead(self, lead_id: str):
+        """Perform AI scoring for a lead (skipped if its scoring inputs are unchanged)."""
         try:
-            scoring_result = scoring_service.score_lead(lead, activities)
-            
-            lead.score = scoring_result.get("score")
-            lead.heat_level = scoring_result.get("heat_level")
-            
-            # Save updates
-            self.update_lead(lead)
-            print(f"[CRMManager] Scored lead {lead_id}: {lead.score} ({lead.heat_level})")
-            
+            result = self.score_leads([lead_id], explain=True)
+            if result["scored"]:
+                lead = self.get_lead(lead_id)
+                print(f"[CRMManager] Scored lead {lead_id}: {lead.score} ({lead.heat_level})")
+            elif result["skipped"]:
+                print(f"[CRMManager] Lead {lead_id} unchanged since last scoring, skipped")
         except Exception as e:
             print(f"[CRMManager] Scoring failed for {lead_id}: {e}")
+            raise
+
+    def score_leads(self, lead_ids: Optional[List[str]] = None, force: bool = False,
+                    explain: bool = False) -> Dict[str, int]:
+        """
+        Score many leads (all by default) with the local win model, or batched
+        LLM requests if none is trained, and one batched sheet write. Leads
+        whose inputs are unchanged are skipped.
+        """
+        from .scoring import scoring_service
+        from .win_model import open_deal_values
+
+        leads = self.get_leads()
+        if lead_ids is not None:
+            wanted = set(lead_ids)
+            leads = [l for l in leads if l.lead_id in wanted]
+        if not leads:
+            return {"total": 0, "scored": 0, "skipped": 0}
+
+        # One pass over Activities (archived ones still count) instead of one filtered read per lead
+        activities_by_lead: Dict[str, List[Activity]] = {}
+        for activity in self.get_activities(include_archived=True):
+            activities_by_lead.setdefault(activity.lead_id, []).append(activity)
+
+        sheet = self.spreadsheet_key
+        results = scoring_service.score_leads(
+            leads, activities_by_lead, sheet=sheet, force=force,
+            deal_values=open_deal_values(self.get_opportunities()), explain=explain,
+        )
+        scored = []
+        for lead in leads:
+            result = results.get(lead.lead_id)
+            if result is None:
+                continue
+            lead.score = result.get("score")
+            lead.heat_level = result.get("heat_level")
+            scored.append(lead)
+
+        if scored:
+            self.update_leads(scored)
+            scoring_service.record_fingerprints(sheet, results)
+        return {"total": len(leads), "scored": len(scored), "skipped": len(leads) - len(scored)}
+
+    def rescore_leads(self) -> Dict[str, Any]:
+        """
+        Recompute scores for every lead in one vectorized pass (the local win
+        model if one is trained, else the heuristic) and write the score and
+        heat_level cells of the changed rows back in a single batch request.
+        """
+        from .scoring import scoring_service
+        from .vector_scoring import count_per_key, heuristic_scores
+        from .win_model import feature_matrix, activity_type_counts, open_deal_values, win_model_store
+
+        started = time.process_time()
+        data = self._get_lead_rows(for_write=True)
+        if not data or len(data) < 2:
+            return {"total": 0, "changed": 0, "cpu_ms": 0.0, "scorer": "heuristic"}
+
+        rows = [(i, row) for i, row in enumerate(data) if i > 0 and row and row[0]]
+        model = win_model_store.get(self.spreadsheet_key)
+        keys = [row[0] for _, row in rows]
+        # One grouped pass over Activities (archived ones included) for every lead's activity count
+        activity_rows = [row for row in self._get_rows(ACTIVITIES_WS, include_archived=True)
+                         if len(row) > 1 and row[0]]
+        # Only rows still in the old column layout go through the model
+        legacy = {i: self._lead_from_row(row) for i, row in rows if self._is_legacy_lead_row(row)}
+        sizes, sources, emails, websites = [], [], [], []
+        for i, row in rows:
+            if i in legacy:
+                lead = legacy[i]
+                sizes.append(lead.company_size.value if lead.company_size else "")
+                sources.append(lead.source.value)
+                emails.append(bool(lead.contact_email))
+                websites.append(bool(lead.website))
+            else:
+                sizes.append(row[8] if len(row) > 8 else "")
+                sources.append(row[6] if len(row) > 6 else "")
+                emails.append(len(row) > 3 and bool(row[3]))
+                websites.append(len(row) > 10 and bool(row[10]))
+        if model is not None:
+            values = open_deal_values(self.get_opportunities())
+            type_counts = activity_type_counts(
+                keys, [(row[1], row[3]) for row in activity_rows if len(row) > 3])
+            scores, heat = model.scores(feature_matrix(
+                sizes, sources, emails, websites, type_counts, [values.get(k, float("nan")) for k in keys]))
+        else:
+            activity_counts = count_per_key(keys, [row[1] for row in activity_rows])
+            scores, heat = heuristic_scores(sizes, sources, activity_counts)
+
+        end = LEAD_SCORE_COL + 2
+        changed: List[Tuple[int, list]] = []
+        legacy_changed: List[Lead] = []
+        for (i, row), score, level in zip(rows, scores.tolist(), heat.tolist()):
+            if i in legacy:
+                lead = legacy[i]
+                if lead.score != score or lead.heat_level != level:
+                    lead.score, lead.heat_level = score, level
+                    legacy_changed.append(lead)
+                continue
+            cells = [str(score), level]
+            if row[LEAD_SCORE_COL:end] != cells:
+                padded = row + [""] * (LEAD_SCORE_COL - len(row))
+                changed.append((i, padded[:LEAD_SCORE_COL] + cells + padded[end:]))
+        cpu_ms = (time.process_time() - started) * 1000
+
+        if changed:
+            # One batch request with a range per changed row; other rows are never written
+            self.sm.update_ranges(
+                self.sheet_name,
+                {f"{LEAD_SCORE_RANGE[0]}{i + 1}:{LEAD_SCORE_RANGE[1]}{i + 1}": [new_row[LEAD_SCORE_COL:end]]
+                 for i, new_row in changed},
+                LEADS_WS,
+            )
+            # Optimistic cache update
+            for i, new_row in changed:
+                data[i] = new_row
+            self._set_cached_data(LEADS_WS, data)
+            self._bump_version(LEADS_WS)
+            self._record_bulk_update(LEADS_WS, [new_row for _, new_row in changed])
+        if legacy_changed:
+            # Old-layout rows are rewritten whole, in the current layout
+            self.update_leads(legacy_changed)
+        if changed or legacy_changed:
+            # These scores no longer match what score_leads recorded; let it score them again
+            scoring_service.forget_fingerprints(
+                self.spreadsheet_key, [row[0] for _, row in changed] + [lead.lead_id for lead in legacy_changed])
+
+        total_changed = len(changed) + len(legacy_changed)
+        scorer = "win_model" if model is not None else "heuristic"
+        print(f"[CRMManager] Rescored {len(rows)} leads with {scorer} ({total_changed} changed, {cpu_ms:.0f}ms CPU)")
+        return {"total": len(rows), "changed": total_changed, "cpu_ms": round(cpu_ms, 1), "scorer": scorer}
+
+    def _record_bulk_update(self, worksheet: str, new_rows: List[list]):
+        """Log many updated rows; publish one resync event instead of thousands."""
+        echoes = self._pending_echoes.setdefault(worksheet, set())
+        versions = []
+        for row in new_rows:
+            echoes.add(row[0])
+            versions.append(self._log_change(worksheet, "updated", row[0], row))
+        if len(new_rows) > MAX_EVENTS_PER_REFRESH:
+            self._publish_change(worksheet, "resync", "", None, "api", versions[-1])
+            return
+        for row, version in zip(new_rows, versions):
+            self._publish_change(worksheet, "updated", row[0], self._row_to_dict(worksheet, row), "api", version)
 
     def analyze_deal(self, opp_id: str) -> Dict[str, Any]:
         """Perform AI analysis for a deal."""
-        opp = self.get_opportunity(opp_id)
+        from .analyzer import deal_analyzer
+
+        opp = self.get_opportunity(opp_id, include_archived=True)
         if not opp:
             return {}
-        activities = self.get_activities(opp_id=opp_id)
-        return deal_analyzer.analyze_opportunity(opp, activities)
+        activities = self.get_activities(opp_id=opp_id, include_archived=True)
+        lead_activities = self.get_activities(lead_id=opp.lead_id, include_archived=True)
+        return deal_analyzer.analyze_opportunity(opp, activities, self.get_lead(opp.lead_id), lead_activities,
+                                                 sheet=self.spreadsheet_key)
+
+    def analyze_portfolio_risk(self, top_n: int = 10, use_ai: bool = True) -> List[Dict[str, Any]]:
+        """Risk-ranked list of every open deal; AI insights for the top `top_n` only."""
+        from .analyzer import deal_analyzer
+
+        # Open deals are never archived, but their older activities may be
+        return deal_analyzer.analyze_portfolio(self.get_opportunities(), self.get_activities(include_archived=True),
+                                               top_n, use_ai,
+                                               leads=self.get_leads(), sheet=self.spreadsheet_key)
+
+    def train_win_model(self, path: Optional[str] = None) -> Dict[str, Any]:
+        """Fit the local win model on this CRM's closed deals and save it; returns its metrics."""
+        from .win_model import win_model_store, train as train_win_model
+
+        # Archived deals are most of the closed history the model learns from
+        model = train_win_model(self.get_leads(), self.get_opportunities(include_archived=True),
+                                self.get_activities(include_archived=True),
+                                path=path or win_model_store.path_for(self.spreadsheet_key),
+                                sheet=self.spreadsheet_key)
+        return model.meta
 
     # -------------------------------------------------------------------------
     # Opportunity Operations
@@ -272,23 +844,18 @@ class CRMManager:
             self.sm.append_row(self.sheet_name, opp.to_row(), OPPS_WS)
             
         self._invalidate_cache(OPPS_WS)
+        self._record_change(OPPS_WS, "created", opp.opp_id, entity_dict(opp))
         return opp
 
-    def get_opportunities(self) -> List[Opportunity]:
-        """Retrieve all opportunities."""
-        data = self._get_cached_data(OPPS_WS)
-        if data is None:
-            data = self.sm.read_data(self.sheet_name, OPPS_WS)
-            if data:
-                self._set_cached_data(OPPS_WS, data)
-        
-        if not data or len(data) < 2:
-            return []
-        return [Opportunity.from_row(row) for row in data[1:] if row[0]]
+    def get_opportunities(self, include_archived: bool = False) -> List[Opportunity]:
+        """Retrieve all opportunities; archived (long-closed) deals only if `include_archived`."""
+        rows = self._get_rows(OPPS_WS, include_archived)
+        with span("decode"):
+            return [Opportunity.from_row(row) for row in rows if row[0]]
 
-    def get_opportunity(self, opp_id: str) -> Optional[Opportunity]:
+    def get_opportunity(self, opp_id: str, include_archived: bool = False) -> Optional[Opportunity]:
         """Get a specific opportunity by ID."""
-        opps = self.get_opportunities()
+        opps = self.get_opportunities(include_archived)
         return next((o for o in opps if o.opp_id == opp_id), None)
 
     def get_opportunities_for_lead(self, lead_id: str) -> List[Opportunity]:
@@ -297,11 +864,7 @@ class CRMManager:
 
     def update_opportunity(self, opp: Opportunity) -> bool:
         """Update an existing opportunity."""
-        data = self._get_cached_data(OPPS_WS)
-        if not data:
-            data = self.sm.read_data(self.sheet_name, OPPS_WS)
-            if data: self._set_cached_data(OPPS_WS, data)
-            
+        data = self._get_data_for_write(OPPS_WS)
         if not data: return False
         
         # Iterate raw data to find ID (col 0)
@@ -317,6 +880,8 @@ class CRMManager:
                 # Optimistic cache update
                 data[i] = new_row
                 self._set_cached_data(OPPS_WS, data)
+                self._bump_version(OPPS_WS)
+                self._record_change(OPPS_WS, "updated", opp.opp_id, entity_dict(opp))
                 return True
         return False
 
@@ -325,17 +890,16 @@ class CRMManager:
         opp = self.get_opportunity(opp_id)
         if not opp:
             return False
+        # Moving between post-win stages keeps the original close date
+        if new_stage in CLOSED_STAGES and (opp.stage not in CLOSED_STAGES or not opp.closed_at):
+            opp.closed_at = datetime.now()
         opp.stage = new_stage
         opp.updated_at = datetime.now()
-        if new_stage in [PipelineStage.CLOSED_WON, PipelineStage.CLOSED_LOST, PipelineStage.CASH_IN_BANK]:
-            opp.closed_at = datetime.now()
         return self.update_opportunity(opp)
 
     def delete_opportunity(self, opp_id: str) -> bool:
         """Delete an opportunity by ID."""
-        data = self._get_cached_data(OPPS_WS)
-        if not data:
-            data = self.sm.read_data(self.sheet_name, OPPS_WS)
+        data = self._get_data_for_write(OPPS_WS)
             
         if not data: return False
 
@@ -347,6 +911,8 @@ class CRMManager:
                 # Optimistic cache update
                 data.pop(i)
                 self._set_cached_data(OPPS_WS, data)
+                self._bump_version(OPPS_WS)
+                self._record_change(OPPS_WS, "deleted", opp_id)
                 return True
         return False
 
@@ -364,31 +930,166 @@ class CRMManager:
             self.sm.append_row(self.sheet_name, activity.to_row(), ACTIVITIES_WS)
             
         self._invalidate_cache(ACTIVITIES_WS)
+        self._record_change(ACTIVITIES_WS, "created", activity.activity_id, entity_dict(activity))
         return activity
 
-    def get_activities(self, lead_id: Optional[str] = None, opp_id: Optional[str] = None) -> List[Activity]:
-        """Get activities, optionally filtered by lead or opportunity."""
-        data = self._get_cached_data(ACTIVITIES_WS)
-        if data is None:
-            data = self.sm.read_data(self.sheet_name, ACTIVITIES_WS)
-            if data:
-                self._set_cached_data(ACTIVITIES_WS, data)
-        if not data or len(data) < 2:
-            return []
-        activities = [Activity.from_row(row) for row in data[1:] if row[0]]
+    def get_activities(self, lead_id: Optional[str] = None, opp_id: Optional[str] = None,
+                       include_archived: bool = False) -> List[Activity]:
+        """Get activities, optionally filtered by lead or opportunity; archived ones only if `include_archived`."""
+        rows = self._get_rows(ACTIVITIES_WS, include_archived)
+        with span("decode"):
+            activities = [Activity.from_row(row) for row in rows if row[0]]
         if lead_id:
             activities = [a for a in activities if a.lead_id == lead_id]
         if opp_id:
             activities = [a for a in activities if a.opp_id == opp_id]
         return activities
 
+    # -------------------------------------------------------------------------
+    # Archiving (hot/cold tiering)
+    # -------------------------------------------------------------------------
+
+    def archive_worksheets(self, worksheet: str) -> List[str]:
+        """Archive worksheets holding cold rows of `worksheet`, oldest year first."""
+        now = time.monotonic()
+        if self._worksheet_titles is None or now - self._worksheet_titles[0] > self.CACHE_TTL:
+            if self.offline:
+                titles = self.snapshots.worksheets(self.spreadsheet_key)
+            else:
+                titles = self.sm.list_worksheets(self.sheet_name)
+            self._worksheet_titles = (now, titles)
+        return sorted(t for t in self._worksheet_titles[1] if _ARCHIVE_PATTERNS[worksheet].match(t))
+
+    def _expire_archives(self, worksheet: str):
+        """Make the next read refetch `worksheet`'s archive tiers and the worksheet list."""
+        self._worksheet_titles = None
+        for name in list(self._last_fetch):
+            if _ARCHIVE_PATTERNS[worksheet].match(name):
+                del self._last_fetch[name]
+
+    def _get_rows(self, worksheet: str, include_archived: bool = False) -> List[list]:
+        """Data rows (no header) of a hot worksheet, followed by its archives' if asked."""
+        data = self._get_data(worksheet)
+        rows = data[1:] if data else []
+        if not include_archived:
+            return rows
+
+        rows = list(rows)
+        seen = {row[0] for row in rows if row}
+        for archive in self.archive_worksheets(worksheet):
+            for row in (self._get_data(archive) or [])[1:]:
+                # An interrupted archive run can leave a row in both tiers; the hot copy wins
+                if row and row[0] and row[0] not in seen:
+                    seen.add(row[0])
+                    rows.append(row)
+        return rows
+
+    def archive(self, closed_after_days: int = ARCHIVE_CLOSED_AFTER_DAYS,
+                activities_after_days: int = ARCHIVE_ACTIVITIES_AFTER_DAYS,
+                dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Move deals closed more than `closed_after_days` ago and activities older
+        than `activities_after_days` into yearly archive worksheets, in batches.
+        Returns rows moved (or, with `dry_run`, that would move) per archive worksheet.
+        """
+        started = time.perf_counter()
+        closed_cutoff = datetime.now() - timedelta(days=closed_after_days)
+        activity_cutoff = datetime.now() - timedelta(days=activities_after_days)
+
+        def closed_year(row: list) -> Optional[int]:
+            opp = Opportunity.from_row(row)
+            closed = (opp.closed_at or opp.updated_at).replace(tzinfo=None)
+            return closed.year if opp.stage in ARCHIVABLE_STAGES and closed < closed_cutoff else None
+
+        def activity_year(row: list) -> Optional[int]:
+            logged = Activity.from_row(row).date.replace(tzinfo=None)
+            return logged.year if logged < activity_cutoff else None
+
+        moved_opps = self._archive_rows(OPPS_WS, closed_year, dry_run)
+        moved = {**moved_opps, **self._archive_rows(ACTIVITIES_WS, activity_year, dry_run)}
+        if not dry_run and any(moved_opps.values()) and self.summary_mode == "formula":
+            # Formulas name their worksheets; a new archive year must be added to them
+            try:
+                self._write_summary_formulas()
+            except Exception as e:
+                print(f"[CRMManager] Summary refresh failed: {e}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"[CRMManager] {'Would archive' if dry_run else 'Archived'} {sum(moved.values())} rows "
+              f"into {len(moved)} worksheets ({elapsed_ms:.0f}ms)")
+        return {"dry_run": dry_run, "moved": moved, "total": sum(moved.values()), "elapsed_ms": round(elapsed_ms, 1)}
+
+    def _archive_rows(self, worksheet: str, year_of, dry_run: bool) -> Dict[str, int]:
+        """
+        Move the rows of `worksheet` that `year_of` gives a year into that
+        year's archive worksheet. Rows are appended to the archive and read
+        back before they are deleted from the hot worksheet, so an interrupted
+        run leaves duplicates (which reads ignore and the next run clears),
+        never lost rows.
+        """
+        # Straight from the sheet: never decide what to move from a stale cache
+        data = self.sm.read_data(self.sheet_name, worksheet)
+        if not data or len(data) < 2:
+            return {}
+        self._set_cached_data(worksheet, data)
+
+        by_archive: Dict[str, List[list]] = {}
+        for row in data[1:]:
+            if not row or not row[0]:
+                continue
+            try:
+                year = year_of(row)
+            except Exception as e:
+                print(f"[CRMManager] Not archiving unreadable {worksheet} row {row[0]}: {e}")
+                continue
+            if year is not None:
+                by_archive.setdefault(ARCHIVE_WORKSHEETS[worksheet].format(year=year), []).append(row)
+        if dry_run or not by_archive:
+            return {name: len(rows) for name, rows in by_archive.items()}
+
+        sh = self.sm.get_sheet(self.sheet_name)
+        archived_ids = set()
+        moved = {}
+        for name, rows in sorted(by_archive.items()):
+            self.templates.ensure_worksheet(sh, name, WORKSHEET_SPECS[worksheet]())
+            existing = self.sm.read_data(self.sheet_name, name) or []
+            present = {row[0] for row in existing[1:] if row}
+            new_rows = [row for row in rows if row[0] not in present]
+            if new_rows:
+                self.sm.append_rows(self.sheet_name, ([] if existing else [data[0]]) + new_rows, name)
+            written = self.sm.read_data(self.sheet_name, name) or []
+            confirmed = {row[0] for row in written[1:] if row} & {row[0] for row in rows}
+            if written:
+                self._set_cached_data(name, written)
+                self._save_snapshot(name)
+            archived_ids |= confirmed
+            moved[name] = len(confirmed)
+        self._worksheet_titles = None
+
+        # Row positions from a fresh read, right before the delete
+        data = self.sm.read_data(self.sheet_name, worksheet) or []
+        indices = [i + 1 for i, row in enumerate(data) if i and row and row[0] in archived_ids]
+        self.sm.delete_rows(self.sheet_name, indices, worksheet)
+
+        # To clients, archived rows are deletions from the hot view
+        hashes = self._row_hashes.get(worksheet, {})
+        for entity_id in archived_ids:
+            hashes.pop(entity_id, None)
+            version = self._log_change(worksheet, "deleted", entity_id)
+        if archived_ids:
+            self._publish_change(worksheet, "resync", "", None, "api", version)
+        self._set_cached_data(worksheet, [row for i, row in enumerate(data)
+                                          if not (i and row and row[0] in archived_ids)])
+        self._bump_version(worksheet)
+        self._save_snapshot(worksheet)
+        return moved
+
     # -------------------------------------------------------------------------
     # Pipeline & Dashboard
     # -------------------------------------------------------------------------
 
     def get_pipeline_summary(self) -> Dict[str, Any]:
-        """Get pipeline summary data for dashboard."""
-        opps = self.get_opportunities()
+        """Get pipeline summary data for dashboard (archived deals included, so totals survive archiving)."""
+        opps = self.get_opportunities(include_archived=True)
         leads = self.get_leads()
 
         # Group opportunities by stage
@@ -417,6 +1118,65 @@ class CRMManager:
             "leads_by_status": leads_by_status,
         }
 
+    @property
+    def summary_mode(self) -> str:
+        return _summary_modes.get(self.spreadsheet_key, SUMMARY_MODE)
+
+    def set_summary_mode(self, mode: str) -> Dict[str, Any]:
+        """
+        Switch the Summary worksheet between live formulas and server-written
+        values. Either way the sheet is rewritten right away.
+        """
+        if mode not in SUMMARY_MODES:
+            raise ValueError(f"Unknown summary mode '{mode}' (expected one of {', '.join(SUMMARY_MODES)})")
+        _summary_modes[self.spreadsheet_key] = mode
+        if mode == "materialized":
+            return self.materialize_summary()
+
+        with self._summary_lock:
+            if self._summary_timer is not None:
+                self._summary_timer.cancel()
+                self._summary_timer = None
+        self._write_summary_formulas()
+        return {"mode": mode}
+
+    def _write_summary_formulas(self):
+        """(Re)write the formula Summary over the Opportunities worksheet and all its archives."""
+        sh = self.sm.get_sheet(self.sheet_name)
+        if sh:
+            self.templates.setup_summary_sheet(self.templates.ensure_worksheet(sh, SUMMARY_WS),
+                                               [OPPS_WS] + self.archive_worksheets(OPPS_WS))
+
+    def materialize_summary(self) -> Dict[str, Any]:
+        """Write the current pipeline aggregates into the Summary sheet as static values, in one request."""
+        started = time.perf_counter()
+        # Everything below the title row (which keeps the spreadsheet's name)
+        block = spec_grid(summary_spec(summary=self.get_pipeline_summary()))[1:]
+        self.sm.update_range(self.sheet_name, f"A2:C{len(block) + 1}", block, SUMMARY_WS)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"[CRMManager] Materialized Summary sheet ({len(block)} rows, {elapsed_ms:.0f}ms)")
+        return {"mode": "materialized", "rows": len(block), "elapsed_ms": round(elapsed_ms, 1)}
+
+    def _schedule_summary_refresh(self):
+        """Refresh the materialized Summary once the debounce window after the first pending write ends."""
+        with self._summary_lock:
+            if self._summary_timer is not None:
+                return  # this write is picked up by the pending refresh
+            timer = threading.Timer(SUMMARY_REFRESH_DEBOUNCE, self._run_summary_refresh)
+            timer.daemon = True
+            self._summary_timer = timer
+        timer.start()
+
+    def _run_summary_refresh(self):
+        with self._summary_lock:
+            self._summary_timer = None
+        if self.summary_mode != "materialized":
+            return
+        try:
+            self.materialize_summary()
+        except Exception as e:
+            print(f"[CRMManager] Summary refresh failed: {e}")
+
     def print_pipeline(self):
         """Print a rich table summary of the pipeline."""
         summary = self.get_pipeline_summary()
@@ -56,6 +56,23 @@ class PipelineStage(str, Enum):
     UNKNOWN = "Unknown"  # Fallback for unrecognized stages
 
 
+# Stages where a deal is still being won or lost
+OPEN_STAGES = (
+    PipelineStage.PROSPECTING,
+    PipelineStage.DISCOVERY,
+    PipelineStage.PROPOSAL,
+    PipelineStage.NEGOTIATION,
+)
+# Won, including the post-sale stages a won deal moves through
+WON_STAGES = (
+    PipelineStage.CLOSED_WON,
+    PipelineStage.DELIVERY,
+    PipelineStage.INVOICING,
+    PipelineStage.CASH_IN_BANK,
+)
+CLOSED_STAGES = WON_STAGES + (PipelineStage.CLOSED_LOST,)
+
+
 class ActivityType(str, Enum):
     """Types of activities logged."""
     CALL = "Call"
@@ -0,0 +1,77 @@
+"""
+Score Fingerprints - remembers what each lead's score was computed from.
+
+A fingerprint is a hash of everything that goes into scoring a lead (its
+fields plus a digest of its activities). If the fingerprint is unchanged
+since the lead was last scored, rescoring it would give the same answer, so
+the LLM call is skipped. Fingerprints are kept on disk per spreadsheet.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+SCORE_FINGERPRINTS_PATH = os.getenv("SCORE_FINGERPRINTS_PATH", "data/score_fingerprints.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    sheet TEXT NOT NULL,
+    lead_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    scored_at REAL NOT NULL,
+    PRIMARY KEY (sheet, lead_id)
+);
+"""
+
+
+class ScoreFingerprintStore:
+    """SQLite map of (spreadsheet, lead_id) -> fingerprint of the last scoring inputs."""
+
+    def __init__(self, path: str = SCORE_FINGERPRINTS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        """Open the store lazily. Call with the lock held."""
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def get_many(self, sheet: str, lead_ids: Iterable[str]) -> Dict[str, str]:
+        wanted = set(lead_ids)
+        if not wanted:
+            return {}
+        with self._lock:
+            rows = self._conn().execute("SELECT lead_id, fingerprint FROM fingerprints WHERE sheet = ?", (sheet,))
+            return {lead_id: fp for lead_id, fp in rows if lead_id in wanted}
+
+    def put_many(self, sheet: str, fingerprints: Dict[str, str]):
+        if not fingerprints:
+            return
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN")
+            db.executemany(
+                "INSERT OR REPLACE INTO fingerprints (sheet, lead_id, fingerprint, scored_at) VALUES (?, ?, ?, ?)",
+                [(sheet, lead_id, fp, now) for lead_id, fp in fingerprints.items()],
+            )
+            db.execute("COMMIT")
+
+    def delete_many(self, sheet: str, lead_ids: Iterable[str]):
+        ids = list(lead_ids)
+        if not ids:
+            return
+        with self._lock:
+            db = self._conn()
+            db.execute("BEGIN")
+            db.executemany("DELETE FROM fingerprints WHERE sheet = ? AND lead_id = ?",
+                           [(sheet, lead_id) for lead_id in ids])
+            db.execute("COMMIT")
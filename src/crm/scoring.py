@@ -1,16 +1,56 @@
 import os
 import json
-from typing import List, Optional, Dict, Any
-from openai import OpenAI
+import hashlib
+from typing import List, Optional, Dict, Any, Tuple
+from ..services.outbound import LLMClient
 from .models import Lead, Activity
+from .score_fingerprints import ScoreFingerprintStore
+from .win_model import WinModelStore, win_model_store, lead_features
+from .vector_scoring import (
+    BASE_SCORE, SIZE_BONUS, SOURCE_BONUS, ACTIVITY_POINTS, ACTIVITY_CAP, HOT_THRESHOLD, WARM_THRESHOLD
+)
+
+SCORING_MODEL = "gpt-4o-mini"
+# Bump when the prompt or rubric changes so every lead is rescored once
+SCORING_PROMPT_VERSION = "1"
+
+# Batch scoring limits
+SCORING_BATCH_TOKEN_BUDGET = int(os.getenv("SCORING_BATCH_TOKEN_BUDGET", "6000"))  # prompt tokens per request
+SCORING_BATCH_MAX_LEADS = int(os.getenv("SCORING_BATCH_MAX_LEADS", "40"))
+ACTIVITY_DIGEST_SIZE = 10  # most recent activities sent per lead
+NOTES_MAX_CHARS = 500
+
+HEAT_LEVELS = ("Cold", "Warm", "Hot")
+
+SCORING_RUBRIC = """
+        Rubric:
+        - Score (0-100):
+            - 80-100: Ideal customer profile, high engagement (recent calls/meetings).
+            - 50-79: Good fit, some engagement (emails, notes).
+            - 20-49: Poor fit or low engagement.
+            - 0-19: Unqualified or no engagement.
+        - Heat Level:
+            - Hot: Highly active and good fit.
+            - Warm: Moderately active or good fit with low activity.
+            - Cold: Inactive or poor fit.
+"""
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for packing batches."""
+    return len(text) // 4 + 1
+
 
 class LeadScoringService:
-    def __init__(self, openai_api_key: Optional[str] = None):
+    def __init__(self, openai_api_key: Optional[str] = None, fingerprints: Optional[ScoreFingerprintStore] = None,
+                 models: WinModelStore = win_model_store):
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         if self.openai_api_key:
-            self.client = OpenAI(api_key=self.openai_api_key)
+            self.client = LLMClient(self.openai_api_key)
         else:
             self.client = None
+        self.fingerprints = fingerprints if fingerprints is not None else ScoreFingerprintStore()
+        self.models = models
 
     def score_lead(self, lead: Lead, activities: List[Activity]) -> Dict[str, Any]:
         """
@@ -39,17 +79,7 @@ class LeadScoringService:
         Engagement History (Recent Activities):
         {json.dumps(activity_summary, indent=2)}
         
-        Rubric:
-        - Score (0-100):
-            - 80-100: Ideal customer profile, high engagement (recent calls/meetings).
-            - 50-79: Good fit, some engagement (emails, notes).
-            - 20-49: Poor fit or low engagement.
-            - 0-19: Unqualified or no engagement.
-        - Heat Level:
-            - Hot: Highly active and good fit.
-            - Warm: Moderately active or good fit with low activity.
-            - Cold: Inactive or poor fit.
-            
+        {SCORING_RUBRIC}
         Return ONLY a JSON object with these keys:
         - score (integer)
         - heat_level (string: "Cold", "Warm", "Hot")
@@ -59,8 +89,8 @@ class LeadScoringService:
         """
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
+            response = self.client.chat(
+                model=SCORING_MODEL,
                 messages=[
                     {"role": "system", "content": "You are a lead scoring expert."},
                     {"role": "user", "content": prompt}
@@ -79,32 +109,258 @@ class LeadScoringService:
             print(f"[Scoring] AI scoring error: {e}")
             return self._heuristic_score(lead, activities)
 
+    # -------------------------------------------------------------------------
+    # Batch scoring
+    # -------------------------------------------------------------------------
+
+    def _scoring_inputs(self, lead: Lead, activities: List[Activity]) -> Dict[str, Any]:
+        """Everything the score depends on, as sent to the model."""
+        recent = sorted(activities, key=lambda a: a.date, reverse=True)[:ACTIVITY_DIGEST_SIZE]
+        return {
+            "lead_id": lead.lead_id,
+            "company": lead.company_name,
+            "industry": lead.industry or "Unknown",
+            "company_size": lead.company_size.value if lead.company_size else "Unknown",
+            "source": lead.source.value,
+            "notes": (lead.notes or "None")[:NOTES_MAX_CHARS],
+            "activity_count": len(activities),
+            "recent_activities": [
+                {"type": a.type.value, "subject": a.subject, "date": a.date.date().isoformat()}
+                for a in recent
+            ],
+        }
+
+    def fingerprint(self, lead: Lead, activities: List[Activity], scorer: str = SCORING_MODEL,
+                    deal_value: float = 0.0) -> str:
+        """Hash of the scoring inputs; unchanged fingerprint means an unchanged score."""
+        inputs = self._scoring_inputs(lead, activities)
+        raw = json.dumps([scorer, SCORING_PROMPT_VERSION, inputs, deal_value], sort_keys=True, default=str)
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def score_leads(
+        self,
+        leads: List[Lead],
+        activities_by_lead: Dict[str, List[Activity]],
+        sheet: str = "",
+        force: bool = False,
+        deal_values: Optional[Dict[str, float]] = None,
+        explain: bool = False,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Score many leads. With a trained win model (see `crm train-model`) the
+        scores are computed locally in one vectorized pass; otherwise several
+        leads are packed into each LLM request.
+
+        Leads whose scoring inputs haven't changed since they were last scored
+        (and that still have a score) are skipped unless `force` is set.
+        `deal_values` (lead_id -> largest open deal value) feeds the model.
+        With `explain`, model scores get an LLM-written reasoning.
+        Returns lead_id -> result for the leads that were scored. Results that
+        carry a "fingerprint" should be passed to `record_fingerprints` once
+        they are saved.
+        """
+        deal_values = deal_values or {}
+        model = self.models.get(sheet)
+        # Heuristic scores get their own tag, so adding an API key later rescores those leads
+        scorer = f"win-model:{model.version}" if model else SCORING_MODEL if self.client else "heuristic"
+        known = {} if force else self.fingerprints.get_many(sheet, [l.lead_id for l in leads])
+        todo: List[Tuple[Lead, List[Activity], Dict[str, Any], str]] = []
+        for lead in leads:
+            activities = activities_by_lead.get(lead.lead_id, [])
+            value = deal_values.get(lead.lead_id, 0.0) if model else 0.0
+            fp = self.fingerprint(lead, activities, scorer, value)
+            if lead.score is not None and known.get(lead.lead_id) == fp:
+                continue
+            todo.append((lead, activities, self._scoring_inputs(lead, activities), fp))
+        if not todo:
+            return {}
+
+        if model is not None:
+            return self._model_scores(model, todo, deal_values, explain)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        if not self.client:
+            print("[Scoring] OpenAI client not initialized, using heuristic scoring")
+            for lead, activities, _, fp in todo:
+                results[lead.lead_id] = {**self._heuristic_score(lead, activities), "fingerprint": fp}
+            return results
+
+        batches = self._pack_batches(todo)
+        print(f"[Scoring] Scoring {len(todo)} leads in {len(batches)} requests ({len(leads) - len(todo)} unchanged)")
+        # All batches go out together; the shared OpenAI semaphore bounds concurrency
+        batch_inputs = [[item[2] for item in batch] for batch in batches]
+        responses = self.client.chat_many([self._batch_request(inputs) for inputs in batch_inputs])
+        batch_results = [self._parse_batch(inputs, response) for inputs, response in zip(batch_inputs, responses)]
+
+        for batch, scored in zip(batches, batch_results):
+            for lead, activities, _, fp in batch:
+                result = scored.get(lead.lead_id)
+                if result is None:
+                    # Missing or invalid in the model output: fall back, retry next time
+                    results[lead.lead_id] = self._heuristic_score(lead, activities)
+                else:
+                    results[lead.lead_id] = {**result, "fingerprint": fp}
+        return results
+
+    def _model_scores(self, model, todo: List[Tuple], deal_values: Dict[str, float],
+                      explain: bool) -> Dict[str, Dict[str, Any]]:
+        """Score with the local win model; the LLM only writes explanations, if asked."""
+        leads = [item[0] for item in todo]
+        X = lead_features(leads, [a for item in todo for a in item[1]], deal_values)
+        scores, heat = model.scores(X)
+        results: Dict[str, Dict[str, Any]] = {}
+        factors = {}
+        for row, (lead, _, _, fp), score, level in zip(X, todo, scores.tolist(), heat.tolist()):
+            factors[lead.lead_id] = model.top_factors(row)
+            results[lead.lead_id] = {
+                "score": score,
+                "heat_level": level,
+                "reasoning": "Win model: " + ", ".join(
+                    f"{name} ({'+' if weight > 0 else '-'})" for name, weight in factors[lead.lead_id]
+                ),
+                "fingerprint": fp,
+            }
+        print(f"[Scoring] Scored {len(todo)} leads with the local win model ({model.version})")
+
+        if explain and self.client:
+            requests = [self._explain_request(item[2], results[item[0].lead_id], factors[item[0].lead_id])
+                        for item in todo]
+            for item, response in zip(todo, self.client.chat_many(requests)):
+                try:
+                    if isinstance(response, BaseException):
+                        raise response
+                    reasoning = json.loads(response.choices[0].message.content).get("reasoning")
+                    if reasoning:
+                        results[item[0].lead_id]["reasoning"] = reasoning
+                except Exception as e:
+                    print(f"[Scoring] AI explanation error for {item[0].lead_id}: {e}")
+        return results
+
+    def _explain_request(self, inputs: Dict[str, Any], result: Dict[str, Any],
+                         factors: List[Tuple[str, float]]) -> Dict[str, Any]:
+        """Chat completion arguments for explaining a model score (the score itself is fixed)."""
+        prompt = f"""
+        A lead scoring model trained on our past won and lost deals gave this lead a score of
+        {result["score"]}/100 ({result["heat_level"]}).
+        
+        Lead:
+        {json.dumps(inputs, default=str)}
+        
+        Strongest model factors (feature, contribution): {json.dumps(factors)}
+        
+        Explain the score to a sales rep in one or two sentences. Do not change the score.
+        Return ONLY a JSON object: {{"reasoning": "short string"}}
+        """
+        return {
+            "model": SCORING_MODEL,
+            "messages": [
+                {"role": "system", "content": "You are a lead scoring expert."},
+                {"role": "user", "content": prompt}
+            ],
+            "response_format": {"type": "json_object"},
+        }
+
+    def record_fingerprints(self, sheet: str, results: Dict[str, Dict[str, Any]]):
+        """Remember the inputs of saved scores so unchanged leads are skipped next time."""
+        self.fingerprints.put_many(sheet, {
+            lead_id: result["fingerprint"] for lead_id, result in results.items() if result.get("fingerprint")
+        })
+
+    def forget_fingerprints(self, sheet: str, lead_ids: List[str]):
+        """Drop fingerprints of leads whose score was overwritten elsewhere, so they are scored again."""
+        self.fingerprints.delete_many(sheet, lead_ids)
+
+    def _pack_batches(self, todo: List[Tuple]) -> List[List[Tuple]]:
+        """Group leads into requests bounded by the token budget and a max lead count."""
+        overhead = _estimate_tokens(SCORING_RUBRIC) + 150
+        batches, current, used = [], [], overhead
+        for item in todo:
+            cost = _estimate_tokens(json.dumps(item[2], default=str))
+            if current and (used + cost > SCORING_BATCH_TOKEN_BUDGET or len(current) >= SCORING_BATCH_MAX_LEADS):
+                batches.append(current)
+                current, used = [], overhead
+            current.append(item)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _batch_request(self, inputs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Chat completion arguments for scoring a batch of leads in one request."""
+        leads_json = "\n".join(json.dumps(i, default=str) for i in inputs)
+        prompt = f"""
+        You are an AI Lead Scoring Engine. Score each of the following leads using its data and engagement history.
+        
+        Leads (one JSON object per line):
+        {leads_json}
+        {SCORING_RUBRIC}
+        Return ONLY a JSON object of the form {{"results": [...]}} with exactly one entry per lead, each with:
+        - lead_id (string, as given)
+        - score (integer)
+        - heat_level (string: "Cold", "Warm", "Hot")
+        - reasoning (string: short explanation)
+        
+        Do not include any other text or explanation.
+        """
+        return {
+            "model": SCORING_MODEL,
+            "messages": [
+                {"role": "system", "content": "You are a lead scoring expert."},
+                {"role": "user", "content": prompt}
+            ],
+            "response_format": {"type": "json_object"},
+        }
+
+    def _parse_batch(self, inputs: List[Dict[str, Any]], response: Any) -> Dict[str, Dict[str, Any]]:
+        """Validated lead_id -> result from a batch response (or {} if the request failed)."""
+        try:
+            if isinstance(response, BaseException):
+                raise response
+            content = response.choices[0].message.content
+            entries = json.loads(content).get("results", []) if content else []
+        except Exception as e:
+            print(f"[Scoring] AI batch scoring error ({len(inputs)} leads): {e}")
+            return {}
+
+        wanted = {i["lead_id"] for i in inputs}
+        results = {}
+        for entry in entries:
+            if not isinstance(entry, dict) or entry.get("lead_id") not in wanted:
+                continue
+            try:
+                score = max(0, min(100, int(entry["score"])))
+            except (KeyError, TypeError, ValueError):
+                continue
+            heat_level = entry.get("heat_level")
+            if heat_level not in HEAT_LEVELS:
+                heat_level = "Hot" if score >= 80 else "Warm" if score >= 50 else "Cold"
+            results[entry["lead_id"]] = {
+                "score": score,
+                "heat_level": heat_level,
+                "reasoning": entry.get("reasoning", ""),
+            }
+        return results
+
     def _heuristic_score(self, lead: Lead, activities: List[Activity]) -> Dict[str, Any]:
-        """Fallback heuristic scoring."""
-        score = 20  # Base score
+        """Fallback heuristic scoring (see vector_scoring for the whole-sheet version)."""
+        score = BASE_SCORE
         
         # Company size bonus
         if lead.company_size:
-            if lead.company_size.value in ["51-200", "201-500"]:
-                score += 20
-            elif lead.company_size.value == "500+":
-                score += 30
+            score += SIZE_BONUS.get(lead.company_size.value, 0)
         
         # Activity bonus
-        score += min(len(activities) * 10, 40)
+        score += min(len(activities) * ACTIVITY_POINTS, ACTIVITY_CAP)
         
         # Source bonus
-        if lead.source.value == "Referral":
-            score += 20
-        elif lead.source.value == "Website":
-            score += 10
+        score += SOURCE_BONUS.get(lead.source.value, 0)
             
         score = min(score, 100)
         
         heat_level = "Cold"
-        if score >= 80:
+        if score >= HOT_THRESHOLD:
             heat_level = "Hot"
-        elif score >= 50:
+        elif score >= WARM_THRESHOLD:
             heat_level = "Warm"
             
         return {
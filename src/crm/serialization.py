@@ -0,0 +1,55 @@
+"""
+Fast JSON encoding for CRM entities.
+
+FastAPI's default path (`model_dump()` per row, then `jsonable_encoder`, then
+`json.dumps`) walks every value several times. For list endpoints we instead
+build plain dicts from each model's field layout and encode them in a single
+pass, using orjson when it is installed.
+"""
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Tuple, Type
+
+from pydantic import BaseModel
+
+from .models import Lead, Opportunity, Activity
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+# Field order per entity, computed once. Matches `model_dump()` key order so
+# fast-path responses are byte-for-byte the same shape as the slow path.
+FIELD_LAYOUTS: Dict[Type[BaseModel], Tuple[str, ...]] = {
+    cls: tuple(cls.model_fields) for cls in (Lead, Opportunity, Activity)
+}
+
+
+def entity_dict(model: BaseModel) -> Dict[str, Any]:
+    """Plain dict for a CRM model, without `model_dump()` validation overhead."""
+    values = model.__dict__
+    layout = FIELD_LAYOUTS.get(type(model))
+    if layout is None:
+        return model.model_dump()
+    return {name: values[name] for name in layout}
+
+
+def _default(value: Any) -> Any:
+    """Fallback conversions for the stdlib encoder (orjson handles these natively)."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, BaseModel):
+        return entity_dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """Encode a payload of dicts/lists/entity dicts to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
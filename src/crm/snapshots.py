@@ -0,0 +1,320 @@
+"""
+Worksheet Snapshots - raw worksheet rows persisted on disk between processes.
+
+A restarted API process or a fresh CLI invocation would otherwise download
+every worksheet again before it can answer. With snapshots, `CRMManager`
+can serve the last rows it saw straight from disk and revalidate them
+against the sheet in the background, and read-only CLI commands can run
+with `--offline` and no Google access at all.
+
+One file per (spreadsheet ID, worksheet, content version), named after the
+content digest: a small JSON header (sheet name, saved time, row count,
+digest) followed by the rows as JSON (orjson when installed). Saving a new
+version replaces the previous one. Files are read through mmap and checked
+against their digest, written atomically, and readable by the owner only,
+since they hold CRM data. `index.json` maps sheet names to spreadsheet IDs
+for offline lookups.
+
+Snapshots are on by default for the CLI and opt-in (`SNAPSHOTS=true`) for
+the multi-tenant API. Files untouched for `SNAPSHOT_RETENTION_HOURS` are
+deleted by `prune`, which runs at API startup and periodically after saves.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/snapshots")
+# Unset: on for the CLI, off for the API (see default_store)
+SNAPSHOTS_SETTING = os.getenv("SNAPSHOTS")
+# Older snapshots are not used for warm starts (offline reads still accept them)
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE_HOURS", "168")) * 3600
+# "all", or comma-separated sheet names/IDs, loaded into memory at API startup
+SNAPSHOT_PRELOAD = os.getenv("SNAPSHOT_PRELOAD", "")
+# Snapshots not saved again for this long are deleted
+SNAPSHOT_RETENTION = float(os.getenv("SNAPSHOT_RETENTION_HOURS", "720")) * 3600
+PRUNE_INTERVAL = 3600  # seconds between opportunistic prunes after saves
+
+_MAGIC = b"CRMSNAP1"
+_HEADER_LEN = struct.Struct("<I")
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class SnapshotMissing(Exception):
+    """No snapshot to serve an offline read from."""
+
+
+def _file_name(name: str) -> str:
+    return _SAFE_NAME.sub("_", name)
+
+
+def _dumps(rows: List[list]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(rows)
+    return json.dumps(rows, separators=(",", ":")).encode()
+
+
+def _loads(payload) -> List[list]:
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(bytes(payload))
+
+
+def _digest(payload) -> str:
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def _remove(path: str) -> int:
+    try:
+        os.remove(path)
+        return 1
+    except OSError:
+        return 0
+
+
+class SnapshotStore:
+    """Directory of worksheet snapshots keyed by spreadsheet ID."""
+
+    def __init__(self, path: str = SNAPSHOT_DIR, max_age: float = SNAPSHOT_MAX_AGE,
+                 retention: float = SNAPSHOT_RETENTION):
+        self.path = path
+        self.max_age = max_age
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._preloaded: Dict[Tuple[str, str], Tuple[List[list], Dict[str, Any]]] = {}
+        self._last_prune = 0.0
+
+    def _file(self, key: str, worksheet: str, digest: str) -> str:
+        return os.path.join(self.path, _file_name(key), f"{_file_name(worksheet)}@{digest[:16]}.snap")
+
+    def _versions(self, key: str, worksheet: str) -> List[str]:
+        """Snapshot files of a worksheet, newest first."""
+        directory = os.path.join(self.path, _file_name(key))
+        prefix = f"{_file_name(worksheet)}@"
+        try:
+            paths = [os.path.join(directory, name) for name in os.listdir(directory)
+                     if name.startswith(prefix) and name.endswith(".snap")]
+        except OSError:
+            return []
+        return sorted(paths, key=_mtime, reverse=True)
+
+    # -------------------------------------------------------------------------
+    # Read / write
+    # -------------------------------------------------------------------------
+
+    def read(self, key: str, worksheet: str) -> Optional[Tuple[List[list], Dict[str, Any]]]:
+        """(rows, header) of a snapshot, or None if there is none (or it is damaged)."""
+        with self._lock:
+            preloaded = self._preloaded.pop((key, worksheet), None)
+        if preloaded is not None:
+            return preloaded
+
+        versions = self._versions(key, worksheet)
+        if not versions:
+            return None
+        path = versions[0]
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[:len(_MAGIC)] != _MAGIC:
+                    raise ValueError("not a snapshot file")
+                offset = len(_MAGIC) + _HEADER_LEN.size
+                (header_len,) = _HEADER_LEN.unpack_from(mm, len(_MAGIC))
+                header = json.loads(mm[offset:offset + header_len])
+                view = memoryview(mm)[offset + header_len:]
+                try:
+                    if _digest(view) != header["digest"]:
+                        raise ValueError("digest mismatch")
+                    rows = _loads(view)
+                finally:
+                    view.release()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[Snapshots] Ignoring unreadable snapshot {path}: {e}")
+            return None
+        return rows, header
+
+    def load(self, key: str, worksheet: str, max_age: Optional[float] = None) -> Optional[List[list]]:
+        """Snapshot rows, unless missing or older than `max_age` seconds (default: the store's)."""
+        snapshot = self.read(key, worksheet)
+        if snapshot is None:
+            return None
+        rows, header = snapshot
+        limit = self.max_age if max_age is None else max_age
+        if limit and time.time() - header["saved_at"] > limit:
+            return None
+        return rows
+
+    def save(self, key: str, worksheet: str, rows: List[list], sheet_name: Optional[str] = None) -> str:
+        """Write a snapshot atomically, replacing older versions; returns its content digest."""
+        payload = _dumps(rows)
+        digest = _digest(payload)
+        path = self._file(key, worksheet, digest)
+        header = json.dumps({
+            "spreadsheet": key,
+            "sheet_name": sheet_name,
+            "worksheet": worksheet,
+            "saved_at": time.time(),
+            "rows": len(rows),
+            "digest": digest,
+        }).encode()
+
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(_MAGIC + _HEADER_LEN.pack(len(header)) + header)
+            f.write(payload)
+        with self._lock:
+            os.replace(tmp, path)
+            for old in self._versions(key, worksheet):
+                if old != path:
+                    _remove(old)
+        if sheet_name and sheet_name != key:
+            self._remember_name(sheet_name, key)
+        self._maybe_prune()
+        return digest
+
+    # -------------------------------------------------------------------------
+    # Retention
+    # -------------------------------------------------------------------------
+
+    def prune(self, retention: Optional[float] = None) -> int:
+        """
+        Delete snapshots older than `retention` seconds (default: the store's),
+        then spreadsheet directories and index entries left empty. Returns files removed.
+        """
+        limit = self.retention if retention is None else retention
+        if not limit:
+            return 0
+        cutoff = time.time() - limit
+        removed = 0
+        for key in self.keys():
+            directory = os.path.join(self.path, key)
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if name.endswith((".snap", ".tmp")) and _mtime(path) < cutoff:
+                    removed += _remove(path)
+            try:
+                os.rmdir(directory)  # only succeeds once empty
+            except OSError:
+                pass
+        with self._lock:
+            index = self._index()
+            kept = {name: key for name, key in index.items() if os.path.isdir(os.path.join(self.path, _file_name(key)))}
+            if kept != index:
+                self._write_index(kept)
+        if removed:
+            print(f"[Snapshots] Pruned {removed} snapshots older than {limit / 3600:g}h")
+        return removed
+
+    def _maybe_prune(self):
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        try:
+            self.prune()
+        except OSError as e:
+            print(f"[Snapshots] Pruning failed: {e}")
+
+    # -------------------------------------------------------------------------
+    # Sheet names and preloading
+    # -------------------------------------------------------------------------
+
+    def _index_path(self) -> str:
+        return os.path.join(self.path, "index.json")
+
+    def _index(self) -> Dict[str, str]:
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _remember_name(self, sheet_name: str, key: str):
+        with self._lock:
+            index = self._index()
+            if index.get(sheet_name) == key:
+                return
+            index[sheet_name] = key
+            self._write_index(index)
+
+    def _write_index(self, index: Dict[str, str]):
+        tmp = f"{self._index_path()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp, self._index_path())
+
+    def resolve(self, sheet: str) -> Optional[str]:
+        """Spreadsheet ID with snapshots for a sheet name (or ID), if any."""
+        if os.path.isdir(os.path.join(self.path, _file_name(sheet))):
+            return sheet
+        return self._index().get(sheet)
+
+    def keys(self) -> List[str]:
+        """Spreadsheet IDs that have snapshots."""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name for name in os.listdir(self.path) if os.path.isdir(os.path.join(self.path, name)))
+
+    def worksheets(self, key: str) -> List[str]:
+        """Worksheets with a snapshot for a spreadsheet ID (as file-safe names)."""
+        directory = os.path.join(self.path, _file_name(key))
+        if not os.path.isdir(directory):
+            return []
+        return sorted({name[:-len(".snap")].rsplit("@", 1)[0] for name in os.listdir(directory) if name.endswith(".snap")})
+
+    def preload(self, sheets: Iterable[str] = ()) -> Dict[str, int]:
+        """
+        Read snapshots into memory ahead of the first request; each is handed
+        to the first manager that asks for it. Returns rows loaded per file.
+        """
+        wanted = list(sheets)
+        keys = self.keys() if not wanted or wanted == ["all"] else [k for k in map(self.resolve, wanted) if k]
+        loaded = {}
+        for key in keys:
+            for worksheet in self.worksheets(key):
+                snapshot = self.read(key, worksheet)
+                if snapshot is None:
+                    continue
+                rows, header = snapshot
+                # Keyed by the real names, not the file-safe ones
+                entry = (header.get("spreadsheet", key), header.get("worksheet", worksheet))
+                with self._lock:
+                    self._preloaded[entry] = snapshot
+                loaded["/".join(entry)] = len(rows)
+        return loaded
+
+
+snapshot_store = SnapshotStore()
+
+
+def default_store(default: bool = False) -> Optional[SnapshotStore]:
+    """
+    The shared store, or None when snapshots are off. `SNAPSHOTS` decides when
+    set; otherwise `default` does (the API leaves them off, the CLI turns them on).
+    """
+    if SNAPSHOTS_SETTING is None:
+        enabled = default
+    else:
+        enabled = SNAPSHOTS_SETTING.lower() not in ("0", "false", "no", "off")
+    return snapshot_store if enabled else None
@@ -1,14 +1,279 @@
 """
 CRM Sheet Templates - Creates and initializes the CRM Google Sheet structure.
+
+Each worksheet is described by a declarative spec (grid size, frozen rows,
+filter, cell values/formulas, formats and dropdown validations). Specs are
+compiled into Sheets API requests and sent in a single
+`spreadsheets.batchUpdate`, so provisioning a whole CRM is one create call,
+one metadata read and one batch update instead of dozens of cell writes.
 """
+import random
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
 import gspread
-import time
+from gspread.utils import a1_range_to_grid_range, a1_to_rowcol
 from rich.console import Console
 
 from .models import Lead, Opportunity, Activity, PipelineStage, LeadStatus, LeadSource, CompanySize
 
 console = Console()
 
+DEFAULT_ROWS = 1000
+DEFAULT_COLS = 20
+
+HEADER_BOLD = {"textFormat": {"bold": True}}
+SECTION_TITLE = {"textFormat": {"bold": True, "fontSize": 12}}
+SCHEMA_SECTION = {"textFormat": {"bold": True, "fontSize": 11, "foregroundColor": {"red": 0.2, "green": 0.4, "blue": 0.8}}}
+SCHEMA_HEADER = {"textFormat": {"bold": True}, "backgroundColor": {"red": 0.9, "green": 0.9, "blue": 0.9}}
+CURRENCY = {"numberFormat": {"type": "CURRENCY", "pattern": "$#,##0.00"}}
+CURRENCY_WHOLE = {"numberFormat": {"type": "CURRENCY", "pattern": "$#,##0"}}
+
+
+# =============================================================================
+# Worksheet specs
+# =============================================================================
+
+def _col(n: int) -> str:
+    """1-based column number -> letter(s)."""
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _data_sheet_spec(headers: List[str], header_color: Dict[str, float]) -> Dict[str, Any]:
+    """Common layout of the Leads/Opportunities/Activities tables."""
+    return {
+        "freeze_rows": 1,
+        "basic_filter": True,
+        "values": [("A1", [headers])],
+        "formats": [(f"A1:{_col(len(headers))}1", {"textFormat": {"bold": True}, "backgroundColor": header_color})],
+        "validations": [],
+    }
+
+
+def leads_spec() -> Dict[str, Any]:
+    spec = _data_sheet_spec(Lead.headers(), {"red": 0.2, "green": 0.2, "blue": 0.3})
+    spec["validations"] = [
+        ("F2:F1000", [s.value for s in LeadStatus]),   # status
+        ("G2:G1000", [s.value for s in LeadSource]),   # source
+        ("I2:I1000", [s.value for s in CompanySize]),  # company size
+    ]
+    return spec
+
+
+def opportunities_spec() -> Dict[str, Any]:
+    spec = _data_sheet_spec(Opportunity.headers(), {"red": 0.2, "green": 0.3, "blue": 0.2})
+    spec["validations"] = [("D2:D1000", [s.value for s in PipelineStage])]  # stage
+    spec["formats"] += [
+        ("E2:E1000", CURRENCY),  # value
+        ("F2:F1000", {"numberFormat": {"type": "NUMBER", "pattern": "0%"}}),  # probability
+        ("G2:G1000", CURRENCY),  # expected value
+    ]
+    return spec
+
+
+def activities_spec() -> Dict[str, Any]:
+    return _data_sheet_spec(Activity.headers(), {"red": 0.3, "green": 0.2, "blue": 0.2})
+
+
+def summary_spec(title: str = "Sales Pipeline 2026", summary: Optional[Dict[str, Any]] = None,
+                 opp_sheets: Sequence[str] = ("Opportunities",)) -> Dict[str, Any]:
+    """
+    Dashboard of pipeline aggregates. By default the cells are whole-column
+    formulas over the data sheets (every worksheet in `opp_sheets`, so
+    archived deals still count); with `summary` (from
+    `CRMManager.get_pipeline_summary`) they hold those precomputed values.
+    """
+    if summary is None:
+        refs = [name if name.isalpha() else f"'{name}'" for name in opp_sheets]
+
+        def count_all() -> str:
+            return "=" + "+".join(f"COUNTA({r}!A:A)-1" for r in refs)
+
+        def count_if(criteria: str) -> str:
+            return "=" + "+".join(f'COUNTIF({r}!D:D,"{criteria}")' for r in refs)
+
+        def sum_if(criteria: str) -> str:
+            return "=" + "+".join(f'SUMIF({r}!D:D,"{criteria}",{r}!E:E)' for r in refs)
+
+        metrics = [
+            ["Total Leads", '=COUNTA(Leads!A:A)-1'],
+            ["Total Opportunities", count_all()],
+            ["Pipeline Value", sum_if("<>Closed Lost")],
+            ["Closed Won Value", sum_if("Closed Won")],
+            ["Cash in Bank", sum_if("Cash in Bank")],
+        ]
+        stages = [[stage.value, count_if(stage.value), sum_if(stage.value)] for stage in PipelineStage]
+        statuses = [[status.value, f'=COUNTIF(Leads!F:F,"{status.value}")'] for status in LeadStatus]
+        note = ""
+    else:
+        metrics = [
+            ["Total Leads", summary["total_leads"]],
+            ["Total Opportunities", summary["total_opportunities"]],
+            ["Pipeline Value", summary["total_pipeline_value"]],
+            ["Closed Won Value", summary["closed_won_value"]],
+            ["Cash in Bank", summary["cash_in_bank"]],
+        ]
+        by_stage = summary["pipeline_by_stage"]
+        stages = [
+            [stage.value, by_stage.get(stage.value, {}).get("count", 0),
+             by_stage.get(stage.value, {}).get("total_value", 0)]
+            for stage in PipelineStage
+        ]
+        statuses = [[status.value, summary["leads_by_status"].get(status.value, 0)] for status in LeadStatus]
+        note = f"Values as of {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} (refreshed by the server)"
+    status_row = max(22, 12 + len(stages))
+
+    return {
+        "values": [
+            ("A1", [[f"{title} - Dashboard"], [note]]),
+            ("A3", [["Key Metrics"]] + metrics),
+            ("A10", [["Pipeline by Stage"], ["Stage", "Count", "Value"]] + stages),
+            (f"A{status_row}", [["Leads by Status"]] + statuses),
+        ],
+        "formats": [
+            ("A1", {"textFormat": {"bold": True, "fontSize": 16}}),
+            ("A3", SECTION_TITLE),
+            ("B6:B8", CURRENCY_WHOLE),
+            ("A10", SECTION_TITLE),
+            ("A11:C11", HEADER_BOLD),
+            (f"C12:C{11 + len(stages)}", CURRENCY_WHOLE),
+            (f"A{status_row}", SECTION_TITLE),
+        ],
+    }
+
+
+def schema_spec() -> Dict[str, Any]:
+    """Reference tables describing the allowed values of each enum column."""
+    sections = [
+        ("Pipeline Stages (Opportunities)", ["Stage Name", "Description"], [
+            ["Prospecting", "Initial research and outreach"],
+            ["Discovery", "First meeting/call to understand needs"],
+            ["Proposal", "Sent proposal or quote"],
+            ["Negotiation", "Discussing terms and pricing"],
+            ["Closed Won", "Contract signed"],
+            ["Closed Lost", "Deal lost (competitor, budget, etc.)"],
+            ["Delivery", "Product/Service delivered"],
+            ["Invoicing", "Invoice sent"],
+            ["Cash in Bank", "Payment received"],
+            ["Unknown", "Fallback for unrecognized stages"],
+        ]),
+        ("Lead Statuses", ["Status", "Description"], [
+            ["New", "Just added, no action yet"],
+            ["Contacted", "Outreach attempted or conversation started"],
+            ["Qualified", "Good fit, potential opportunity"],
+            ["Unqualified", "Not a fit"],
+            ["Lost", "No longer pursuing"],
+            ["Unknown", "Fallback for unrecognized statuses"],
+        ]),
+        ("Lead Sources", ["Source", "Description"], [[s.value, ""] for s in LeadSource]),
+        ("Company Sizes", ["Size Bucket", "Description"], [[s.value, ""] for s in CompanySize]),
+    ]
+
+    spec = {
+        "values": [("A1", [["CRM Data Schema Reference"]])],
+        "formats": [("A1", {"textFormat": {"bold": True, "fontSize": 14}})],
+    }
+    row = 3
+    for title, header, rows in sections:
+        spec["values"].append((f"A{row}", [[title], header] + rows))
+        spec["formats"] += [(f"A{row}", SCHEMA_SECTION), (f"A{row + 1}:B{row + 1}", SCHEMA_HEADER)]
+        row += len(rows) + 3  # title, header, rows, one blank line
+    return spec
+
+
+def spec_grid(spec: Dict[str, Any], width: int = 3) -> List[list]:
+    """A spec's values laid out as one dense block from A1 (for a single values write)."""
+    grid: List[list] = []
+    for anchor, rows in spec.get("values", []):
+        row, col = a1_to_rowcol(anchor)
+        for offset, values in enumerate(rows):
+            while len(grid) < row + offset:
+                grid.append([""] * width)
+            target = grid[row + offset - 1]
+            target[col - 1:col - 1 + len(values)] = values
+    return [(r + [""] * width)[:width] for r in grid]
+
+
+WORKSHEET_SPECS = {
+    "Leads": leads_spec,
+    "Opportunities": opportunities_spec,
+    "Activities": activities_spec,
+    "Summary": summary_spec,
+    "_Schema": schema_spec,
+}
+
+
+# =============================================================================
+# Spec -> batchUpdate requests
+# =============================================================================
+
+def _cell(value: Any) -> Dict[str, Any]:
+    if isinstance(value, str) and value.startswith("="):
+        return {"userEnteredValue": {"formulaValue": value}}
+    if isinstance(value, bool):
+        return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": "" if value is None else str(value)}}
+
+
+def compile_spec(spec: Dict[str, Any], sheet_id: int) -> List[Dict[str, Any]]:
+    """Requests that fill an (empty) worksheet according to `spec`."""
+    requests: List[Dict[str, Any]] = []
+
+    for anchor, rows in spec.get("values", []):
+        row, col = a1_to_rowcol(anchor)
+        requests.append({"updateCells": {
+            "start": {"sheetId": sheet_id, "rowIndex": row - 1, "columnIndex": col - 1},
+            "rows": [{"values": [_cell(v) for v in values]} for values in rows],
+            "fields": "userEnteredValue",
+        }})
+
+    for range_name, fmt in spec.get("formats", []):
+        requests.append({"repeatCell": {
+            "range": a1_range_to_grid_range(range_name, sheet_id),
+            "cell": {"userEnteredFormat": fmt},
+            "fields": f"userEnteredFormat({','.join(fmt)})",
+        }})
+
+    if spec.get("basic_filter"):
+        requests.append({"setBasicFilter": {"filter": {"range": {"sheetId": sheet_id}}}})
+
+    for range_name, values in spec.get("validations", []):
+        requests.append({"setDataValidation": {
+            "range": a1_range_to_grid_range(range_name, sheet_id),
+            "rule": {
+                "condition": {"type": "ONE_OF_LIST", "values": [{"userEnteredValue": v} for v in values]},
+                "showCustomUi": True,
+                "strict": False,  # unrecognized values are flagged, not rejected
+            },
+        }})
+    return requests
+
+
+def _sheet_properties(title: str, spec: Dict[str, Any], sheet_id: int) -> Dict[str, Any]:
+    return {
+        "sheetId": sheet_id,
+        "title": title,
+        "gridProperties": {
+            "rowCount": spec.get("rows", DEFAULT_ROWS),
+            "columnCount": spec.get("cols", DEFAULT_COLS),
+            "frozenRowCount": spec.get("freeze_rows", 0),
+        },
+    }
+
+
+def _new_sheet_id(taken: set) -> int:
+    while True:
+        sheet_id = random.randint(1, 2**31 - 1)
+        if sheet_id not in taken:
+            taken.add(sheet_id)
+            return sheet_id
+
 
 class CRMTemplates:
     """Handles creation and setup of CRM sheets."""
@@ -16,6 +281,11 @@ class CRMTemplates:
     def __init__(self, gc: gspread.Client):
         self.gc = gc
 
+    def _spec(self, sh: gspread.Spreadsheet, name: str) -> Dict[str, Any]:
+        if name == "Summary":
+            return summary_spec(sh.title)
+        return WORKSHEET_SPECS[name]()
+
     def create_crm_sheet(self, name: str = "Sales Pipeline 2026") -> gspread.Spreadsheet:
         """Create a new CRM spreadsheet with all required worksheets."""
         console.print(f"[bold blue]Creating CRM: {name}[/bold blue]")
@@ -24,254 +294,80 @@ class CRMTemplates:
         sh = self.gc.create(name)
         console.print(f"[green]✓ Created spreadsheet: {sh.url}[/green]")
 
-        # Create worksheets using ensure_worksheet to prevent duplicates
-        # The default sheet (sheet1) is renamed to "Leads" and then set up.
-        # Subsequent calls to ensure_worksheet will create new sheets if they don't exist.
-        leads_ws = sh.sheet1
-        leads_ws.update_title("Leads")
-        self.setup_leads_sheet(leads_ws)
-        console.print("[green]✓ Set up Leads worksheet[/green]")
-        time.sleep(1.5)  # Rate limit safety
-        
-        self.ensure_worksheet(sh, "Opportunities")
-        console.print("[green]✓ Set up Opportunities worksheet[/green]")
-        time.sleep(1.5)
-        
-        self.ensure_worksheet(sh, "Activities")
-        console.print("[green]✓ Set up Activities worksheet[/green]")
-        time.sleep(1.5)
-        
-        self.ensure_worksheet(sh, "Summary")
-        console.print("[green]✓ Set up Summary dashboard[/green]")
-        
-        self.ensure_worksheet(sh, "_Schema")
-        console.print("[green]✓ Set up Schema reference[/green]")
+        # The default sheet becomes "Leads"; every other worksheet is added,
+        # and all of them are filled, in a single batch update.
+        default_ws = sh.sheet1
+        taken = {default_ws.id}
+        leads = self._spec(sh, "Leads")
+        requests = [{"updateSheetProperties": {
+            "properties": _sheet_properties("Leads", leads, default_ws.id),
+            "fields": "title,gridProperties(rowCount,columnCount,frozenRowCount)",
+        }}] + compile_spec(leads, default_ws.id)
+        for title in WORKSHEET_SPECS:
+            if title == "Leads":
+                continue
+            spec = self._spec(sh, title)
+            sheet_id = _new_sheet_id(taken)
+            requests.append({"addSheet": {"properties": _sheet_properties(title, spec, sheet_id)}})
+            requests += compile_spec(spec, sheet_id)
+        sh.batch_update({"requests": requests})
+        console.print(f"[green]✓ Set up {', '.join(WORKSHEET_SPECS)} worksheets[/green]")
 
         console.print(f"\n[bold green]CRM ready! Open: {sh.url}[/bold green]")
         return sh
 
-    def ensure_worksheet(self, sh: gspread.Spreadsheet, name: str) -> gspread.Worksheet:
-        """Ensure a worksheet exists, creating and setting it up if not."""
+    def ensure_worksheet(self, sh: gspread.Spreadsheet, name: str,
+                         spec: Optional[Dict[str, Any]] = None) -> gspread.Worksheet:
+        """
+        Ensure a worksheet exists, creating and setting it up (in one batch update) if not.
+        `spec` lays out a worksheet that isn't one of the standard ones (e.g. an archive).
+        """
         try:
             return sh.worksheet(name)
         except gspread.exceptions.WorksheetNotFound:
             console.print(f"[yellow]Worksheet '{name}' missing. Creating...[/yellow]")
-            ws = sh.add_worksheet(title=name, rows=1000, cols=20)
-            
-            if name == "Leads":
-                self.setup_leads_sheet(ws)
-            elif name == "Opportunities":
-                self.setup_opportunities_sheet(ws)
-            elif name == "Activities":
-                self.setup_activities_sheet(ws)
-            elif name == "Summary":
-                self.setup_summary_sheet(ws)
-            elif name == "_Schema":
-                self.setup_schema_sheet(ws)
-            
-            return ws
+            if spec is None:
+                spec = self._spec(sh, name) if name in WORKSHEET_SPECS else {}
+            sheet_id = _new_sheet_id(set())
+            requests = [{"addSheet": {"properties": _sheet_properties(name, spec, sheet_id)}}]
+            requests += compile_spec(spec, sheet_id)
+            response = sh.batch_update({"requests": requests})
+            properties = response["replies"][0]["addSheet"]["properties"]
+            return gspread.Worksheet(sh, properties, sh.id, sh.client)
+
+    def apply_spec(self, ws: gspread.Worksheet, spec: Dict[str, Any]):
+        """Fill an existing worksheet from a spec in one batch update."""
+        requests = []
+        if spec.get("freeze_rows"):
+            requests.append({"updateSheetProperties": {
+                "properties": {"sheetId": ws.id, "gridProperties": {"frozenRowCount": spec["freeze_rows"]}},
+                "fields": "gridProperties.frozenRowCount",
+            }})
+        requests += compile_spec(spec, ws.id)
+        ws.spreadsheet.batch_update({"requests": requests})
 
     def setup_leads_sheet(self, ws: gspread.Worksheet):
         """Set up the Leads worksheet with headers and formatting."""
-        headers = Lead.headers()
-        ws.append_row(headers)
-
-        # Bold headers
-        ws.format("A1:Q1", {
-            "textFormat": {"bold": True},
-            "backgroundColor": {"red": 0.2, "green": 0.2, "blue": 0.3}
-        })
-
-        # Freeze header row
-        ws.freeze(rows=1)
-
-        # Set column widths
-        ws.set_basic_filter()
-
-        # Add data validation for status column (F)
-        status_values = [s.value for s in LeadStatus]
-        self._add_dropdown_validation(ws, "F2:F1000", status_values)
-
-        # Add data validation for source column (G)
-        source_values = [s.value for s in LeadSource]
-        self._add_dropdown_validation(ws, "G2:G1000", source_values)
-
-        # Add data validation for company size column (I)
-        size_values = [s.value for s in CompanySize]
-        self._add_dropdown_validation(ws, "I2:I1000", size_values)
+        self.apply_spec(ws, leads_spec())
 
     def setup_opportunities_sheet(self, ws: gspread.Worksheet):
         """Set up the Opportunities worksheet."""
-        headers = Opportunity.headers()
-        ws.append_row(headers)
-
-        ws.format("A1:N1", {
-            "textFormat": {"bold": True},
-            "backgroundColor": {"red": 0.2, "green": 0.3, "blue": 0.2}
-        })
-
-        ws.freeze(rows=1)
-        ws.set_basic_filter()
-
-        # Data validation for stage column (D)
-        stage_values = [s.value for s in PipelineStage]
-        self._add_dropdown_validation(ws, "D2:D1000", stage_values)
-
-        # Currency format for value column (E)
-        ws.format("E2:E1000", {"numberFormat": {"type": "CURRENCY", "pattern": "$#,##0.00"}})
-
-        # Percentage format for probability column (F)
-        ws.format("F2:F1000", {"numberFormat": {"type": "NUMBER", "pattern": "0%"}})
-
-        # Expected value formula in column G
-        # Note: We'll set this as a formula that auto-calculates
-        ws.format("G2:G1000", {"numberFormat": {"type": "CURRENCY", "pattern": "$#,##0.00"}})
+        self.apply_spec(ws, opportunities_spec())
 
     def setup_activities_sheet(self, ws: gspread.Worksheet):
         """Set up the Activities worksheet."""
-        headers = Activity.headers()
-        ws.append_row(headers)
-
-        ws.format("A1:H1", {
-            "textFormat": {"bold": True},
-            "backgroundColor": {"red": 0.3, "green": 0.2, "blue": 0.2}
-        })
+        self.apply_spec(ws, activities_spec())
 
-        ws.freeze(rows=1)
-        ws.set_basic_filter()
-
-    def setup_summary_sheet(self, ws: gspread.Worksheet):
-        """Set up the Summary/Dashboard worksheet with aggregate formulas."""
+    def setup_summary_sheet(self, ws: gspread.Worksheet, opp_sheets: Sequence[str] = ("Opportunities",)):
+        """Set up the Summary/Dashboard worksheet with aggregate formulas over `opp_sheets`."""
         try:
-            # Header
-            ws.update_acell("A1", "Sales Pipeline 2026 - Dashboard")
-            ws.format("A1", {"textFormat": {"bold": True, "fontSize": 16}})
-
-            # Key Metrics
-            ws.update_acell("A3", "Key Metrics")
-            ws.format("A3", {"textFormat": {"bold": True, "fontSize": 12}})
-
-            metrics = [
-                ("Total Leads", '=COUNTA(Leads!A:A)-1'),
-                ("Total Opportunities", '=COUNTA(Opportunities!A:A)-1'),
-                ("Pipeline Value", '=SUMIF(Opportunities!D:D,"<>Closed Lost",Opportunities!E:E)'),
-                ("Closed Won Value", '=SUMIF(Opportunities!D:D,"Closed Won",Opportunities!E:E)'),
-                ("Cash in Bank", '=SUMIF(Opportunities!D:D,"Cash in Bank",Opportunities!E:E)'),
-            ]
-
-            row = 4
-            for label, formula in metrics:
-                ws.update_acell(f"A{row}", label)
-                ws.update_acell(f"B{row}", formula)
-                row += 1
-
-            # Format value cells
-            ws.format("B6:B8", {"numberFormat": {"type": "CURRENCY", "pattern": "$#,##0"}})
-
-            # Pipeline by Stage
-            ws.update_acell("A10", "Pipeline by Stage")
-            ws.format("A10", {"textFormat": {"bold": True, "fontSize": 12}})
-
-            ws.update_acell("A11", "Stage")
-            ws.update_acell("B11", "Count")
-            ws.update_acell("C11", "Value")
-            ws.format("A11:C11", {"textFormat": {"bold": True}})
-
-            row = 12
-            for stage in PipelineStage:
-                ws.update_acell(f"A{row}", stage.value)
-                ws.update_acell(f"B{row}", f'=COUNTIF(Opportunities!D:D,"{stage.value}")')
-                ws.update_acell(f"C{row}", f'=SUMIF(Opportunities!D:D,"{stage.value}",Opportunities!E:E)')
-                row += 1
-
-            ws.format(f"C12:C{row-1}", {"numberFormat": {"type": "CURRENCY", "pattern": "$#,##0"}})
-
-            # Leads by Status
-            ws.update_acell("A22", "Leads by Status")
-            ws.format("A22", {"textFormat": {"bold": True, "fontSize": 12}})
-
-            row = 23
-            for status in LeadStatus:
-                ws.update_acell(f"A{row}", status.value)
-                ws.update_acell(f"B{row}", f'=COUNTIF(Leads!F:F,"{status.value}")')
-                row += 1
+            self.apply_spec(ws, summary_spec(ws.spreadsheet.title, opp_sheets=opp_sheets))
         except Exception as e:
             console.print(f"[yellow]Warning: Could not fully set up Summary sheet: {e}[/yellow]")
-            row += 1
 
     def setup_schema_sheet(self, ws: gspread.Worksheet):
         """Set up the Schema reference worksheet."""
         try:
-            # Title
-            ws.update_acell("A1", "CRM Data Schema Reference")
-            ws.format("A1", {"textFormat": {"bold": True, "fontSize": 14}})
-            
-            # --- 1. Pipeline Stages ---
-            ws.update_acell("A3", "Pipeline Stages (Opportunities)")
-            ws.format("A3", {"textFormat": {"bold": True, "fontSize": 11, "foregroundColor": {"red": 0.2, "green": 0.4, "blue": 0.8}}})
-            ws.update("A4:B4", [["Stage Name", "Description"]])
-            ws.format("A4:B4", {"textFormat": {"bold": True}, "backgroundColor": {"red": 0.9, "green": 0.9, "blue": 0.9}})
-            
-            stages = [
-                ("Prospecting", "Initial research and outreach"),
-                ("Discovery", "First meeting/call to understand needs"),
-                ("Proposal", "Sent proposal or quote"),
-                ("Negotiation", "Discussing terms and pricing"),
-                ("Closed Won", "Contract signed"),
-                ("Closed Lost", "Deal lost (competitor, budget, etc.)"),
-                ("Delivery", "Product/Service delivered"),
-                ("Invoicing", "Invoice sent"),
-                ("Cash in Bank", "Payment received"),
-                ("Unknown", "Fallback for unrecognized stages"),
-            ]
-            ws.update(f"A5:B{4+len(stages)}", stages)
-            
-            # --- 2. Lead Statuses ---
-            start_row = 6 + len(stages)
-            ws.update_acell(f"A{start_row}", "Lead Statuses")
-            ws.format(f"A{start_row}", {"textFormat": {"bold": True, "fontSize": 11, "foregroundColor": {"red": 0.2, "green": 0.4, "blue": 0.8}}})
-            ws.update(f"A{start_row+1}:B{start_row+1}", [["Status", "Description"]])
-            ws.format(f"A{start_row+1}:B{start_row+1}", {"textFormat": {"bold": True}, "backgroundColor": {"red": 0.9, "green": 0.9, "blue": 0.9}})
-            
-            statuses = [
-                ("New", "Just added, no action yet"),
-                ("Contacted", "Outreach attempted or conversation started"),
-                ("Qualified", "Good fit, potential opportunity"),
-                ("Unqualified", "Not a fit"),
-                ("Lost", "No longer pursuing"),
-                ("Unknown", "Fallback for unrecognized statuses"),
-            ]
-            ws.update(f"A{start_row+2}:B{start_row+1+len(statuses)}", statuses)
-            
-            # --- 3. Lead Sources ---
-            start_row = start_row + len(statuses) + 3
-            ws.update_acell(f"A{start_row}", "Lead Sources")
-            ws.format(f"A{start_row}", {"textFormat": {"bold": True, "fontSize": 11, "foregroundColor": {"red": 0.2, "green": 0.4, "blue": 0.8}}})
-            ws.update(f"A{start_row+1}:B{start_row+1}", [["Source", "Description"]])
-            ws.format(f"A{start_row+1}:B{start_row+1}", {"textFormat": {"bold": True}, "backgroundColor": {"red": 0.9, "green": 0.9, "blue": 0.9}})
-            
-            sources = [[s.value, ""] for s in LeadSource]
-            ws.update(f"A{start_row+2}:B{start_row+1+len(sources)}", sources)
-
-            # --- 4. Company Sizes ---
-            start_row = start_row + len(sources) + 3
-            ws.update_acell(f"A{start_row}", "Company Sizes")
-            ws.format(f"A{start_row}", {"textFormat": {"bold": True, "fontSize": 11, "foregroundColor": {"red": 0.2, "green": 0.4, "blue": 0.8}}})
-            ws.update(f"A{start_row+1}:B{start_row+1}", [["Size Bucket", "Description"]])
-            ws.format(f"A{start_row+1}:B{start_row+1}", {"textFormat": {"bold": True}, "backgroundColor": {"red": 0.9, "green": 0.9, "blue": 0.9}})
-            
-            sizes = [[s.value, ""] for s in CompanySize]
-            ws.update(f"A{start_row+2}:B{start_row+1+len(sizes)}", sizes)
-            
-            # Auto-resize columns
-            # ws.columns_auto_resize(0, 1)
-            
+            self.apply_spec(ws, schema_spec())
         except Exception as e:
             console.print(f"[yellow]Warning: Could not fully populate Schema sheet: {e}[/yellow]")
-
-    def _add_dropdown_validation(self, ws: gspread.Worksheet, range_str: str, values: list):
-        """Add dropdown data validation to a range."""
-        # Note: gspread's data validation API is limited
-        # For full dropdown support, we'd use the Sheets API directly
-        # For now, we'll skip this as it requires batch updates
-        pass
@@ -0,0 +1,349 @@
+"""
+Win Model - a local logistic regression trained on our own closed deals.
+
+Each closed opportunity (won, including Delivery / Invoicing / Cash in Bank,
+vs Closed Lost) is one training example,
+described by its lead (company size, source, contact details), the lead's
+activity history up to the close, and the deal value. The fitted model turns
+the same features into a win probability for any lead or open deal, so
+scoring thousands of leads is a few array operations instead of LLM calls.
+
+Training uses Newton's method (IRLS) with L2 regularization on standardized
+features; with ~20 features it converges in a handful of iterations. The
+fitted weights are stored as a small JSON artifact per spreadsheet, under
+`WIN_MODEL_DIR`; a CRM without a model of its own falls back to the heuristic.
+"""
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import Lead, Opportunity, Activity, ActivityType, CompanySize, LeadSource, CLOSED_STAGES, WON_STAGES
+from .vector_scoring import count_per_key, HOT_THRESHOLD, WARM_THRESHOLD
+
+WIN_MODEL_DIR = os.getenv("WIN_MODEL_DIR", "data/models/win")
+# Single-file location used before models were kept per spreadsheet; still
+# read, but only for the spreadsheet it was trained on
+WIN_MODEL_PATH = os.getenv("WIN_MODEL_PATH", "data/models/win_model.json")
+MIN_TRAINING_DEALS = 20  # with fewer closed deals the model is mostly noise
+L2_PENALTY = 1.0
+MAX_ITERATIONS = 50
+HOLDOUT_FRACTION = 0.2
+
+SIZES = [s.value for s in CompanySize]
+SOURCES = [s.value for s in LeadSource]
+ACTIVITY_TYPES = [t.value for t in ActivityType]
+
+FEATURE_NAMES = (
+    [f"size={s}" for s in SIZES]
+    + [f"source={s}" for s in SOURCES]
+    + [f"log_activities={t}" for t in ACTIVITY_TYPES]
+    + ["has_email", "has_website", "log_value"]
+)
+
+
+# =============================================================================
+# Features
+# =============================================================================
+
+def _one_hot(values: Sequence[str], categories: List[str]) -> np.ndarray:
+    labels = np.asarray(values, dtype=str).reshape(-1, 1)
+    return (labels == np.asarray(categories, dtype=str)).astype(np.float64)
+
+
+def feature_matrix(
+    sizes: Sequence[str],
+    sources: Sequence[str],
+    has_email: Sequence[bool],
+    has_website: Sequence[bool],
+    activity_counts: np.ndarray,
+    values: Sequence[float],
+) -> np.ndarray:
+    """
+    One row of features per lead/deal. `activity_counts` is (n, len(ACTIVITY_TYPES)),
+    columns in ACTIVITY_TYPES order; `values` is the deal value, NaN if unknown
+    (e.g. a lead with no open deal), which the model treats as average.
+    """
+    return np.hstack([
+        _one_hot(sizes, SIZES),
+        _one_hot(sources, SOURCES),
+        np.log1p(np.asarray(activity_counts, dtype=np.float64).reshape(len(sizes), len(ACTIVITY_TYPES))),
+        np.asarray(has_email, dtype=np.float64).reshape(-1, 1),
+        np.asarray(has_website, dtype=np.float64).reshape(-1, 1),
+        np.log1p(np.maximum(np.asarray(values, dtype=np.float64), 0)).reshape(-1, 1),
+    ])
+
+
+def activity_type_counts(keys: Sequence[str], pairs: Sequence[Tuple[str, str]]) -> np.ndarray:
+    """(len(keys), len(ACTIVITY_TYPES)) counts from (key, activity type) pairs."""
+    columns = []
+    for activity_type in ACTIVITY_TYPES:
+        columns.append(count_per_key(keys, [key for key, t in pairs if t == activity_type]))
+    return np.stack(columns, axis=1) if len(keys) else np.zeros((0, len(ACTIVITY_TYPES)))
+
+
+def lead_features(leads: List[Lead], activities: List[Activity],
+                  values: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Features for leads, with `values` as lead_id -> deal value (e.g. their largest open deal)."""
+    values = values or {}
+    keys = [l.lead_id for l in leads]
+    return feature_matrix(
+        [l.company_size.value if l.company_size else "" for l in leads],
+        [l.source.value for l in leads],
+        [bool(l.contact_email) for l in leads],
+        [bool(l.website) for l in leads],
+        activity_type_counts(keys, [(a.lead_id, a.type.value) for a in activities]),
+        [values.get(k, np.nan) for k in keys],
+    )
+
+
+def open_deal_values(opps: List[Opportunity]) -> Dict[str, float]:
+    """lead_id -> value of the lead's largest deal that is still open."""
+    values: Dict[str, float] = {}
+    for opp in opps:
+        if opp.stage not in CLOSED_STAGES and opp.value > values.get(opp.lead_id, 0.0):
+            values[opp.lead_id] = opp.value
+    return values
+
+
+def deal_features(opps: List[Opportunity], leads: List[Lead], activities: List[Activity],
+                  as_of_close: bool = False) -> np.ndarray:
+    """
+    Features for deals: the deal's lead, the lead's activities and the deal value.
+    With `as_of_close`, only activities up to each deal's close count, so the
+    training data doesn't include what happened after the outcome was known.
+    """
+    by_id = {l.lead_id: l for l in leads}
+    pairs = []
+    by_lead: Dict[str, List[Activity]] = {}
+    for activity in activities:
+        by_lead.setdefault(activity.lead_id, []).append(activity)
+    keys = [str(i) for i in range(len(opps))]
+    for key, opp in zip(keys, opps):
+        cutoff = opp.closed_at if as_of_close else None
+        for activity in by_lead.get(opp.lead_id, []):
+            if cutoff is None or activity.date <= cutoff:
+                pairs.append((key, activity.type.value))
+    lead_of = [by_id.get(opp.lead_id) for opp in opps]
+    return feature_matrix(
+        [l.company_size.value if l and l.company_size else "" for l in lead_of],
+        [l.source.value if l else "" for l in lead_of],
+        [bool(l and l.contact_email) for l in lead_of],
+        [bool(l and l.website) for l in lead_of],
+        activity_type_counts(keys, pairs),
+        [opp.value for opp in opps],
+    )
+
+
+def training_data(leads: List[Lead], opps: List[Opportunity],
+                  activities: List[Activity]) -> Tuple[np.ndarray, np.ndarray]:
+    """(features, labels) from closed deals; label 1 = won (any post-win stage)."""
+    closed = [o for o in opps if o.stage in CLOSED_STAGES]
+    X = deal_features(closed, leads, activities, as_of_close=True)
+    y = np.array([o.stage in WON_STAGES for o in closed], dtype=np.float64)
+    return X, y
+
+
+# =============================================================================
+# Model
+# =============================================================================
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35, 35)))
+
+
+def _auc(y: np.ndarray, p: np.ndarray) -> Optional[float]:
+    """Area under the ROC curve (rank-based); None if only one class is present."""
+    positives, negatives = int(y.sum()), int(len(y) - y.sum())
+    if not positives or not negatives:
+        return None
+    order = np.argsort(p, kind="mergesort")
+    ranks = np.empty(len(p))
+    ranks[order] = np.arange(1, len(p) + 1)
+    # Average ranks of tied predictions
+    _, inverse, counts = np.unique(p, return_inverse=True, return_counts=True)
+    sums = np.bincount(inverse.reshape(-1), weights=ranks)
+    ranks = (sums / counts)[inverse.reshape(-1)]
+    return float((ranks[y == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+class WinModel:
+    """Logistic regression over FEATURE_NAMES; `predict_proba` gives P(win)."""
+
+    def __init__(self, weights: np.ndarray, bias: float, mean: np.ndarray, scale: np.ndarray,
+                 meta: Optional[Dict[str, Any]] = None):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.meta = meta or {}
+
+    @property
+    def version(self) -> str:
+        return self.meta.get("trained_at", "untrained")
+
+    @classmethod
+    def fit(cls, X: np.ndarray, y: np.ndarray, l2: float = L2_PENALTY) -> "WinModel":
+        mean = np.nanmean(X, axis=0)
+        scale = np.nanstd(X, axis=0)
+        scale[~(scale > 0)] = 1.0
+        mean = np.nan_to_num(mean)
+        Z = np.hstack([np.ones((len(X), 1)), cls._standardize(X, mean, scale)])
+        penalty = np.full(Z.shape[1], l2)
+        penalty[0] = 0.0  # don't shrink the intercept
+
+        w = np.zeros(Z.shape[1])
+        for _ in range(MAX_ITERATIONS):
+            p = _sigmoid(Z @ w)
+            gradient = Z.T @ (p - y) + penalty * w
+            hessian = (Z * (p * (1 - p))[:, None]).T @ Z + np.diag(penalty)
+            step = np.linalg.solve(hessian + 1e-9 * np.eye(len(w)), gradient)
+            w -= step
+            if np.abs(step).max() < 1e-6:
+                break
+        return cls(w[1:], w[0], mean, scale)
+
+    @staticmethod
+    def _standardize(X: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+        """Scale features; unknown (NaN) values become the training average."""
+        return np.nan_to_num((X - mean) / scale)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        if len(X) == 0:
+            return np.zeros(0)
+        return _sigmoid(self._standardize(X, self.mean, self.scale) @ self.weights + self.bias)
+
+    def scores(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Lead scores (0-100) and heat levels, on the same scale as the heuristic."""
+        scores = np.rint(self.predict_proba(X) * 100).astype(np.int32)
+        heat = np.where(scores >= HOT_THRESHOLD, "Hot", np.where(scores >= WARM_THRESHOLD, "Warm", "Cold"))
+        return scores, heat
+
+    def top_factors(self, x: np.ndarray, n: int = 3) -> List[Tuple[str, float]]:
+        """The features pushing one prediction up or down the most."""
+        contributions = self._standardize(x, self.mean, self.scale) * self.weights
+        order = np.argsort(-np.abs(contributions))[:n]
+        return [(FEATURE_NAMES[i], round(float(contributions[i]), 3)) for i in order if contributions[i]]
+
+    # -------------------------------------------------------------------------
+    # Artifacts
+    # -------------------------------------------------------------------------
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "features": FEATURE_NAMES,
+                "weights": self.weights.tolist(),
+                "bias": self.bias,
+                "mean": self.mean.tolist(),
+                "scale": self.scale.tolist(),
+                "meta": self.meta,
+            }, f, indent=2)
+        os.replace(tmp, path)  # readers never see a half-written model
+
+    @classmethod
+    def load(cls, path: str) -> "WinModel":
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("features") != FEATURE_NAMES:
+            raise ValueError("Model was trained on different features; run `crm train-model` again")
+        return cls(data["weights"], data["bias"], data["mean"], data["scale"], data.get("meta"))
+
+
+def train(leads: List[Lead], opps: List[Opportunity], activities: List[Activity],
+          path: Optional[str] = None, sheet: str = "") -> WinModel:
+    """
+    Fit the model on closed deals, report holdout quality, and save it.
+    The holdout split is only for the metrics; the saved model uses every deal.
+    """
+    X, y = training_data(leads, opps, activities)
+    won = int(y.sum())
+    if len(y) < MIN_TRAINING_DEALS or won == 0 or won == len(y):
+        raise ValueError(
+            f"Need at least {MIN_TRAINING_DEALS} closed deals with both wins and losses "
+            f"(have {len(y)}: {won} won, {len(y) - won} lost)"
+        )
+
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(y))
+    n_test = max(1, int(len(y) * HOLDOUT_FRACTION))
+    test, fit_idx = order[:n_test], order[n_test:]
+    holdout = WinModel.fit(X[fit_idx], y[fit_idx])
+    p_test = holdout.predict_proba(X[test])
+    auc = _auc(y[test], p_test)
+
+    model = WinModel.fit(X, y)
+    p_all = model.predict_proba(X)
+    eps = 1e-12
+    model.meta = {
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "sheet": sheet,
+        "deals": len(y),
+        "won": won,
+        "lost": len(y) - won,
+        "train_accuracy": round(float(((p_all >= 0.5) == y).mean()), 3),
+        "train_log_loss": round(float(-np.mean(y * np.log(p_all + eps) + (1 - y) * np.log(1 - p_all + eps))), 4),
+        "holdout_deals": int(n_test),
+        "holdout_accuracy": round(float(((p_test >= 0.5) == y[test]).mean()), 3),
+        "holdout_auc": None if auc is None else round(auc, 3),
+    }
+    if path:
+        model.save(path)
+        print(f"[WinModel] Trained on {len(y)} deals ({won} won), saved to {path}")
+    return model
+
+
+class WinModelStore:
+    """
+    One model per spreadsheet, loaded lazily and reloaded when its file changes.
+    A tenant never gets a model trained on another tenant's deals.
+    """
+
+    def __init__(self, directory: str = WIN_MODEL_DIR, legacy_path: Optional[str] = WIN_MODEL_PATH):
+        self.directory = directory
+        self.legacy_path = legacy_path
+        self._lock = threading.Lock()
+        self._models: Dict[str, Tuple[float, Optional[WinModel]]] = {}  # path -> (mtime, model)
+
+    def path_for(self, sheet: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^\w.-]", "_", sheet) + ".json")
+
+    def get(self, sheet: str) -> Optional[WinModel]:
+        """The spreadsheet's model, or None if it has none (or it can't be read)."""
+        if not sheet:
+            return None
+        model = self._load(self.path_for(sheet))
+        if model is None and self.legacy_path:
+            legacy = self._load(self.legacy_path)
+            if legacy is not None and legacy.meta.get("sheet") == sheet:
+                model = legacy
+        return model
+
+    def _load(self, path: str) -> Optional[WinModel]:
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._models.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            try:
+                model = WinModel.load(path)
+                print(f"[WinModel] Loaded {path} (trained {model.version})")
+            except Exception as e:
+                print(f"[WinModel] Could not load {path}: {e}")
+                model = None
+            self._models[path] = (mtime, model)
+            return model
+
+
+win_model_store = WinModelStore()
@@ -0,0 +1,57 @@
+"""
+Google client factory - builds the gspread clients the API and CLI use.
+
+- GOOGLE_API_BASE_URL: send Sheets/Drive calls to another base URL (e.g. the
+  fake server from `crm-fake-google`) instead of Google.
+- GOOGLE_CASSETTE_RECORD / GOOGLE_CASSETTE_REPLAY: record traffic to, or
+  replay it from, a cassette (see services/cassettes). A cassette holds one
+  recording, whoever asks, so replay is refused for per-user API sessions.
+"""
+import os
+
+import gspread
+from google.auth.transport.requests import AuthorizedSession
+
+# When set, Sheets/Drive calls go to this base URL instead of Google
+GOOGLE_API_BASE_URL = os.getenv("GOOGLE_API_BASE_URL")
+
+GOOGLE_HOSTS = ("https://sheets.googleapis.com", "https://www.googleapis.com", "https://oauth2.googleapis.com")
+
+
+class RedirectedSession(AuthorizedSession):
+    """AuthorizedSession sending Google API requests to another base URL."""
+
+    def __init__(self, credentials, base_url: str):
+        super().__init__(credentials)
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, url, *args, **kwargs):
+        for host in GOOGLE_HOSTS:
+            if url.startswith(host):
+                url = self.base_url + url[len(host):]
+                break
+        return super().request(method, url, *args, **kwargs)
+
+
+def authorize(credentials, allow_replay: bool = True) -> gspread.Client:
+    """
+    gspread.authorize, pointed at GOOGLE_API_BASE_URL when that is set, and
+    recording to or replaying from a cassette when configured.
+    Pass `allow_replay=False` for clients built from a user's own token.
+    """
+    from .services import cassettes
+
+    if cassettes.CASSETTE_REPLAY:
+        if not allow_replay:
+            raise RuntimeError(
+                "GOOGLE_CASSETTE_REPLAY is set; refusing to serve a recorded cassette to a user session"
+            )
+        print(f"[GoogleClient] Replaying {cassettes.CASSETTE_REPLAY} instead of calling Google")
+        return cassettes.replay_client(cassettes.CASSETTE_REPLAY)
+    if GOOGLE_API_BASE_URL:
+        session = RedirectedSession(credentials, GOOGLE_API_BASE_URL)
+    else:
+        session = AuthorizedSession(credentials)
+    if cassettes.CASSETTE_RECORD:
+        session = cassettes.RecordingSession(session, cassettes.writer_for(cassettes.CASSETTE_RECORD))
+    return gspread.Client(credentials, session=session)
@@ -1,11 +1,9 @@
+import json
 import typer
 from rich.console import Console
 
 from .auth import authenticate
 from .sheets import SheetManager
-from .drive import DriveManager
-from .docs import DocsManager
-from .workflows import WorkflowManager
 
 app = typer.Typer()
 console = Console()
@@ -34,6 +32,7 @@ def login(profile: str = typer.Option("default", help="Profile name (e.g., perso
 @app.command()
 def whoami(profile: str = typer.Option("default", help="Profile name")):
     """Shows the currently logged in email for the profile."""
+    from .drive import DriveManager
     try:
         _, creds = authenticate(profile)
         if creds and hasattr(creds, 'id_token') and creds.id_token:
@@ -74,6 +73,7 @@ def read_data(sheet: str, profile: str = typer.Option("default", help="Profile n
 @app.command()
 def read_doc(doc_id: str, profile: str = typer.Option("default", help="Profile name")):
     """Reads a Google Doc and prints content."""
+    from .docs import DocsManager
     try:
         _, creds = authenticate(profile)
         manager = DocsManager(creds)
@@ -86,6 +86,7 @@ def read_doc(doc_id: str, profile: str = typer.Option("default", help="Profile n
 @app.command()
 def list_files(query: str = typer.Option(None, help="Search query"), profile: str = typer.Option("default", help="Profile name")):
     """Lists files in Google Drive."""
+    from .drive import DriveManager
     try:
         _, creds = authenticate(profile)
         manager = DriveManager(creds)
@@ -96,6 +97,7 @@ def list_files(query: str = typer.Option(None, help="Search query"), profile: st
 @app.command()
 def create_project(name: str, profile: str = typer.Option("default", help="Profile name")):
     """Workflow: Creates a new project workspace (Sheet + Folder)."""
+    from .workflows import WorkflowManager
     try:
         gc, creds = authenticate(profile)
         workflow = WorkflowManager(gc, creds)
@@ -129,6 +131,18 @@ def append_row(sheet: str, values: str = typer.Argument(..., help="Comma separat
 # CRM Commands
 # =============================================================================
 
+def _read_session(sheet: str, profile: str, offline: bool):
+    """CRMManager for read commands: saves snapshots online, reads only snapshots offline."""
+    from .crm.manager import CRMManager
+    from .crm.snapshots import snapshot_store, default_store
+
+    if offline:
+        console.print("[dim]Offline: showing the last saved snapshot[/dim]")
+        return CRMManager(None, sheet, snapshots=snapshot_store, offline=True)
+    gc, _ = authenticate(profile)
+    return CRMManager(SheetManager(gc), sheet, snapshots=default_store(default=True), warm_start=False)
+
+
 @app.command()
 def crm_init(name: str = typer.Option("Sales Pipeline 2026", help="CRM sheet name"), profile: str = typer.Option("default", help="Profile name")):
     """Initialize a new CRM spreadsheet with all required worksheets."""
@@ -203,14 +217,14 @@ def crm_add_opp(
 def crm_list(
     what: str = typer.Argument("leads", help="What to list: leads, opps, activities"),
     sheet: str = typer.Option("Sales Pipeline 2026", help="CRM sheet name"),
-    profile: str = typer.Option("default", help="Profile name")
+    profile: str = typer.Option("default", help="Profile name"),
+    offline: bool = typer.Option(False, "--offline", help="Read the on-disk snapshot instead of Google Sheets"),
+    archived: bool = typer.Option(False, "--archived", help="Include opps/activities moved to archive worksheets"),
 ):
     """List CRM data (leads, opps, or activities)."""
-    from .crm.manager import CRMManager
     from rich.table import Table
     try:
-        gc, _ = authenticate(profile)
-        crm = CRMManager(SheetManager(gc), sheet)
+        crm = _read_session(sheet, profile, offline)
 
         if what == "leads":
             leads = crm.get_leads()
@@ -225,7 +239,7 @@ def crm_list(
             console.print(table)
 
         elif what == "opps":
-            opps = crm.get_opportunities()
+            opps = crm.get_opportunities(include_archived=archived)
             table = Table(title="Opportunities")
             table.add_column("ID", style="dim")
             table.add_column("Title", style="bold")
@@ -237,7 +251,7 @@ def crm_list(
             console.print(table)
 
         elif what == "activities":
-            activities = crm.get_activities()
+            activities = crm.get_activities(include_archived=archived)
             table = Table(title="Activities")
             table.add_column("ID", style="dim")
             table.add_column("Type")
@@ -251,15 +265,331 @@ def crm_list(
 
 
 @app.command()
-def crm_pipeline(
+def crm_enrich_bulk(
     sheet: str = typer.Option("Sales Pipeline 2026", help="CRM sheet name"),
+    search_concurrency: int = typer.Option(4, help="Parallel web searches"),
+    extract_concurrency: int = typer.Option(4, help="Parallel LLM extractions"),
+    batch_size: int = typer.Option(50, help="Leads written back per sheet request"),
+    retry_failed: bool = typer.Option(True, help="Also retry leads whose enrichment failed before"),
     profile: str = typer.Option("default", help="Profile name")
 ):
-    """Show pipeline summary."""
+    """Enrich every lead that isn't enriched yet. Safe to interrupt and re-run."""
+    from rich.progress import Progress
     from .crm.manager import CRMManager
+    from .crm.bulk_enrichment import BulkEnrichmentPipeline
     try:
         gc, _ = authenticate(profile)
         crm = CRMManager(SheetManager(gc), sheet)
+
+        with Progress(console=console) as progress:
+            task = progress.add_task("Enriching leads", total=None)
+
+            def on_progress(p):
+                progress.update(task, total=p["pending"], completed=p["completed"] + p["failed"])
+
+            pipeline = BulkEnrichmentPipeline(
+                crm,
+                search_concurrency=search_concurrency,
+                extract_concurrency=extract_concurrency,
+                batch_size=batch_size,
+                on_progress=on_progress,
+            )
+            try:
+                result = pipeline.run(retry_failed=retry_failed)
+            except KeyboardInterrupt:
+                console.print("[yellow]Interrupted. Batches already written are kept; run again to resume.[/yellow]")
+                raise typer.Exit(1)
+
+        console.print(
+            f"[green]✓ Enriched {result['completed']} leads[/green] "
+            f"({result['failed']} failed, {result['skipped']} already done, {result['elapsed']:.0f}s)"
+        )
+    except typer.Exit:
+        raise
+    except Exception as e:
+        console.print(f"[red]Error: {e}[/red]")
+
+
+@app.command()
+def crm_train_model(
+    sheet: str = typer.Option("Sales Pipeline 2026", help="CRM sheet name"),
+    output: str = typer.Option(None, help="Where to save the model (default: WIN_MODEL_DIR/<spreadsheet id>.json)"),
+    profile: str = typer.Option("default", help="Profile name")
+):
+    """Train the local win-probability model on closed deals (won vs Closed Lost)."""
+    from .crm.manager import CRMManager
+    from rich.table import Table
+    try:
+        gc, _ = authenticate(profile)
+        crm = CRMManager(SheetManager(gc), sheet)
+        metrics = crm.train_win_model(output)
+
+        table = Table(title="Win Model")
+        table.add_column("Metric", style="bold")
+        table.add_column("Value", justify="right")
+        for key in ("deals", "won", "lost", "train_accuracy", "train_log_loss",
+                    "holdout_deals", "holdout_accuracy", "holdout_auc"):
+            value = metrics.get(key)
+            table.add_row(key, "-" if value is None else str(value))
+        console.print(table)
+        console.print("[green]✓ Model saved. Lead scoring and deal risk now use it.[/green]")
+    except Exception as e:
+        console.print(f"[red]Error: {e}[/red]")
+
+
+@app.command()
+def crm_archive(
+    sheet: str = typer.Option("Sales Pipeline 2026", help="CRM sheet name"),
+    closed_after_days: int = typer.Option(None, help="Archive deals closed more than this many days ago (default: ARCHIVE_CLOSED_AFTER_DAYS)"),
+    activities_after_days: int = typer.Option(None, help="Archive activities older than this many days (default: ARCHIVE_ACTIVITIES_AFTER_DAYS)"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only show what would be moved"),
+    profile: str = typer.Option("default", help="Profile name")
+):
+    """Move long-closed deals and old activities into yearly archive worksheets."""
+    from .crm.manager import CRMManager, ARCHIVE_CLOSED_AFTER_DAYS, ARCHIVE_ACTIVITIES_AFTER_DAYS
+    from rich.table import Table
+    try:
+        gc, _ = authenticate(profile)
+        crm = CRMManager(SheetManager(gc), sheet)
+        result = crm.archive(
+            ARCHIVE_CLOSED_AFTER_DAYS if closed_after_days is None else closed_after_days,
+            ARCHIVE_ACTIVITIES_AFTER_DAYS if activities_after_days is None else activities_after_days,
+            dry_run=dry_run,
+        )
+
+        table = Table(title="Archive (dry run)" if dry_run else "Archive")
+        table.add_column("Worksheet", style="bold")
+        table.add_column("Rows", justify="right")
+        for name, rows in sorted(result["moved"].items()):
+            table.add_row(name, str(rows))
+        console.print(table)
+        verb = "Would move" if dry_run else "Moved"
+        console.print(f"[green]✓ {verb} {result['total']} rows in {result['elapsed_ms']:.0f}ms[/green]")
+    except Exception as e:
+        console.print(f"[red]Error: {e}[/red]")
+
+
+@app.command()
+def crm_bench(
+    sizes: str = typer.Option("1k,10k", help="Comma-separated dataset sizes: 1k, 10k, 100k, 1m"),
+    iterations: int = typer.Option(20, help="Timed runs per case (reduced automatically on large datasets)"),
+    cases: str = typer.Option(None, help="Comma-separated cases to run (default: all)"),
+    backend: str = typer.Option("mock", help="Data backend: mock (in memory) or fake (local fake Google API over HTTP)"),
+    latency_ms: float = typer.Option(0.0, help="Injected latency per Google request with --backend fake"),
+    cassette: str = typer.Option(None, help="Replay a recorded Google API cassette instead of a synthetic dataset (timings scaled by GOOGLE_CASSETTE_TIMING)"),
+    baseline: str = typer.Option(None, help="Baseline file (default: BENCH_BASELINE_PATH)"),
+    save_baseline: bool = typer.Option(False, "--save-baseline", help="Save this run as the new baseline"),
+    output: str = typer.Option(None, help="Also write the full report as JSON to this file"),
+):
+    """Benchmark decoding, pipeline summary, search, pipeline and write endpoints on synthetic data."""
+    from rich.table import Table
+    from .services import benchmark
+
+    baseline_path = baseline or benchmark.BASELINE_PATH
+    previous = benchmark.load_baseline(baseline_path)
+
+    def show(label, result):
+        deltas = benchmark.compare({"sizes": {label: result}}, previous).get(label, {}) if previous else {}
+        rows = ", ".join(f"{count:,} {ws.lower()}" for ws, count in result["rows"].items())
+        table = Table(title=f"{label}: {rows} (built in {result['build_seconds']}s, max RSS {result['max_rss_mb']} MB)")
+        table.add_column("Case", style="bold")
+        for column in ("Runs", "p50 ms", "p95 ms", "p99 ms", "Peak alloc MB", "vs baseline"):
+            table.add_column(column, justify="right")
+        for case, stats in result["cases"].items():
+            delta = deltas.get(case)
+            if delta is None:
+                change = "-"
+            else:
+                color = "red" if delta["regression"] else ("green" if delta["change"] < 0 else "white")
+                change = f"[{color}]{delta['change']:+.0%}[/{color}]"
+            table.add_row(case, str(stats["iterations"]), f"{stats['p50_ms']:.2f}", f"{stats['p95_ms']:.2f}",
+                          f"{stats['p99_ms']:.2f}", f"{stats['peak_alloc_mb']:.1f}", change)
+        console.print(table)
+        if result.get("google_requests"):
+            calls = ", ".join(f"{op} {n}" for op, n in sorted(result["google_requests"].items()))
+            console.print(f"[dim]Google API requests: {calls}[/dim]")
+
+    try:
+        report = benchmark.run(
+            sizes=[s.strip().lower() for s in sizes.split(",") if s.strip()],
+            iterations=iterations,
+            cases=[c.strip() for c in cases.split(",") if c.strip()] if cases else
+            (benchmark.READ_CASES if cassette else benchmark.CASES),
+            backend=backend,
+            latency_ms=latency_ms,
+            on_size=show,
+            cassette=cassette,
+        )
+    except Exception as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        console.print(f"[green]✓ Report written to {output}[/green]")
+    if save_baseline:
+        benchmark.save_baseline(report, baseline_path)
+        console.print(f"[green]✓ Baseline saved to {baseline_path}[/green]")
+    elif previous is None:
+        console.print(f"[dim]No baseline at {baseline_path}; run with --save-baseline to record one.[/dim]")
+    elif any(d["regression"] for size in benchmark.compare(report, previous).values() for d in size.values()):
+        console.print(f"[red]p50 regressions over {benchmark.REGRESSION_THRESHOLD:.0%} against the baseline.[/red]")
+        raise typer.Exit(1)
+
+
+@app.command()
+def crm_fake_google(
+    host: str = typer.Option("127.0.0.1", help="Interface to listen on"),
+    port: int = typer.Option(8765, help="Port to listen on"),
+    latency_ms: float = typer.Option(0.0, help="Latency added to every Sheets/Drive request"),
+    jitter_ms: float = typer.Option(0.0, help="Random +/- variation of the latency"),
+    read_quota: int = typer.Option(None, help="Read requests allowed per minute (default: unlimited)"),
+    write_quota: int = typer.Option(None, help="Write requests allowed per minute (default: unlimited)"),
+    seed: str = typer.Option(None, help="Seed spreadsheets from a MockSheetManager JSON file (e.g. data/mock_crm.json)"),
+    verbose: bool = typer.Option(False, help="Log every request"),
+):
+    """Run a local fake of the Google Sheets/Drive APIs with latency and quota injection."""
+    from .services.fake_google import FakeGoogle, FakeGoogleServer
+
+    fake = FakeGoogle(latency_ms=latency_ms, jitter_ms=jitter_ms, read_quota=read_quota, write_quota=write_quota)
+    if seed:
+        with open(seed) as f:
+            fake.load(json.load(f))
+    server = FakeGoogleServer(fake, host, port, verbose=verbose)
+    console.print(f"[bold green]Fake Google API on {server.url}[/bold green] "
+                  f"({len(fake.spreadsheets)} spreadsheets, latency {latency_ms}ms, "
+                  f"quotas read={read_quota or 'unlimited'}/min write={write_quota or 'unlimited'}/min)")
+    console.print("Point the API at it with:")
+    console.print(f"  export GOOGLE_API_BASE_URL={server.url}")
+    console.print(f"  export GOOGLE_TOKENINFO_URL={server.url}/tokeninfo")
+    console.print(f"[dim]Request accounting: GET {server.url}/_fake/stats[/dim]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        console.print(json.dumps(fake.stats(), indent=2))
+
+
+@app.command()
+def crm_loadtest(
+    users: int = typer.Option(20, help="Concurrent simulated dashboard users"),
+    duration: float = typer.Option(60.0, help="Seconds of load after calibration"),
+    ramp: float = typer.Option(10.0, help="Seconds over which users are started"),
+    think_ms: float = typer.Option(1000.0, help="Mean pause between a user's actions (exponentially distributed)"),
+    backend: str = typer.Option("mock", help="Data backend: mock (in memory) or fake (local fake Google API over HTTP)"),
+    size: str = typer.Option("10k", help="Dataset size: 1k, 10k, 100k, 1m"),
+    latency_ms: float = typer.Option(0.0, help="Injected latency per Google request with --backend fake"),
+    port: int = typer.Option(8099, help="Port for the API under test (the fake Google API uses port + 1)"),
+    url: str = typer.Option(None, help="Load an already running API instead of starting one"),
+    token: str = typer.Option("loadtest", help="Bearer token sent with --url"),
+    fake_url: str = typer.Option(None, help="Fake Google API behind --url, for request accounting"),
+    live_enrichment: bool = typer.Option(False, "--live-enrichment", help="Keep OPENAI/BRAVE keys so created leads are really enriched"),
+    max_error_rate: float = typer.Option(0.01, help="Fail if the error rate exceeds this"),
+    max_p95_ms: float = typer.Option(None, help="Fail if overall p95 latency exceeds this"),
+    output: str = typer.Option(None, help="Also write the full report as JSON to this file"),
+):
+    """Replay a realistic dashboard traffic mix with concurrent users and report latency, errors and Google calls."""
+    from rich.table import Table
+    from .services import loadtest
+
+    try:
+        report = loadtest.run(url=url, backend=backend, size=size.lower(), users=users, duration=duration,
+                              ramp=ramp, think_ms=think_ms, latency_ms=latency_ms, port=port,
+                              fake_url=fake_url, token=token, live_enrichment=live_enrichment)
+    except Exception as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+    title = f"{report['users']} users for {report['duration_s']}s against {report['url']}"
+    if report["backend"]:
+        title += f" ({report['backend']} backend, {report['size']} leads)"
+    table = Table(title=title)
+    table.add_column("Action", style="bold")
+    for column in ("Requests", "Req/s", "p50 ms", "p95 ms", "p99 ms", "Errors", "Google req/action"):
+        table.add_column(column, justify="right")
+    for action, stats in report["actions"].items():
+        google = report["google_requests_per_action"].get(action)
+        errors = f"[red]{stats['errors']}[/red]" if stats["errors"] else "0"
+        table.add_row(action, str(stats["requests"]), f"{stats['rps']:.1f}", f"{stats['p50_ms']:.1f}",
+                      f"{stats['p95_ms']:.1f}", f"{stats['p99_ms']:.1f}", errors,
+                      "-" if google is None else f"{google:g}")
+    console.print(table)
+    console.print(f"Throughput {report['throughput_rps']} req/s, p50 {report['p50_ms']}ms, p95 {report['p95_ms']}ms, "
+                  f"p99 {report['p99_ms']}ms, error rate {report['error_rate']:.2%}")
+    if "google_requests" in report:
+        console.print(f"Google API: {report['google_requests']} requests "
+                      f"({report['google_requests_per_request']} per user action), "
+                      f"{report['google_rate_limited']} rate limited")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        console.print(f"[green]✓ Report written to {output}[/green]")
+
+    failures = []
+    if report["error_rate"] > max_error_rate:
+        failures.append(f"error rate {report['error_rate']:.2%} > {max_error_rate:.2%}")
+    if max_p95_ms is not None and (report["p95_ms"] or 0) > max_p95_ms:
+        failures.append(f"p95 {report['p95_ms']}ms > {max_p95_ms}ms")
+    if failures:
+        console.print(f"[red]Load test failed: {'; '.join(failures)}[/red]")
+        raise typer.Exit(1)
+
+
+@app.command()
+def crm_startup(
+    targets: str = typer.Option("api,cli", help="Comma-separated targets: api (api.server), cli (src.main)"),
+    runs: int = typer.Option(3, help="Fresh-interpreter imports per target (median is reported)"),
+    top: int = typer.Option(15, help="Slowest imports to list per target"),
+    budget_api_ms: float = typer.Option(None, help="Import budget for the API (default: STARTUP_BUDGET_API_MS or 1200)"),
+    budget_cli_ms: float = typer.Option(None, help="Import budget for the CLI (default: STARTUP_BUDGET_CLI_MS or 500)"),
+    output: str = typer.Option(None, help="Also write the report as JSON to this file"),
+):
+    """Measure cold import time of the API and CLI against the startup budget."""
+    from rich.table import Table
+    from .services import startup
+
+    try:
+        report = startup.report([t.strip() for t in targets.split(",") if t.strip()], runs=runs, top=top,
+                                budgets={"api": budget_api_ms, "cli": budget_cli_ms})
+    except (KeyError, RuntimeError) as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+    for name, result in report["targets"].items():
+        color = "red" if result["over_budget"] else "green"
+        table = Table(title=f"{name}: import {result['module']} in [{color}]{result['import_ms']}ms[/{color}] "
+                            f"(budget {result['budget_ms']:g}ms, runs {result['runs_ms']})")
+        table.add_column("Module", style="bold")
+        table.add_column("Cumulative ms", justify="right")
+        table.add_column("Self ms", justify="right")
+        for row in result["slowest"]:
+            table.add_row(row["module"], f"{row['cumulative_ms']:.1f}", f"{row['self_ms']:.1f}")
+        console.print(table)
+        if result["deferred_loaded"]:
+            console.print(f"[red]{result['module']} imports {', '.join(result['deferred_loaded'])} at startup; "
+                          f"import them where they are first used.[/red]")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        console.print(f"[green]✓ Report written to {output}[/green]")
+    if not report["ok"]:
+        raise typer.Exit(1)
+
+
+@app.command()
+def crm_pipeline(
+    sheet: str = typer.Option("Sales Pipeline 2026", help="CRM sheet name"),
+    profile: str = typer.Option("default", help="Profile name"),
+    offline: bool = typer.Option(False, "--offline", help="Read the on-disk snapshot instead of Google Sheets"),
+):
+    """Show pipeline summary."""
+    try:
+        crm = _read_session(sheet, profile, offline)
         crm.print_pipeline()
     except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
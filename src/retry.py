@@ -8,6 +8,8 @@ import time
 from typing import Callable, Type, Tuple
 import gspread.exceptions
 
+from .services.metrics import GOOGLE_RATE_LIMITED
+
 
 class RateLimitError(Exception):
     """Custom exception for rate limiting with retry-after info."""
@@ -68,6 +70,7 @@ def retry_with_backoff(
                     # Only retry on rate limit errors
                     if not is_rate_limit_error(e):
                         raise
+                    GOOGLE_RATE_LIMITED.inc(func.__name__)
                     
                     if attempt == max_retries:
                         # Raise a custom RateLimitError on final failure
@@ -106,6 +109,7 @@ def retry_with_backoff(
                     
                     if not is_rate_limit_error(e):
                         raise
+                    GOOGLE_RATE_LIMITED.inc(func.__name__)
                     
                     if attempt == max_retries:
                         raise RateLimitError(
@@ -0,0 +1,326 @@
+"""
+Benchmarks - latency and memory of the CRM stack on synthetic datasets.
+
+Datasets come from the generators in `scripts/generate_dummy_data.py` and
+sit behind an in-memory `MockSheetManager`, so runs measure our own code
+(row decoding, aggregation, search, JSON encoding, the FastAPI stack)
+without Google Sheets latency. With `backend="fake"` they are served by the
+local fake Google API server instead, so `SheetManager`, gspread and HTTP
+are included (with optional injected latency). With `backend="cassette"`
+the data and timings come from a recorded cassette of real Google traffic
+(see cassettes) instead of the generators. API cases go end to end
+through FastAPI's test client with the session dependency pointed at that
+manager.
+
+Faker is slow, so at most POOL_SIZE distinct leads (with their opportunities
+and activities) are generated and then cloned under fresh IDs to reach the
+larger sizes.
+
+Each case reports p50/p95/p99 latency and the peak Python allocation of one
+extra run (measured with tracemalloc, outside the timed runs). Results can be
+saved as a baseline and later runs compared against it.
+"""
+import gc
+import importlib.util
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from ..crm.models import Lead, Opportunity, Activity
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_SIZES = ("1k", "10k")
+DEFAULT_ITERATIONS = 20
+MIN_ITERATIONS = 3  # large datasets run fewer iterations, never fewer than this
+POOL_SIZE = 2_000  # distinct generated leads; larger datasets clone them
+BASELINE_PATH = os.getenv("BENCH_BASELINE_PATH", "data/bench/baseline.json")
+REGRESSION_THRESHOLD = 0.2  # p50 this much slower than the baseline is flagged
+BENCH_SHEET = "Sales Pipeline 2026"
+BACKENDS = ("mock", "fake", "cassette")
+
+CASES = ("decode_leads", "pipeline_summary", "api_search", "api_pipeline",
+         "api_create_activity", "api_update_lead")
+# Cases that only read, so a cassette of read traffic can serve them
+READ_CASES = ("decode_leads", "pipeline_summary", "api_search", "api_pipeline")
+
+_GENERATOR_SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "scripts", "generate_dummy_data.py")
+
+
+def _generators():
+    """Load scripts/generate_dummy_data.py as a module (it needs Faker)."""
+    spec = importlib.util.spec_from_file_location("generate_dummy_data", _GENERATOR_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+    except ImportError as e:
+        raise RuntimeError(f"Benchmark datasets need the dummy data generators' dependencies ({e}); "
+                           f"pip install faker") from e
+    return module
+
+
+def build_dataset(size: int, seed: int = 0) -> Dict[str, List[list]]:
+    """Worksheet name -> rows (header first) for `size` leads."""
+    from ..crm.manager import LEADS_WS, OPPS_WS, ACTIVITIES_WS
+
+    gen = _generators()
+    random.seed(seed)
+    gen.fake.seed_instance(seed)
+
+    pool = min(size, POOL_SIZE)
+    leads = gen.generate_leads(pool)
+    opps = gen.generate_opportunities(leads)
+    activities = gen.generate_activities(leads, opps, count_per_entity=1)
+    lead_rows = [lead.to_row() for lead in leads]
+    opp_rows = [opp.to_row() for opp in opps]
+    activity_rows = [activity.to_row() for activity in activities]
+
+    # Sequential 8-hex-digit IDs: same shape as generate_id(), never colliding
+    ids = (f"{n:08x}" for n in itertools.count())
+    out_leads, out_opps, out_activities = [], [], []
+    for copy in range(math.ceil(size / pool)):
+        take = min(pool, size - copy * pool)
+        id_map: Dict[str, str] = {}
+        for row in lead_rows[:take]:
+            new = list(row)
+            new[0] = id_map[row[0]] = next(ids)
+            out_leads.append(new)
+        for row in opp_rows:
+            if row[1] in id_map:
+                new = list(row)
+                new[0] = id_map[row[0]] = next(ids)
+                new[1] = id_map[row[1]]
+                out_opps.append(new)
+        for row in activity_rows:
+            if row[1] in id_map:
+                new = list(row)
+                new[0] = next(ids)
+                new[1] = id_map[row[1]]
+                new[2] = id_map.get(row[2], "") if row[2] else ""
+                out_activities.append(new)
+
+    return {
+        LEADS_WS: [Lead.headers()] + out_leads,
+        OPPS_WS: [Opportunity.headers()] + out_opps,
+        ACTIVITIES_WS: [Activity.headers()] + out_activities,
+    }
+
+
+def _percentile(ordered: Sequence[float], q: float) -> float:
+    """Linear-interpolated percentile of an ascending sequence."""
+    if len(ordered) == 1:
+        return ordered[0]
+    pos = (len(ordered) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: int = 1) -> Dict[str, Any]:
+    """Time `iterations` calls of `fn` after `warmup`, then one traced call for memory."""
+    for _ in range(warmup):
+        fn()
+    gc.collect()
+    times = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(_percentile(times, 0.50), 3),
+        "p95_ms": round(_percentile(times, 0.95), 3),
+        "p99_ms": round(_percentile(times, 0.99), 3),
+        "mean_ms": round(sum(times) / len(times), 3),
+        "peak_alloc_mb": round(peak / 1e6, 2),
+    }
+
+
+def _max_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(rss / (1e6 if platform.system() == "Darwin" else 1e3), 1)
+
+
+def _check(response):
+    if response.status_code >= 300:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path} "
+                           f"returned {response.status_code}: {response.text[:200]}")
+    return response
+
+
+def run_size(label: str, iterations: int = DEFAULT_ITERATIONS,
+             cases: Sequence[str] = CASES, seed: int = 0,
+             backend: str = "mock", latency_ms: float = 0.0,
+             cassette: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build the `label` dataset and run the selected cases against it. With the
+    cassette backend `label` is ignored and the cassette's data is used.
+    """
+    from fastapi.testclient import TestClient
+    from api.server import app
+    from api.deps import get_crm_session
+    from ..crm.manager import CRMManager, LEADS_WS, OPPS_WS, ACTIVITIES_WS
+    from ..sheets import SheetManager
+    from .local_json import MockSheetManager
+    from .fake_google import FakeGoogle, FakeGoogleServer, fake_client
+
+    started = time.perf_counter()
+    server = None
+    if backend == "cassette":
+        from .cassettes import CassetteMiss, replay_client, spreadsheet_titles
+
+        titles = spreadsheet_titles(cassette)
+        sm = SheetManager(replay_client(cassette))
+        crm = CRMManager(sm, sheet_name=titles[0] if titles else BENCH_SHEET)
+        data = {}
+        for ws in (LEADS_WS, OPPS_WS, ACTIVITIES_WS):
+            try:
+                data[ws] = crm._get_data(ws) or [[]]
+            except CassetteMiss:  # worksheet never read while recording
+                continue
+        if len(data.get(LEADS_WS, [])) < 2:
+            raise RuntimeError(f"Cassette {cassette} has no recorded leads to benchmark")
+    else:
+        data = build_dataset(SIZES[label], seed)
+        if backend == "fake":
+            server = FakeGoogleServer(FakeGoogle(latency_ms=latency_ms)).start()
+            server.fake.load({BENCH_SHEET: data})
+            sm = SheetManager(fake_client(server.url))
+        else:
+            sm = MockSheetManager(persist=False, sheets={BENCH_SHEET: data})
+        crm = CRMManager(sm, sheet_name=BENCH_SHEET)
+    build_seconds = time.perf_counter() - started
+    size = max(len(data[LEADS_WS]) - 1, 1)
+    lead_rows = data[LEADS_WS][1:]
+    lead_ids = [row[0] for row in lead_rows]
+    # A word from a generated company name, so searches have matches to return
+    query = (lead_rows[0][1].split() or ["a"])[0].strip(",").lower()
+    # Fewer iterations on big datasets, so a 1M-row run stays within minutes
+    iterations = min(iterations, max(MIN_ITERATIONS, iterations * 10_000 // size))
+    writes = itertools.count()
+
+    app.dependency_overrides[get_crm_session] = lambda: crm
+    try:
+        client = TestClient(app)
+        runners = {
+            "decode_leads": lambda: [Lead.from_row(row) for row in lead_rows],
+            "pipeline_summary": crm.get_pipeline_summary,
+            "api_search": lambda: _check(client.get("/api/search", params={"q": query})),
+            "api_pipeline": lambda: _check(client.get("/api/pipeline")),
+            "api_create_activity": lambda: _check(client.post("/api/activities", json={
+                "lead_id": random.choice(lead_ids), "type": "Note", "subject": f"Benchmark note {next(writes)}"})),
+            "api_update_lead": lambda: _check(client.put(f"/api/leads/{random.choice(lead_ids)}", json={
+                "notes": f"Benchmark update {next(writes)}"})),
+        }
+        results = {}
+        for case in cases:
+            results[case] = measure(runners[case], iterations)
+    finally:
+        app.dependency_overrides.pop(get_crm_session, None)
+        if server is not None:
+            server.stop()
+
+    result = {
+        "rows": {ws: len(rows) - 1 for ws, rows in data.items()},
+        "build_seconds": round(build_seconds, 2),
+        "max_rss_mb": _max_rss_mb(),
+        "cases": results,
+    }
+    if server is not None:
+        result["google_requests"] = server.fake.stats()["requests"]
+    return result
+
+
+def run(sizes: Sequence[str] = DEFAULT_SIZES, iterations: int = DEFAULT_ITERATIONS,
+        cases: Sequence[str] = CASES, seed: int = 0, backend: str = "mock", latency_ms: float = 0.0,
+        on_size: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        cassette: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run every size in turn; `on_size(label, result)` is called as each finishes.
+    A `cassette` replaces the sizes with a single "cassette" run of its data.
+    """
+    if cassette:
+        backend, sizes = "cassette", ["cassette"]
+    elif backend == "cassette":
+        raise ValueError("The cassette backend needs a cassette file")
+    unknown = [s for s in sizes if s not in SIZES and not cassette] + [c for c in cases if c not in CASES]
+    if backend not in BACKENDS:
+        unknown.append(backend)
+    if unknown:
+        raise ValueError(f"Unknown sizes/cases/backend: {', '.join(unknown)}")
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "backend": backend,
+        "latency_ms": latency_ms,
+        "cassette": cassette,
+        "sizes": {},
+    }
+    for label in sizes:
+        report["sizes"][label] = run_size(label, iterations, cases, seed, backend, latency_ms, cassette)
+        gc.collect()
+        if on_size:
+            on_size(label, report["sizes"][label])
+    return report
+
+
+def save_baseline(report: Dict[str, Any], path: str = BASELINE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Per size and case: p50 change against the baseline as a fraction, and
+    whether it exceeds REGRESSION_THRESHOLD. Cases missing from the
+    baseline are left out.
+    """
+    out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for label, result in report["sizes"].items():
+        base_cases = baseline.get("sizes", {}).get(label, {}).get("cases", {})
+        for case, stats in result["cases"].items():
+            base = base_cases.get(case)
+            if not base or not base.get("p50_ms"):
+                continue
+            change = stats["p50_ms"] / base["p50_ms"] - 1
+            out.setdefault(label, {})[case] = {
+                "baseline_p50_ms": base["p50_ms"],
+                "change": round(change, 3),
+                "regression": change > REGRESSION_THRESHOLD,
+            }
+    return out
@@ -0,0 +1,313 @@
+"""
+Cassettes - record and replay the gspread client's Google API traffic.
+
+Recording wraps the client's HTTP session and appends every request and
+response to a cassette file (JSON Lines), scrubbed of personal data on the
+way in, so production-shaped traffic can be captured from a real tenant
+and used offline. Replay serves a cassette through a drop-in session that
+never touches the network, with the recorded latencies (optionally
+scaled), so benchmarks and regression tests see real response shapes,
+sizes and timings.
+
+Scrubbing is shape-preserving: letters become letters and digits become
+digits (case and punctuation kept), so lengths and payload sizes barely
+change. The mapping is a keyed hash, so the same value always scrubs to
+the same text within a recording and IDs still join across worksheets.
+Kept as recorded: column headers, the CRM's enum values (stages,
+statuses, ...), worksheet and spreadsheet titles (gspread opens sheets by
+name), plain numbers, dates and booleans. Spreadsheet/Drive file IDs are
+pseudonymized everywhere they appear, including URLs. Authorization
+headers and other request headers are never written.
+
+Configuration (read by `google_client.authorize`, which the API and CLI use
+to build gspread clients):
+- GOOGLE_CASSETTE_RECORD: cassette path to append recorded traffic to.
+- GOOGLE_CASSETTE_REPLAY: cassette path to serve instead of Google (CLI
+  and single-tenant dev only; per-user API sessions refuse it).
+- GOOGLE_CASSETTE_TIMING: multiplier for replayed latencies
+  (1 = as recorded, 0 = no delay; default 1).
+- GOOGLE_CASSETTE_KEY: scrubbing key, to keep pseudonyms stable across
+  recordings. By default each recording process uses a random key, which
+  is never written to the cassette.
+
+Replay matches requests on method, URL and query string. Each match is
+served in recorded order; once a request's recordings run out, the last
+one is repeated, so polling loops can replay indefinitely. A request that
+was never recorded raises `CassetteMiss`.
+"""
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import string
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit
+
+import gspread
+import requests
+from google.auth.credentials import AnonymousCredentials
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_RECORD = os.getenv("GOOGLE_CASSETTE_RECORD")
+CASSETTE_REPLAY = os.getenv("GOOGLE_CASSETTE_REPLAY")
+CASSETTE_TIMING = float(os.getenv("GOOGLE_CASSETTE_TIMING", "1"))
+CASSETTE_KEY = os.getenv("GOOGLE_CASSETTE_KEY")
+CASSETTE_VERSION = 1
+
+# JSON fields holding personal data (Drive users, cell data); "values" arrays are always scrubbed
+_PII_KEYS = {"displayName", "emailAddress", "photoLink", "stringValue", "formulaValue",
+             "formattedValue", "hyperlink", "note"}
+_ID_KEYS = {"id", "spreadsheetId"}
+# Path segments that are spreadsheet/file IDs
+_ID_IN_PATH = re.compile(r"(/spreadsheets/|/files/)([A-Za-z0-9_-]+)")
+_KEEP_VALUE = re.compile(
+    r"^(?:[-+]?\d{1,9}(?:\.\d+)?"  # numbers (longer digit runs may be phone or account numbers)
+    r"|\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?(?:Z|[+-]\d{2}:?\d{2})?"  # ISO dates
+    r"|TRUE|FALSE|)$"
+)
+
+
+class CassetteMiss(Exception):
+    """Raised on replay for a request the cassette has no recording of."""
+
+
+def _vocabulary() -> set:
+    """Values that are CRM structure rather than data: headers, enum values, worksheet names."""
+    from enum import Enum
+    from ..crm import models
+    from ..crm.manager import LEADS_WS, OPPS_WS, ACTIVITIES_WS, SUMMARY_WS
+
+    words = {LEADS_WS, OPPS_WS, ACTIVITIES_WS, SUMMARY_WS}
+    for model in (models.Lead, models.Opportunity, models.Activity):
+        words.update(model.headers())
+    for value in vars(models).values():
+        if isinstance(value, type) and issubclass(value, Enum) and value is not Enum:
+            words.update(str(member.value) for member in value)
+    return words
+
+
+class Scrubber:
+    """Shape-preserving, keyed pseudonymization of cell values, people and IDs."""
+
+    def __init__(self, key: Optional[bytes] = None):
+        self.key = key or secrets.token_bytes(32)
+        self.keep = _vocabulary()
+
+    def pseudonym(self, text: str) -> str:
+        stream = b""
+        counter = 0
+        out = []
+        for i, ch in enumerate(text):
+            if i >= len(stream):
+                stream += hmac.new(self.key, f"{counter}:{text}".encode(), hashlib.sha256).digest()
+                counter += 1
+            b = stream[i]
+            if ch.isdigit():
+                out.append(string.digits[b % 10])
+            elif ch.isalpha():
+                letter = string.ascii_lowercase[b % 26]
+                out.append(letter.upper() if ch.isupper() else letter)
+            else:
+                out.append(ch)
+        return "".join(out)
+
+    def value(self, value: Any) -> Any:
+        if not isinstance(value, str) or value in self.keep or _KEEP_VALUE.match(value):
+            return value
+        return self.pseudonym(value)
+
+    def url(self, url: str) -> str:
+        return _ID_IN_PATH.sub(lambda m: m.group(1) + self.pseudonym(m.group(2)), url)
+
+    def json(self, data: Any, key: Optional[str] = None) -> Any:
+        if isinstance(data, dict):
+            return {k: self.json(v, k) for k, v in data.items()}
+        if isinstance(data, list):
+            if key == "values" and all(not isinstance(row, dict) for row in data):
+                return [[self.value(c) for c in row] if isinstance(row, list) else self.value(row) for row in data]
+            if key == "parents":
+                return [self.pseudonym(p) if isinstance(p, str) else p for p in data]
+            return [self.json(item) for item in data]
+        if isinstance(data, str):
+            if key in _ID_KEYS:
+                return self.pseudonym(data)
+            if key in _PII_KEYS:
+                return self.value(data)
+            if key in ("spreadsheetUrl", "webViewLink"):
+                return self.url(data)
+        return data
+
+    def body(self, content: bytes, content_type: str) -> Tuple[Optional[str], Any]:
+        """(kind, scrubbed body) for storing: JSON, text or just the size of binary content."""
+        if not content:
+            return None, None
+        try:
+            text = content.decode("utf-8")
+        except UnicodeDecodeError:
+            return "binary", len(content)
+        if "json" in content_type:
+            try:
+                return "json", self.json(json.loads(text))
+            except ValueError:
+                pass
+        # CSV exports and the like: scrub field by field
+        return "text", "\n".join(",".join(self.value(f) for f in line.split(",")) for line in text.split("\n"))
+
+
+def _match_key(method: str, url: str, params: Any = None) -> str:
+    """Method, URL and sorted query string, with requests' param handling applied."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        items = params.items() if isinstance(params, dict) else params
+        for k, v in items:
+            query.extend((k, str(x)) for x in (v if isinstance(v, (list, tuple)) else [v]) if x is not None)
+    path = quote(requests.utils.unquote(parts.path), safe="/:!,$'()*+;=@")
+    return f"{method.upper()} {parts.netloc}{path}?{urlencode(sorted(query))}"
+
+
+class CassetteWriter:
+    """Appends scrubbed interactions to a cassette file; shared by every recording session."""
+
+    def __init__(self, path: str, key: Optional[bytes] = None):
+        self.path = path
+        self.scrubber = Scrubber(key)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", buffering=1)
+        if new:
+            self._file.write(json.dumps({"cassette": CASSETTE_VERSION,
+                                         "recorded_at": datetime.now().isoformat(timespec="seconds")}) + "\n")
+        print(f"[Cassette] Recording Google API traffic to {path}")
+
+    def write(self, method: str, url: str, params: Any, json_body: Any, response: requests.Response, elapsed: float):
+        s = self.scrubber
+        content_type = response.headers.get("content-type", "")
+        kind, body = s.body(response.content, content_type)
+        entry = {
+            "request": {
+                "key": s.url(_match_key(method, url, params)),
+                "json": s.json(json_body) if json_body is not None else None,
+            },
+            "response": {"status": response.status_code, "content_type": content_type,
+                         "kind": kind, "body": body},
+            "elapsed_ms": round(elapsed * 1000, 2),
+        }
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+_writers: Dict[str, CassetteWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def writer_for(path: str) -> CassetteWriter:
+    with _writers_lock:
+        if path not in _writers:
+            _writers[path] = CassetteWriter(path, CASSETTE_KEY.encode() if CASSETTE_KEY else None)
+        return _writers[path]
+
+
+class RecordingSession:
+    """Wraps an (authorized) requests session, recording what goes through `request`."""
+
+    def __init__(self, session: requests.Session, writer: CassetteWriter):
+        self._session = session
+        self._writer = writer
+
+    def request(self, method, url, params=None, json=None, **kwargs):
+        started = time.perf_counter()
+        response = self._session.request(method, url, params=params, json=json, **kwargs)
+        try:
+            self._writer.write(method, url, params, json, response, time.perf_counter() - started)
+        except Exception as e:  # never let recording break a real request
+            print(f"[Cassette] Failed to record {method.upper()} {url}: {e}")
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+def load(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """(header, interactions) of a cassette file."""
+    with open(path) as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("cassette") != CASSETTE_VERSION:
+            raise ValueError(f"{path} is not a version {CASSETTE_VERSION} cassette")
+        return header, [json.loads(line) for line in f if line.strip()]
+
+
+class ReplaySession(requests.Session):
+    """A requests session answering from a cassette instead of the network."""
+
+    def __init__(self, path: str, timing: float = CASSETTE_TIMING):
+        super().__init__()
+        self.path = path
+        self.timing = timing
+        self.header, interactions = load(path)
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {}
+        for entry in interactions:
+            self._queues.setdefault(entry["request"]["key"], deque()).append(entry)
+        self._lock = threading.Lock()
+        self.served = 0
+
+    def request(self, method, url, params=None, **kwargs):
+        key = _match_key(method, url, params)
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                raise CassetteMiss(f"No recording of {key} in {self.path}")
+            entry = queue.popleft() if len(queue) > 1 else queue[0]
+            self.served += 1
+        if self.timing:
+            time.sleep(entry["elapsed_ms"] * self.timing / 1000)
+        return self._response(entry["response"], method, url)
+
+    @staticmethod
+    def _response(recorded: Dict[str, Any], method: str, url: str) -> requests.Response:
+        response = requests.Response()
+        response.status_code = recorded["status"]
+        response.headers = CaseInsensitiveDict({"content-type": recorded["content_type"]})
+        kind, body = recorded["kind"], recorded["body"]
+        if kind == "json":
+            # Google pretty-prints its JSON; match it so payload sizes stay realistic
+            response._content = json.dumps(body, indent=2).encode()
+        elif kind == "text":
+            response._content = body.encode()
+        elif kind == "binary":
+            response._content = bytes(body)
+        else:
+            response._content = b""
+        response.encoding = "utf-8"
+        response.url = url
+        response.request = requests.Request(method.upper(), url).prepare()
+        return response
+
+
+def replay_client(path: str, timing: float = CASSETTE_TIMING) -> gspread.Client:
+    """A gspread client served entirely from the cassette at `path`."""
+    return gspread.Client(AnonymousCredentials(), session=ReplaySession(path, timing))
+
+
+def spreadsheet_titles(path: str) -> List[str]:
+    """Titles of the spreadsheets whose metadata a cassette recorded."""
+    titles = []
+    for entry in load(path)[1]:
+        body = entry["response"]["body"]
+        if entry["response"]["kind"] == "json" and isinstance(body, dict) and "sheets" in body:
+            title = body.get("properties", {}).get("title")
+            if title and title not in titles:
+                titles.append(title)
+    return titles
@@ -0,0 +1,692 @@
+"""
+Fake Google APIs - a local HTTP server implementing the subset of Sheets v4
+and Drive v3 that gspread (and so `SheetManager` and `retry.py`) uses.
+
+Unlike `MockSheetManager`, requests go through gspread, `requests` and real
+HTTP, so batching, retries and per-call overhead behave as they do against
+Google. The server injects latency, enforces per-minute read/write quotas
+(429 RESOURCE_EXHAUSTED, like Google) and counts every request, so quota
+and latency behaviour can be load-tested and benchmarked offline.
+
+Supported:
+- Sheets: spreadsheets get/batchUpdate, values get/batchGet/update/append/
+  batchUpdate/clear/batchClear. Formatting-only batchUpdate requests
+  (repeatCell, setDataValidation, ...) are accepted and ignored.
+- Drive: files list (`name = '...'` queries), create, get, delete.
+- OAuth: `/tokeninfo`, which accepts any token.
+- `/_fake/stats`, `/_fake/config` and `/_fake/reset` to read the request
+  accounting and change latency/quotas at runtime.
+
+Values are stored as displayed strings; formulas are kept as text, not
+evaluated.
+
+Run it with `python -m src.main crm-fake-google`. Point the API at it by
+setting GOOGLE_API_BASE_URL (read by `google_client.authorize`) to its URL
+and GOOGLE_TOKENINFO_URL to `<url>/tokeninfo`. In-process, use
+`FakeGoogleServer` with `fake_client()`. This module is for tests and
+benchmarks; production clients never import it.
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import gspread
+import requests
+from google.auth.credentials import AnonymousCredentials
+
+from ..google_client import RedirectedSession
+SPREADSHEET_MIME = "application/vnd.google-apps.spreadsheet"
+DEFAULT_ROWS = 1000
+DEFAULT_COLS = 26
+QUOTA_WINDOW = 60.0  # seconds
+
+# batchUpdate requests that only affect formatting; accepted and ignored
+FORMAT_ONLY_REQUESTS = {
+    "repeatCell", "setBasicFilter", "clearBasicFilter", "setDataValidation", "updateBorders",
+    "mergeCells", "unmergeCells", "autoResizeDimensions", "updateDimensionProperties",
+    "addConditionalFormatRule", "deleteConditionalFormatRule", "updateConditionalFormatRule",
+    "addProtectedRange", "deleteProtectedRange", "addNamedRange", "deleteNamedRange",
+    "addBanding", "deleteBanding", "addFilterView", "deleteFilterView",
+}
+
+
+class FakeGoogleError(Exception):
+    """An error returned to the client in Google's JSON error format."""
+
+    STATUSES = {400: "INVALID_ARGUMENT", 404: "NOT_FOUND", 429: "RESOURCE_EXHAUSTED"}
+
+    def __init__(self, code: int, message: str):
+        self.code = code
+        self.message = message
+        super().__init__(message)
+
+    def body(self) -> Dict[str, Any]:
+        return {"error": {"code": self.code, "message": self.message,
+                          "status": self.STATUSES.get(self.code, "UNKNOWN")}}
+
+
+# -----------------------------------------------------------------------------
+# A1 notation
+# -----------------------------------------------------------------------------
+
+_CELL = re.compile(r"^([A-Za-z]*)(\d*)$")
+
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters.upper():
+        n = n * 26 + ord(ch) - 64
+    return n - 1
+
+
+def _col_letters(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _split_range(range_name: str) -> Tuple[Optional[str], str]:
+    """("Sheet title" or None, "A1:B2" or "") from a range like `'My Sheet'!A1:B2`."""
+    if "!" in range_name:
+        title, cells = range_name.rsplit("!", 1)
+    elif re.match(r"^[A-Za-z]*\d*(:[A-Za-z]*\d*)?$", range_name):
+        title, cells = None, range_name
+    else:
+        title, cells = range_name, ""
+    if title and title.startswith("'") and title.endswith("'"):
+        title = title[1:-1].replace("''", "'")
+    return title, cells
+
+
+def _grid_bounds(cells: str) -> Tuple[int, int, Optional[int], Optional[int]]:
+    """Zero-based (row0, col0, row1, col1) with exclusive, possibly open, ends."""
+    if not cells:
+        return 0, 0, None, None
+    start, _, end = cells.partition(":")
+    m1, m2 = _CELL.match(start), _CELL.match(end or start)
+    if not m1 or not m2:
+        raise FakeGoogleError(400, f"Unable to parse range: {cells}")
+    c0 = _col_index(m1.group(1)) if m1.group(1) else 0
+    r0 = int(m1.group(2)) - 1 if m1.group(2) else 0
+    c1 = _col_index(m2.group(1)) + 1 if m2.group(1) else None
+    r1 = int(m2.group(2)) if m2.group(2) else None
+    return r0, c0, r1, c1
+
+
+def _cell_text(value: Any) -> str:
+    """How a written value reads back (FORMATTED_VALUE)."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+# -----------------------------------------------------------------------------
+# State
+# -----------------------------------------------------------------------------
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class FakeGoogle:
+    """Spreadsheets, quotas, latency and accounting behind the fake server."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 read_quota: Optional[int] = None, write_quota: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.latency_overrides: Dict[str, float] = {}  # operation -> latency ms
+        self.read_quota = read_quota  # requests per minute, None = unlimited
+        self.write_quota = write_quota
+        self.spreadsheets: Dict[str, Dict[str, Any]] = {}
+        self._windows = {"read": deque(), "write": deque()}
+        self._lock = threading.RLock()
+        self.reset_stats()
+
+    # --- configuration and accounting ------------------------------------
+
+    def configure(self, **options):
+        """Update latency_ms, jitter_ms, latency_overrides, read_quota or write_quota."""
+        with self._lock:
+            for key, value in options.items():
+                if key not in ("latency_ms", "jitter_ms", "latency_overrides", "read_quota", "write_quota"):
+                    raise FakeGoogleError(400, f"Unknown option: {key}")
+                setattr(self, key, value)
+            return self.config()
+
+    def config(self) -> Dict[str, Any]:
+        return {"latency_ms": self.latency_ms, "jitter_ms": self.jitter_ms,
+                "latency_overrides": dict(self.latency_overrides),
+                "read_quota": self.read_quota, "write_quota": self.write_quota}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"started_at": time.time(), "requests": {}, "rate_limited": {},
+                           "errors": {}, "bytes_in": 0, "bytes_out": 0, "injected_latency_s": 0.0}
+            for window in self._windows.values():
+                window.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = json.loads(json.dumps(self._stats))
+        stats["total_requests"] = sum(stats["requests"].values())
+        stats["total_rate_limited"] = sum(stats["rate_limited"].values())
+        stats["elapsed_s"] = round(time.time() - stats.pop("started_at"), 3)
+        stats["injected_latency_s"] = round(stats["injected_latency_s"], 3)
+        return stats
+
+    def _count(self, bucket: str, operation: str):
+        counts = self._stats[bucket]
+        counts[operation] = counts.get(operation, 0) + 1
+
+    def admit(self, operation: str, kind: str):
+        """Charge one request against the per-minute quota; raises 429 when exhausted."""
+        quota = self.read_quota if kind == "read" else self.write_quota
+        with self._lock:
+            self._count("requests", operation)
+            if quota is None:
+                return
+            window = self._windows[kind]
+            now = time.monotonic()
+            while window and window[0] <= now - QUOTA_WINDOW:
+                window.popleft()
+            if len(window) >= quota:
+                self._count("rate_limited", operation)
+                label = "Read" if kind == "read" else "Write"
+                raise FakeGoogleError(429, f"Quota exceeded for quota metric '{label} requests' and limit "
+                                           f"'{label} requests per minute' of service 'sheets.googleapis.com'.")
+            window.append(now)
+
+    def delay(self, operation: str) -> float:
+        base = self.latency_overrides.get(operation, self.latency_ms)
+        seconds = max(0.0, base + (random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)) / 1000
+        if seconds:
+            time.sleep(seconds)
+            with self._lock:
+                self._stats["injected_latency_s"] += seconds
+        return seconds
+
+    def record_transfer(self, operation: str, bytes_in: int, bytes_out: int, error_code: Optional[int] = None):
+        with self._lock:
+            self._stats["bytes_in"] += bytes_in
+            self._stats["bytes_out"] += bytes_out
+            if error_code is not None and error_code != 429:
+                self._count("errors", f"{operation}:{error_code}")
+
+    # --- data ------------------------------------------------------------
+
+    def create_spreadsheet(self, title: str, worksheets: Optional[Dict[str, List[list]]] = None) -> Dict[str, Any]:
+        """Create a spreadsheet, optionally seeded with {worksheet title: rows}."""
+        with self._lock:
+            spreadsheet_id = f"fake{uuid.uuid4().hex}"
+            now = _now_iso()
+            spreadsheet = {"id": spreadsheet_id, "title": title, "createdTime": now, "modifiedTime": now, "sheets": []}
+            for index, (ws_title, rows) in enumerate((worksheets or {"Sheet1": []}).items()):
+                spreadsheet["sheets"].append(self._new_sheet(index, ws_title, index, rows))
+            self.spreadsheets[spreadsheet_id] = spreadsheet
+            return spreadsheet
+
+    def load(self, data: Dict[str, Dict[str, List[list]]]):
+        """Seed from the MockSheetManager JSON layout: {spreadsheet title: {worksheet: rows}}."""
+        for title, worksheets in data.items():
+            self.create_spreadsheet(title, worksheets or None)
+
+    def dump(self) -> Dict[str, Dict[str, List[list]]]:
+        with self._lock:
+            return {s["title"]: {ws["title"]: [list(r) for r in ws["rows"]] for ws in s["sheets"]}
+                    for s in self.spreadsheets.values()}
+
+    @staticmethod
+    def _new_sheet(sheet_id: int, title: str, index: int, rows: Optional[List[list]] = None,
+                   row_count: int = DEFAULT_ROWS, col_count: int = DEFAULT_COLS) -> Dict[str, Any]:
+        rows = [[_cell_text(v) for v in row] for row in (rows or [])]
+        width = max((len(r) for r in rows), default=0)
+        return {"sheetId": sheet_id, "title": title, "index": index, "rows": rows,
+                "rowCount": max(row_count, len(rows)), "columnCount": max(col_count, width)}
+
+    def spreadsheet(self, spreadsheet_id: str) -> Dict[str, Any]:
+        spreadsheet = self.spreadsheets.get(spreadsheet_id)
+        if spreadsheet is None:
+            raise FakeGoogleError(404, "Requested entity was not found.")
+        return spreadsheet
+
+    def _sheet(self, spreadsheet: Dict[str, Any], title: Optional[str] = None,
+               sheet_id: Optional[int] = None) -> Dict[str, Any]:
+        for ws in spreadsheet["sheets"]:
+            if (title is None and sheet_id is None and ws["index"] == 0) or \
+                    (title is not None and ws["title"] == title) or \
+                    (sheet_id is not None and ws["sheetId"] == sheet_id):
+                return ws
+        raise FakeGoogleError(400, f"Unable to parse range: {title if title is not None else sheet_id}")
+
+    def _resolve(self, spreadsheet, range_name: str):
+        if "!" not in range_name:
+            # A bare name is a sheet title before it is a cell reference ("Leads", "AB1")
+            bare = range_name[1:-1].replace("''", "'") if range_name[:1] == range_name[-1:] == "'" else range_name
+            for ws in spreadsheet["sheets"]:
+                if ws["title"] == bare:
+                    return ws, (0, 0, None, None)
+        title, cells = _split_range(range_name)
+        return self._sheet(spreadsheet, title), _grid_bounds(cells)
+
+    @staticmethod
+    def _a1(ws, r0, c0, r1, c1) -> str:
+        title = "'" + ws["title"].replace("'", "''") + "'"
+        r1 = ws["rowCount"] if r1 is None else r1
+        c1 = ws["columnCount"] if c1 is None else c1
+        return f"{title}!{_col_letters(c0)}{r0 + 1}:{_col_letters(max(c0, c1 - 1))}{max(r0 + 1, r1)}"
+
+    def _read(self, ws, bounds) -> List[list]:
+        r0, c0, r1, c1 = bounds
+        out = []
+        for row in ws["rows"][r0:r1]:
+            cells = row[c0:c1]
+            while cells and cells[-1] == "":
+                cells = cells[:-1]
+            out.append(cells)
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def _write(self, ws, r0: int, c0: int, values: List[list]) -> Dict[str, int]:
+        height = len(values)
+        width = max((len(r) for r in values), default=0)
+        if r0 + height > ws["rowCount"] or c0 + width > ws["columnCount"]:
+            raise FakeGoogleError(400, f"Range ({self._a1(ws, r0, c0, r0 + height, c0 + width)}) exceeds grid limits. "
+                                       f"Max rows: {ws['rowCount']}, max columns: {ws['columnCount']}")
+        rows = ws["rows"]
+        while len(rows) < r0 + height:
+            rows.append([])
+        for offset, values_row in enumerate(values):
+            row = rows[r0 + offset]
+            if len(row) < c0 + len(values_row):
+                row.extend([""] * (c0 + len(values_row) - len(row)))
+            row[c0:c0 + len(values_row)] = [_cell_text(v) for v in values_row]
+        return {"updatedRows": height, "updatedColumns": width,
+                "updatedCells": sum(len(r) for r in values)}
+
+    def _clear(self, ws, bounds):
+        r0, c0, r1, c1 = bounds
+        for row in ws["rows"][r0:r1]:
+            end = len(row) if c1 is None else min(c1, len(row))
+            for c in range(c0, end):
+                row[c] = ""
+
+    def _touch(self, spreadsheet):
+        spreadsheet["modifiedTime"] = _now_iso()
+
+    # --- Sheets v4 -------------------------------------------------------
+
+    def get_spreadsheet(self, spreadsheet_id: str) -> Dict[str, Any]:
+        with self._lock:
+            s = self.spreadsheet(spreadsheet_id)
+            return {
+                "spreadsheetId": s["id"],
+                "properties": {"title": s["title"], "locale": "en_US", "timeZone": "Etc/GMT"},
+                "sheets": [{"properties": {
+                    "sheetId": ws["sheetId"], "title": ws["title"], "index": ws["index"], "sheetType": "GRID",
+                    "gridProperties": {"rowCount": ws["rowCount"], "columnCount": ws["columnCount"]},
+                }} for ws in sorted(s["sheets"], key=lambda w: w["index"])],
+                "spreadsheetUrl": f"https://docs.google.com/spreadsheets/d/{s['id']}/edit",
+            }
+
+    def values_get(self, spreadsheet_id: str, range_name: str) -> Dict[str, Any]:
+        with self._lock:
+            ws, bounds = self._resolve(self.spreadsheet(spreadsheet_id), range_name)
+            body = {"range": self._a1(ws, *bounds), "majorDimension": "ROWS"}
+            values = self._read(ws, bounds)
+            if values:
+                body["values"] = values
+            return body
+
+    def values_batch_get(self, spreadsheet_id: str, ranges: List[str]) -> Dict[str, Any]:
+        return {"spreadsheetId": spreadsheet_id,
+                "valueRanges": [self.values_get(spreadsheet_id, r) for r in ranges]}
+
+    def values_update(self, spreadsheet_id: str, range_name: str, values: List[list]) -> Dict[str, Any]:
+        with self._lock:
+            s = self.spreadsheet(spreadsheet_id)
+            ws, (r0, c0, _, _) = self._resolve(s, range_name)
+            counts = self._write(ws, r0, c0, values)
+            self._touch(s)
+            width = max(counts["updatedColumns"], 1)
+            return {"spreadsheetId": spreadsheet_id,
+                    "updatedRange": self._a1(ws, r0, c0, r0 + max(len(values), 1), c0 + width), **counts}
+
+    def values_batch_update(self, spreadsheet_id: str, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with self._lock:
+            responses = [self.values_update(spreadsheet_id, d["range"], d.get("values", [])) for d in data]
+            return {"spreadsheetId": spreadsheet_id,
+                    "totalUpdatedRows": sum(r["updatedRows"] for r in responses),
+                    "totalUpdatedColumns": max((r["updatedColumns"] for r in responses), default=0),
+                    "totalUpdatedCells": sum(r["updatedCells"] for r in responses),
+                    "totalUpdatedSheets": len({r["updatedRange"].rsplit("!", 1)[0] for r in responses}),
+                    "responses": responses}
+
+    def values_append(self, spreadsheet_id: str, range_name: str, values: List[list]) -> Dict[str, Any]:
+        with self._lock:
+            s = self.spreadsheet(spreadsheet_id)
+            ws, (r0, c0, _, _) = self._resolve(s, range_name)
+            # The table is the data from the range start down; append after its last non-empty row
+            last = r0 - 1
+            for i in range(len(ws["rows"]) - 1, r0 - 1, -1):
+                if any(ws["rows"][i][c0:]):
+                    last = i
+                    break
+            start = last + 1
+            ws["rowCount"] = max(ws["rowCount"], start + len(values))
+            ws["columnCount"] = max(ws["columnCount"], c0 + max((len(r) for r in values), default=0))
+            counts = self._write(ws, start, c0, values)
+            self._touch(s)
+            width = max(counts["updatedColumns"], 1)
+            return {"spreadsheetId": spreadsheet_id,
+                    "tableRange": self._a1(ws, r0, c0, max(start, r0 + 1), c0 + width),
+                    "updates": {"spreadsheetId": spreadsheet_id,
+                                "updatedRange": self._a1(ws, start, c0, start + len(values), c0 + width),
+                                **counts}}
+
+    def values_clear(self, spreadsheet_id: str, ranges: List[str]) -> Dict[str, Any]:
+        with self._lock:
+            s = self.spreadsheet(spreadsheet_id)
+            cleared = []
+            for range_name in ranges:
+                ws, bounds = self._resolve(s, range_name)
+                self._clear(ws, bounds)
+                cleared.append(self._a1(ws, *bounds))
+            self._touch(s)
+            return {"spreadsheetId": spreadsheet_id, "clearedRanges": cleared}
+
+    def batch_update(self, spreadsheet_id: str, requests_: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with self._lock:
+            s = self.spreadsheet(spreadsheet_id)
+            replies = [self._apply(s, request) for request in requests_]
+            self._touch(s)
+            return {"spreadsheetId": spreadsheet_id, "replies": replies}
+
+    def _apply(self, s, request: Dict[str, Any]) -> Dict[str, Any]:
+        (kind, body), = request.items()
+        if kind in FORMAT_ONLY_REQUESTS:
+            return {}
+        if kind == "addSheet":
+            props = body.get("properties", {})
+            title = props.get("title") or f"Sheet{len(s['sheets']) + 1}"
+            if any(ws["title"] == title for ws in s["sheets"]):
+                raise FakeGoogleError(400, f'Invalid requests[0].addSheet: A sheet with the name "{title}" already exists.')
+            grid = props.get("gridProperties", {})
+            ws = self._new_sheet(props.get("sheetId", random.randint(1, 2**31 - 1)), title,
+                                 props.get("index", len(s["sheets"])), None,
+                                 grid.get("rowCount", DEFAULT_ROWS), grid.get("columnCount", DEFAULT_COLS))
+            s["sheets"].append(ws)
+            return {"addSheet": {"properties": {
+                "sheetId": ws["sheetId"], "title": ws["title"], "index": ws["index"], "sheetType": "GRID",
+                "gridProperties": {"rowCount": ws["rowCount"], "columnCount": ws["columnCount"]}}}}
+        if kind == "deleteSheet":
+            ws = self._sheet(s, sheet_id=body["sheetId"])
+            s["sheets"].remove(ws)
+            for i, other in enumerate(sorted(s["sheets"], key=lambda w: w["index"])):
+                other["index"] = i
+            return {}
+        if kind == "updateSheetProperties":
+            props = body["properties"]
+            ws = self._sheet(s, sheet_id=props.get("sheetId", 0))
+            if "title" in props:
+                ws["title"] = props["title"]
+            if "index" in props:
+                ws["index"] = props["index"]
+            grid = props.get("gridProperties", {})
+            ws["rowCount"] = grid.get("rowCount", ws["rowCount"])
+            ws["columnCount"] = grid.get("columnCount", ws["columnCount"])
+            return {}
+        if kind == "updateSpreadsheetProperties":
+            if "title" in body.get("properties", {}):
+                s["title"] = body["properties"]["title"]
+            return {}
+        if kind in ("insertDimension", "deleteDimension"):
+            rng = body["range"]
+            ws = self._sheet(s, sheet_id=rng.get("sheetId", 0))
+            start, end = rng["startIndex"], rng["endIndex"]
+            rows_dim = rng["dimension"] == "ROWS"
+            if kind == "insertDimension":
+                if rows_dim:
+                    ws["rows"][start:start] = [[] for _ in range(end - start)]
+                    ws["rowCount"] += end - start
+                else:
+                    for row in ws["rows"]:
+                        if len(row) > start:
+                            row[start:start] = [""] * (end - start)
+                    ws["columnCount"] += end - start
+            elif rows_dim:
+                del ws["rows"][start:end]
+                ws["rowCount"] -= min(end, ws["rowCount"]) - start
+            else:
+                for row in ws["rows"]:
+                    del row[start:end]
+                ws["columnCount"] -= min(end, ws["columnCount"]) - start
+            return {}
+        if kind == "appendDimension":
+            ws = self._sheet(s, sheet_id=body.get("sheetId", 0))
+            ws["rowCount" if body["dimension"] == "ROWS" else "columnCount"] += body["length"]
+            return {}
+        if kind == "updateCells":
+            start = body.get("start") or {
+                "sheetId": body["range"].get("sheetId", 0),
+                "rowIndex": body["range"].get("startRowIndex", 0),
+                "columnIndex": body["range"].get("startColumnIndex", 0),
+            }
+            ws = self._sheet(s, sheet_id=start.get("sheetId", 0))
+            r0, c0 = start.get("rowIndex", 0), start.get("columnIndex", 0)
+            for offset, row in enumerate(body.get("rows", [])):
+                for col, cell in enumerate(row.get("values", [])):
+                    entered = cell.get("userEnteredValue")
+                    if entered is None:
+                        continue  # format-only cell
+                    (_, value), = entered.items()
+                    self._write(ws, r0 + offset, c0 + col, [[value]])
+            return {}
+        raise FakeGoogleError(400, f"Fake Google API does not support the '{kind}' request")
+
+    # --- Drive v3 --------------------------------------------------------
+
+    @staticmethod
+    def _file(s) -> Dict[str, Any]:
+        return {"kind": "drive#file", "id": s["id"], "name": s["title"], "mimeType": SPREADSHEET_MIME,
+                "createdTime": s["createdTime"], "modifiedTime": s["modifiedTime"]}
+
+    def files_list(self, query: str = "", page_size: int = 100) -> Dict[str, Any]:
+        name = re.search(r"""name\s*=\s*(['"])(.*?)\1""", query or "")
+        with self._lock:
+            files = [self._file(s) for s in self.spreadsheets.values()
+                     if name is None or s["title"] == name.group(2)]
+        files.sort(key=lambda f: f["modifiedTime"], reverse=True)
+        return {"kind": "drive#fileList", "files": files[:page_size]}
+
+
+# -----------------------------------------------------------------------------
+# HTTP server
+# -----------------------------------------------------------------------------
+
+_SHEETS_PREFIX = "/v4/spreadsheets/"
+_DRIVE_PREFIX = "/drive/v3/files"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as with Google
+    fake: FakeGoogle = None  # set per server class
+    verbose = False
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            print(f"[FakeGoogle] {self.address_string()} {format % args}")
+
+    def _body(self) -> Tuple[Dict[str, Any], int]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return (json.loads(raw) if raw else {}), len(raw)
+
+    def _send(self, code: int, body: Dict[str, Any]) -> int:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        return len(payload)
+
+    def _route(self, method: str, path: str, query: Dict[str, List[str]], body: Dict[str, Any]):
+        """(operation, quota kind, handler) for a request; quota kind None means not charged."""
+        fake = self.fake
+        one = lambda key, default=None: query.get(key, [default])[0]
+
+        if path == "/tokeninfo":
+            return "tokeninfo", None, lambda: {"expires_in": "3599", "email": "fake-user@example.com",
+                                               "scope": "https://www.googleapis.com/auth/spreadsheets"}
+        if path.startswith("/_fake/"):
+            action = path[len("/_fake/"):]
+            if action == "stats" and method == "GET":
+                return "fake.stats", None, fake.stats
+            if action == "config" and method in ("GET", "POST"):
+                return "fake.config", None, (lambda: fake.configure(**body)) if method == "POST" else fake.config
+            if action == "reset" and method == "POST":
+                return "fake.reset", None, lambda: (fake.reset_stats(), {"reset": True})[1]
+
+        if path.startswith(_DRIVE_PREFIX):
+            file_id = unquote(path[len(_DRIVE_PREFIX):].lstrip("/"))
+            if not file_id and method == "GET":
+                return "files.list", "read", lambda: fake.files_list(one("q", ""), int(one("pageSize", 100)))
+            if not file_id and method == "POST":
+                return "files.create", "write", lambda: fake._file(fake.create_spreadsheet(body.get("name", "Untitled spreadsheet")))
+            if file_id and method == "GET":
+                return "files.get", "read", lambda: fake._file(fake.spreadsheet(file_id))
+            if file_id and method == "DELETE":
+                return "files.delete", "write", lambda: (fake.spreadsheet(file_id), fake.spreadsheets.pop(file_id), {})[2]
+
+        if path.startswith(_SHEETS_PREFIX):
+            rest = path[len(_SHEETS_PREFIX):]
+            spreadsheet_id, _, sub = rest.partition("/")
+            if not sub:
+                if spreadsheet_id.endswith(":batchUpdate") and method == "POST":
+                    sid = spreadsheet_id[:-len(":batchUpdate")]
+                    return "spreadsheets.batchUpdate", "write", lambda: fake.batch_update(sid, body.get("requests", []))
+                if method == "GET":
+                    return "spreadsheets.get", "read", lambda: fake.get_spreadsheet(spreadsheet_id)
+            elif sub == "values:batchGet" and method == "GET":
+                return "values.batchGet", "read", lambda: fake.values_batch_get(spreadsheet_id, query.get("ranges", []))
+            elif sub == "values:batchUpdate" and method == "POST":
+                return "values.batchUpdate", "write", lambda: fake.values_batch_update(spreadsheet_id, body.get("data", []))
+            elif sub == "values:batchClear" and method == "POST":
+                return "values.batchClear", "write", lambda: fake.values_clear(spreadsheet_id, body.get("ranges", []))
+            elif sub.startswith("values/"):
+                range_part = sub[len("values/"):]
+                if range_part.endswith(":append") and method == "POST":
+                    rng = unquote(range_part[:-len(":append")])
+                    return "values.append", "write", lambda: fake.values_append(spreadsheet_id, rng, body.get("values", []))
+                if range_part.endswith(":clear") and method == "POST":
+                    rng = unquote(range_part[:-len(":clear")])
+                    return "values.clear", "write", lambda: fake.values_clear(spreadsheet_id, [rng])
+                rng = unquote(range_part)
+                if method == "GET":
+                    return "values.get", "read", lambda: fake.values_get(spreadsheet_id, rng)
+                if method == "PUT":
+                    return "values.update", "write", lambda: fake.values_update(spreadsheet_id, rng, body.get("values", []))
+        return None
+
+    def _handle(self, method: str):
+        url = urlsplit(self.path)
+        operation = "unknown"
+        bytes_in = bytes_out = 0
+        code = 200
+        try:
+            body, bytes_in = self._body()
+            route = self._route(method, url.path, parse_qs(url.query), body)
+            if route is None:
+                raise FakeGoogleError(404, f"Fake Google API has no {method} {url.path}")
+            operation, kind, handler = route
+            if kind is not None:
+                self.fake.delay(operation)
+                self.fake.admit(operation, kind)
+            result = handler()
+        except FakeGoogleError as e:
+            code, result = e.code, e.body()
+        except (KeyError, TypeError, ValueError) as e:
+            code, result = 400, FakeGoogleError(400, f"Invalid request: {e}").body()
+        bytes_out = self._send(code, result)
+        if not url.path.startswith("/_fake/"):
+            self.fake.record_transfer(operation, bytes_in, bytes_out, code if code >= 400 else None)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class FakeGoogleServer:
+    """Runs a FakeGoogle behind a threaded HTTP server (port 0 picks a free port)."""
+
+    def __init__(self, fake: Optional[FakeGoogle] = None, host: str = "127.0.0.1", port: int = 0,
+                 verbose: bool = False):
+        self.fake = fake or FakeGoogle()
+        handler = type("FakeGoogleHandler", (_Handler,), {"fake": self.fake, "verbose": verbose})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGoogleServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-google", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+# -----------------------------------------------------------------------------
+# Clients
+# -----------------------------------------------------------------------------
+
+def fake_client(base_url: str) -> gspread.Client:
+    """An unauthenticated gspread client talking to a fake server at `base_url`."""
+    credentials = AnonymousCredentials()
+    return gspread.Client(credentials, session=RedirectedSession(credentials, base_url))
+
+
+def fake_stats(base_url: str) -> Dict[str, Any]:
+    """Request accounting of a fake server running in another process."""
+    return requests.get(f"{base_url.rstrip('/')}/_fake/stats", timeout=5).json()
@@ -0,0 +1,305 @@
+"""
+Background job queue backed by a local SQLite journal.
+
+Jobs (lead enrichment, scoring, ...) are written to the journal before they
+run, so they survive restarts. A bounded pool of worker threads picks them up
+by priority; identical jobs (same dedupe key) are collapsed while one is still
+queued or running, and failures are retried with exponential backoff.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "data/jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+
+# Higher runs first
+PRIORITY_HIGH = 10  # user clicked a button
+PRIORITY_NORMAL = 5  # side effect of a write (e.g. enrich on create)
+PRIORITY_LOW = 0  # bulk work
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+RETRY_BASE_DELAY = 5.0  # seconds; doubles per attempt
+DEFER_DELAY = 60.0  # seconds to wait when a job can't run yet
+# A job still deferred this long after it was queued fails (e.g. its session never came back)
+MAX_DEFER_AGE = float(os.getenv("JOB_MAX_DEFER_HOURS", "24")) * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    sheet TEXT NOT NULL,
+    target TEXT,
+    dedupe_key TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    payload TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    run_after REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key, status);
+CREATE INDEX IF NOT EXISTS jobs_sheet ON jobs (sheet, created_at DESC);
+"""
+
+
+class JobDeferred(Exception):
+    """
+    Raised by a handler when a job can't run yet (e.g. no live session). Not
+    counted as a failed attempt, but a job deferred past MAX_DEFER_AGE fails.
+    """
+
+
+class JobQueue:
+    """Priority job queue with a SQLite journal and a bounded worker pool."""
+
+    def __init__(self, db_path: str = JOBS_DB_PATH, workers: int = JOB_WORKERS, max_attempts: int = 3):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._handlers: Dict[str, Callable[[Dict[str, Any], Any], Any]] = {}
+        # In-memory context per job (e.g. the CRMManager that enqueued it).
+        # Lost on restart; handlers must cope with None.
+        self._contexts: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._db: Optional[sqlite3.Connection] = None
+
+    # -------------------------------------------------------------------------
+    # Setup
+    # -------------------------------------------------------------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        """Open the journal lazily. Call with the lock held."""
+        if self._db is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def register(self, kind: str, handler: Callable[[Dict[str, Any], Any], Any]):
+        """Register the function that runs jobs of `kind`: handler(job, context)."""
+        self._handlers[kind] = handler
+
+    def start(self):
+        """Recover interrupted jobs and start the worker threads."""
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping = False
+            # Jobs that were running when the process died go back in the queue
+            self._conn().execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?",
+                (QUEUED, time.time(), RUNNING),
+            )
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """Ask workers to exit after their current job."""
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout=timeout)
+
+    # -------------------------------------------------------------------------
+    # Producer API
+    # -------------------------------------------------------------------------
+
+    def enqueue(
+        self,
+        kind: str,
+        sheet: str,
+        target: Optional[str] = None,
+        priority: int = PRIORITY_NORMAL,
+        payload: Optional[Dict[str, Any]] = None,
+        context: Any = None,
+        dedupe_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Add a job, or return the existing active job with the same dedupe key.
+        An existing queued job is promoted if the new request has higher priority.
+        The default key covers the payload, so the same kind of job with other
+        parameters is queued separately rather than merged.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        if dedupe_key is None:
+            dedupe_key = f"{kind}:{sheet}:{target or ''}"
+            if payload is not None:
+                digest = hashlib.blake2b(json.dumps(payload, sort_keys=True, default=str).encode(), digest_size=8)
+                dedupe_key += f":{digest.hexdigest()}"
+        now = time.time()
+
+        with self._lock:
+            db = self._conn()
+            existing = db.execute(
+                "SELECT * FROM jobs WHERE dedupe_key = ? AND status IN (?, ?) LIMIT 1",
+                (dedupe_key, *ACTIVE_STATUSES),
+            ).fetchone()
+            if existing is not None:
+                if existing["status"] == QUEUED and priority > existing["priority"]:
+                    db.execute("UPDATE jobs SET priority = ?, updated_at = ? WHERE id = ?",
+                               (priority, now, existing["id"]))
+                if context is not None:
+                    self._contexts[existing["id"]] = context
+                return self._get(existing["id"])
+
+            job_id = uuid.uuid4().hex[:12]
+            db.execute(
+                "INSERT INTO jobs (id, kind, sheet, target, dedupe_key, priority, status, attempts,"
+                " max_attempts, payload, created_at, updated_at, run_after)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, ?, ?, ?, ?)",
+                (job_id, kind, sheet, target, dedupe_key, priority, QUEUED, self.max_attempts,
+                 json.dumps(payload) if payload is not None else None, now, now, now),
+            )
+            if context is not None:
+                self._contexts[job_id] = context
+            self._wakeup.notify()
+            return self._get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._get(job_id)
+
+    def list(self, sheet: Optional[str] = None, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent jobs, optionally filtered by sheet and status."""
+        query, params = "SELECT * FROM jobs WHERE 1 = 1", []
+        if sheet is not None:
+            query += " AND sheet = ?"
+            params.append(sheet)
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            return [self._row_to_job(row) for row in self._conn().execute(query, params)]
+
+    def stats(self, sheet: Optional[str] = None) -> Dict[str, int]:
+        """Job counts by status (queue depth is the `queued` count)."""
+        query, params = "SELECT status, COUNT(*) AS n FROM jobs", []
+        if sheet is not None:
+            query += " WHERE sheet = ?"
+            params.append(sheet)
+        query += " GROUP BY status"
+        with self._lock:
+            counts = {row["status"]: row["n"] for row in self._conn().execute(query, params)}
+        return {status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)}
+
+    def update_progress(self, job_id: str, result: Dict[str, Any]):
+        """Persist intermediate results (e.g. progress counters) for a running job."""
+        with self._lock:
+            self._conn().execute("UPDATE jobs SET result = ?, updated_at = ? WHERE id = ?",
+                                 (json.dumps(result), time.time(), job_id))
+
+    # -------------------------------------------------------------------------
+    # Workers
+    # -------------------------------------------------------------------------
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"]) if job["payload"] else None
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """Mark the next ready job as running. Call with the lock held."""
+        db = self._conn()
+        row = db.execute(
+            "SELECT * FROM jobs WHERE status = ? AND run_after <= ? ORDER BY priority DESC, created_at LIMIT 1",
+            (QUEUED, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        db.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (RUNNING, time.time(), row["id"]))
+        job = self._row_to_job(row)
+        job["status"] = RUNNING
+        return job
+
+    def _next_wait(self) -> float:
+        """Seconds until the earliest delayed job becomes ready. Call with the lock held."""
+        row = self._conn().execute("SELECT MIN(run_after) AS t FROM jobs WHERE status = ?", (QUEUED,)).fetchone()
+        if row is None or row["t"] is None:
+            return DEFER_DELAY
+        return max(0.05, min(DEFER_DELAY, row["t"] - time.time()))
+
+    def _finish(self, job: Dict[str, Any], status: str, error: Optional[str] = None,
+                result: Any = None, attempts: Optional[int] = None, run_after: Optional[float] = None):
+        now = time.time()
+        with self._lock:
+            self._conn().execute(
+                "UPDATE jobs SET status = ?, error = ?, result = COALESCE(?, result), attempts = ?,"
+                " updated_at = ?, run_after = ? WHERE id = ?",
+                (status, error, json.dumps(result) if result is not None else None,
+                 attempts if attempts is not None else job["attempts"], now, run_after or now, job["id"]),
+            )
+            if status in (DONE, FAILED):
+                self._contexts.pop(job["id"], None)
+            else:
+                self._wakeup.notify()
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                job = None
+                while not self._stopping:
+                    job = self._claim()
+                    if job is not None:
+                        break
+                    self._wakeup.wait(timeout=self._next_wait())
+                if job is None:
+                    return
+                context = self._contexts.get(job["id"])
+
+            handler = self._handlers.get(job["kind"])
+            try:
+                if handler is None:
+                    raise RuntimeError(f"No handler registered for job kind '{job['kind']}'")
+                result = handler(job, context)
+                self._finish(job, DONE, result=result if isinstance(result, dict) else None)
+            except JobDeferred as e:
+                if time.time() - job["created_at"] > MAX_DEFER_AGE:
+                    print(f"[Jobs] {job['kind']} {job['id']} deferred for too long, giving up: {e}")
+                    self._finish(job, FAILED, error=f"Deferred for over {MAX_DEFER_AGE / 3600:g}h: {e}")
+                else:
+                    self._finish(job, QUEUED, error=str(e) or None, run_after=time.time() + DEFER_DELAY)
+            except Exception as e:
+                attempts = job["attempts"] + 1
+                if attempts >= job["max_attempts"]:
+                    print(f"[Jobs] {job['kind']} {job['id']} failed permanently: {e}")
+                    self._finish(job, FAILED, error=str(e), attempts=attempts)
+                else:
+                    delay = RETRY_BASE_DELAY * (2 ** (attempts - 1))
+                    print(f"[Jobs] {job['kind']} {job['id']} failed (attempt {attempts}), retrying in {delay:.0f}s: {e}")
+                    self._finish(job, QUEUED, error=str(e), attempts=attempts, run_after=time.time() + delay)
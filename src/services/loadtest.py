@@ -0,0 +1,336 @@
+"""
+Load testing - simulates concurrent dashboard users against the API.
+
+Each virtual user loops over a weighted mix of what the dashboard does:
+polling the dashboard and pipeline (with ETags, like the browser), listing
+and searching leads, dragging deals between stages, creating leads (which
+queues enrichment) and logging activities, with a random think time
+between actions.
+
+By default the API runs in a subprocess (`api.server:app` under uvicorn)
+on a synthetic dataset from the benchmark generators, backed either by an
+in-memory `MockSheetManager` or by the local fake Google API, so it never
+touches real Google quotas or the dev data files. `--url` targets an API
+that is already running instead.
+
+Before the concurrent phase, each action runs a few times on its own to
+measure how many Google API requests it costs (fake backend only); the
+concurrent phase then reports throughput, latency percentiles, error rates
+and overall Google requests per action.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from ..crm.models import ActivityType, PipelineStage
+from .benchmark import SIZES, BENCH_SHEET, BACKENDS, _percentile
+
+DEFAULT_USERS = 20
+DEFAULT_DURATION = 60.0  # seconds
+DEFAULT_THINK_MS = 1000.0  # mean pause between a user's actions
+CALIBRATION_RUNS = 3  # isolated runs per action to attribute Google requests
+SERVER_START_TIMEOUT = 300.0  # seconds; building a 1M-lead dataset takes a while
+REQUEST_TIMEOUT = 60.0
+
+# Relative frequency of each dashboard action
+ACTION_WEIGHTS = {
+    "poll_dashboard": 25,
+    "poll_pipeline": 20,
+    "list_leads": 10,
+    "search": 15,
+    "move_stage": 12,
+    "log_activity": 12,
+    "create_lead": 6,
+}
+
+STAGES = [s.value for s in PipelineStage]
+ACTIVITY_TYPES = [t.value for t in ActivityType]
+SEARCH_TERMS = ["group", "inc", "llc", "and", "tech", "ltd", "sons", "plc"]
+
+
+# -----------------------------------------------------------------------------
+# Server under test (subprocess)
+# -----------------------------------------------------------------------------
+
+def serve(backend: str, size: str, port: int, fake_port: int, latency_ms: float, seed: int = 0):
+    """Build a dataset, point the API's sessions at it and run uvicorn (blocks)."""
+    import uvicorn
+    from api.server import app
+    from api.deps import get_crm_session, get_sheet_manager
+    from ..crm.manager import CRMManager
+    from ..sheets import SheetManager
+    from .benchmark import build_dataset
+    from .local_json import MockSheetManager
+    from .fake_google import FakeGoogle, FakeGoogleServer, fake_client
+
+    data = build_dataset(SIZES[size], seed)
+    if backend == "fake":
+        server = FakeGoogleServer(FakeGoogle(latency_ms=latency_ms), port=fake_port).start()
+        server.fake.load({BENCH_SHEET: data})
+        sm = SheetManager(fake_client(server.url))
+    else:
+        sm = MockSheetManager(persist=False, sheets={BENCH_SHEET: data})
+    crm = CRMManager(sm, sheet_name=BENCH_SHEET)
+
+    app.dependency_overrides[get_crm_session] = lambda: crm
+    app.dependency_overrides[get_sheet_manager] = lambda: sm
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+class ServerProcess:
+    """Runs `serve` in a subprocess with its own job journal and no LLM keys."""
+
+    def __init__(self, backend: str, size: str, port: int, latency_ms: float, live_enrichment: bool = False):
+        self.port = port
+        self.fake_port = port + 1
+        self.url = f"http://127.0.0.1:{port}"
+        self.fake_url = f"http://127.0.0.1:{self.fake_port}" if backend == "fake" else None
+        self.workdir = tempfile.mkdtemp(prefix="crm-loadtest-")
+        self.log_path = os.path.join(self.workdir, "server.log")
+
+        env = dict(os.environ)
+        env["JOBS_DB_PATH"] = os.path.join(self.workdir, "jobs.sqlite3")
+        env["SCORE_FINGERPRINTS_PATH"] = os.path.join(self.workdir, "score_fingerprints.sqlite3")
+        if not live_enrichment:
+            # Enrichment still runs (and writes "Failed"), without paid API calls
+            env.pop("OPENAI_API_KEY", None)
+            env.pop("BRAVE_API_KEY", None)
+        self._log = open(self.log_path, "w")
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "src.services.loadtest", "serve", "--backend", backend, "--size", size,
+             "--port", str(port), "--fake-port", str(self.fake_port), "--latency-ms", str(latency_ms)],
+            env=env, stdout=self._log, stderr=subprocess.STDOUT,
+        )
+
+    def wait_ready(self, timeout: float = SERVER_START_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"API server exited with code {self.proc.returncode}; see {self.log_path}")
+            try:
+                if httpx.get(f"{self.url}/", timeout=2).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.5)
+        raise RuntimeError(f"API server did not start within {timeout:.0f}s; see {self.log_path}")
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        self._log.close()
+
+
+# -----------------------------------------------------------------------------
+# Virtual users
+# -----------------------------------------------------------------------------
+
+class Recorder:
+    """Latencies and outcomes per action."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    def record(self, action: str, ms: float, outcome: str):
+        self.latencies.setdefault(action, []).append(ms)
+        counts = self.statuses.setdefault(action, {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    def summary(self, seconds: float) -> Dict[str, Dict[str, Any]]:
+        out = {}
+        for action, times in sorted(self.latencies.items()):
+            ordered = sorted(times)
+            statuses = self.statuses[action]
+            errors = sum(n for outcome, n in statuses.items() if not outcome.startswith(("2", "3")))
+            out[action] = {
+                "requests": len(ordered),
+                "rps": round(len(ordered) / seconds, 2),
+                "p50_ms": round(_percentile(ordered, 0.50), 1),
+                "p95_ms": round(_percentile(ordered, 0.95), 1),
+                "p99_ms": round(_percentile(ordered, 0.99), 1),
+                "errors": errors,
+                "error_rate": round(errors / len(ordered), 4),
+                "statuses": statuses,
+            }
+        return out
+
+
+class DashboardUser:
+    """One simulated dashboard session."""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, lead_ids: List[str],
+                 opp_ids: List[str], think_ms: float, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.lead_ids = lead_ids
+        self.opp_ids = opp_ids
+        self.think_ms = think_ms
+        self.rng = rng
+        self.etags: Dict[str, str] = {}
+
+    async def _call(self, action: str, method: str, path: str, **kwargs):
+        headers = {}
+        if method == "GET" and path in self.etags:
+            headers["If-None-Match"] = self.etags[path]
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, headers=headers, **kwargs)
+            outcome = str(response.status_code)
+            if method == "GET" and response.headers.get("etag"):
+                self.etags[path] = response.headers["etag"]
+        except httpx.HTTPError as e:
+            response, outcome = None, type(e).__name__
+        self.recorder.record(action, (time.perf_counter() - started) * 1000, outcome)
+        return response
+
+    async def act(self, action: str):
+        rng = self.rng
+        if action == "poll_dashboard":
+            await self._call(action, "GET", "/api/dashboard")
+        elif action == "poll_pipeline":
+            await self._call(action, "GET", "/api/pipeline")
+        elif action == "list_leads":
+            await self._call(action, "GET", "/api/leads")
+        elif action == "search":
+            await self._call(action, "GET", "/api/search", params={"q": rng.choice(SEARCH_TERMS)})
+        elif action == "move_stage" and self.opp_ids:
+            await self._call(action, "PATCH", f"/api/opportunities/{rng.choice(self.opp_ids)}/stage",
+                             json={"stage": rng.choice(STAGES)})
+        elif action == "log_activity" and self.lead_ids:
+            await self._call(action, "POST", "/api/activities", json={
+                "lead_id": rng.choice(self.lead_ids), "type": rng.choice(ACTIVITY_TYPES),
+                "subject": f"Load test {rng.randrange(10**6)}"})
+        elif action == "create_lead":
+            response = await self._call(action, "POST", "/api/leads", json={
+                "company_name": f"Loadtest Co {rng.randrange(10**6)}", "contact_name": "Load Tester"})
+            if response is not None and response.status_code == 201:
+                self.lead_ids.append(response.json()["lead_id"])
+
+    async def run(self, until: float):
+        actions, weights = zip(*ACTION_WEIGHTS.items())
+        while time.monotonic() < until:
+            await self.act(self.rng.choices(actions, weights)[0])
+            await asyncio.sleep(self.rng.expovariate(1000 / self.think_ms) if self.think_ms else 0)
+
+
+# -----------------------------------------------------------------------------
+# Runner
+# -----------------------------------------------------------------------------
+
+async def _google_requests(client: httpx.AsyncClient, fake_url: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(requests, rate limited) counted by the fake Google server so far."""
+    if not fake_url:
+        return None
+    stats = (await client.get(f"{fake_url}/_fake/stats")).json()
+    return stats["total_requests"], stats["total_rate_limited"]
+
+
+async def _run(url: str, fake_url: Optional[str], users: int, duration: float, ramp: float,
+               think_ms: float, token: str, seed: int) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=users * 2, max_keepalive_connections=users * 2)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=REQUEST_TIMEOUT) as client:
+        lead_ids = [l["lead_id"] for l in (await client.get("/api/leads")).json()["leads"]]
+        opp_ids = [o["opp_id"] for o in (await client.get("/api/opportunities")).json()["opportunities"]]
+
+        # Calibration: each action alone, counting the Google requests it causes
+        per_action: Dict[str, Optional[float]] = {}
+        calibration = Recorder()
+        probe = DashboardUser(client, calibration, lead_ids, opp_ids, 0, random.Random(seed))
+        for action in ACTION_WEIGHTS:
+            before = await _google_requests(client, fake_url)
+            for _ in range(CALIBRATION_RUNS):
+                await probe.act(action)
+            after = await _google_requests(client, fake_url)
+            per_action[action] = round((after[0] - before[0]) / CALIBRATION_RUNS, 2) if before else None
+
+        recorder = Recorder()
+        before = await _google_requests(client, fake_url)
+        started = time.monotonic()
+        until = started + duration
+
+        async def start_user(i: int):
+            await asyncio.sleep(ramp * i / max(users, 1))
+            await DashboardUser(client, recorder, lead_ids, opp_ids, think_ms, random.Random(seed + i + 1)).run(until)
+
+        await asyncio.gather(*(start_user(i) for i in range(users)))
+        elapsed = time.monotonic() - started
+        after = await _google_requests(client, fake_url)
+
+    actions = recorder.summary(elapsed)
+    total = sum(a["requests"] for a in actions.values())
+    errors = sum(a["errors"] for a in actions.values())
+    everything = sorted(t for times in recorder.latencies.values() for t in times)
+    report = {
+        "url": url,
+        "users": users,
+        "duration_s": round(elapsed, 1),
+        "think_ms": think_ms,
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "p50_ms": round(_percentile(everything, 0.50), 1) if everything else None,
+        "p95_ms": round(_percentile(everything, 0.95), 1) if everything else None,
+        "p99_ms": round(_percentile(everything, 0.99), 1) if everything else None,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "actions": actions,
+        "google_requests_per_action": per_action,
+    }
+    if before and after:
+        report["google_requests"] = after[0] - before[0]
+        report["google_rate_limited"] = after[1] - before[1]
+        report["google_requests_per_request"] = round((after[0] - before[0]) / total, 3) if total else None
+    return report
+
+
+def run(url: Optional[str] = None, backend: str = "mock", size: str = "10k", users: int = DEFAULT_USERS,
+        duration: float = DEFAULT_DURATION, ramp: float = 10.0, think_ms: float = DEFAULT_THINK_MS,
+        latency_ms: float = 0.0, port: int = 8099, fake_url: Optional[str] = None, token: str = "loadtest",
+        live_enrichment: bool = False, seed: int = 0) -> Dict[str, Any]:
+    """
+    Run a load test. Without `url`, an API server is started on `port` (and
+    the fake Google API on `port + 1` for the fake backend) and stopped after.
+    """
+    if backend not in BACKENDS or size not in SIZES:
+        raise ValueError(f"Unknown backend or size: {backend}, {size}")
+    server = None
+    if url is None:
+        print(f"[LoadTest] Starting API ({backend} backend, {size} leads) on port {port}...")
+        server = ServerProcess(backend, size, port, latency_ms, live_enrichment)
+        url, fake_url = server.url, server.fake_url
+    try:
+        if server is not None:
+            server.wait_ready()
+            print(f"[LoadTest] API ready; server log at {server.log_path}")
+        report = asyncio.run(_run(url, fake_url, users, duration, ramp, think_ms, token, seed))
+    finally:
+        if server is not None:
+            server.stop()
+    report.update({"backend": backend if server is not None else None,
+                   "size": size if server is not None else None, "latency_ms": latency_ms})
+    return report
+
+
+if __name__ == "__main__":
+    # Entry point of the subprocess started by ServerProcess
+    parser = argparse.ArgumentParser(description="Serve the API on a synthetic dataset for load tests.")
+    parser.add_argument("command", choices=["serve"])
+    parser.add_argument("--backend", choices=BACKENDS, default="mock")
+    parser.add_argument("--size", choices=list(SIZES), default="10k")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--fake-port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    serve(args.backend, args.size, args.port, args.fake_port, args.latency_ms)
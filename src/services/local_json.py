@@ -10,10 +10,15 @@ class MockSheetManager:
     """
     A mock implementation of SheetManager that reads/writes to a local JSON file.
     Mimics the interface of src.sheets.SheetManager.
+
+    With `persist=False` writes stay in memory and nothing is printed (used by
+    the benchmarks); `sheets` seeds the data instead of reading `file_path`.
     """
-    def __init__(self, file_path: str = "data/mock_crm.json"):
+    def __init__(self, file_path: str = "data/mock_crm.json", persist: bool = True,
+                 sheets: Optional[dict] = None):
         self.file_path = file_path
-        self.sheets = self._load_data()
+        self.persist = persist
+        self.sheets = sheets if sheets is not None else self._load_data()
         self.gc = None # Public property compatibility
 
     def _load_data(self) -> dict:
@@ -30,10 +35,16 @@ class MockSheetManager:
 
     def _save_data(self):
         """Save data to JSON file."""
+        if not self.persist:
+            return
         os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
         with open(self.file_path, "w") as f:
             json.dump(self.sheets, f, indent=2, default=str)
 
+    def _log(self, message: str):
+        if self.persist:
+            console.print(message)
+
     def list_files(self):
         """Mock listing files."""
         # Return a list of dicts mimicking Google Drive file objects
@@ -108,11 +119,17 @@ class MockSheetManager:
         
         return MockSpreadsheet(self, target_name)
 
+    def list_worksheets(self, sheet_name: str) -> List[str]:
+        """Worksheet titles of a mock sheet."""
+        return list(self.sheets.get(sheet_name, {}))
+
     def read_data(self, sheet_name: str, worksheet_name: str = "Sheet1"):
         """Reads mock data."""
         if sheet_name not in self.sheets:
             return None
-        return self.sheets[sheet_name].get(worksheet_name, [])
+        # Fresh lists, like a real fetch: callers (CRMManager's cache) mutate
+        # what they get back, which used to apply deletes and appends twice
+        return [list(row) for row in self.sheets[sheet_name].get(worksheet_name, [])]
 
     def create_sheet(self, title: str):
         """Creates a new mock sheet."""
@@ -139,10 +156,62 @@ class MockSheetManager:
         while len(ws_data) <= idx:
             ws_data.append([])
             
-        ws_data[idx] = row_data
+        ws_data[idx] = list(row_data)
+        self.sheets[sheet_name][worksheet_name] = ws_data
+        self._save_data()
+        self._log(f"[green]MOCK: Updated row {row_index} in {sheet_name}[/green]")
+
+    def update_rows(self, sheet_name: str, rows: dict, worksheet_name: str = "Sheet1"):
+        """Updates many rows (keyed by 1-based row index), saving once."""
+        if sheet_name not in self.sheets or not rows: return
+        ws_data = self.sheets[sheet_name].get(worksheet_name, [])
+
+        for row_index, row_data in rows.items():
+            idx = row_index - 1
+            while len(ws_data) <= idx:
+                ws_data.append([])
+            ws_data[idx] = list(row_data)
+        self.sheets[sheet_name][worksheet_name] = ws_data
+        self._save_data()
+        self._log(f"[green]MOCK: Updated {len(rows)} rows in {sheet_name}[/green]")
+
+    def update_range(self, sheet_name: str, range_name: str, values: list, worksheet_name: str = "Sheet1"):
+        """Writes a block of values to an A1 range like 'O2:P500'."""
+        if sheet_name not in self.sheets: return
+        ws_data = self.sheets[sheet_name].get(worksheet_name, [])
+
+        start = range_name.split(":", 1)[0]
+        letters = "".join(ch for ch in start if ch.isalpha()).upper()
+        col = 0
+        for ch in letters:
+            col = col * 26 + (ord(ch) - 64)
+        col -= 1
+        row_idx = int("".join(ch for ch in start if ch.isdigit()) or "1") - 1
+
+        for offset, block_row in enumerate(values):
+            idx = row_idx + offset
+            while len(ws_data) <= idx:
+                ws_data.append([])
+            row = list(ws_data[idx])
+            if len(row) < col + len(block_row):
+                row.extend([""] * (col + len(block_row) - len(row)))
+            row[col:col + len(block_row)] = block_row
+            ws_data[idx] = row
         self.sheets[sheet_name][worksheet_name] = ws_data
         self._save_data()
-        console.print(f"[green]MOCK: Updated row {row_index} in {sheet_name}[/green]")
+        self._log(f"[green]MOCK: Updated range {range_name} in {sheet_name}[/green]")
+
+    def update_ranges(self, sheet_name: str, ranges: dict, worksheet_name: str = "Sheet1"):
+        """Writes several A1 ranges (range -> values), saving once."""
+        if sheet_name not in self.sheets or not ranges: return
+        persist, self.persist = self.persist, False  # write (and log) once, not per range
+        try:
+            for range_name, values in ranges.items():
+                self.update_range(sheet_name, range_name, values, worksheet_name)
+        finally:
+            self.persist = persist
+        self._save_data()
+        self._log(f"[green]MOCK: Updated {len(ranges)} ranges in {sheet_name}[/green]")
 
     def append_row(self, sheet_name: str, row_data: list, worksheet_name: str = "Sheet1"):
         """Appends a row."""
@@ -150,14 +219,21 @@ class MockSheetManager:
              self.sheets[sheet_name] = {}
              
         ws_data = self.sheets[sheet_name].get(worksheet_name, [])
-        ws_data.append(row_data)
+        ws_data.append(list(row_data))
         self.sheets[sheet_name][worksheet_name] = ws_data
         self._save_data()
-        console.print(f"[green]MOCK: Appended row to {sheet_name}[/green]")
+        self._log(f"[green]MOCK: Appended row to {sheet_name}[/green]")
 
     def append_rows(self, sheet_name: str, rows_data: list, worksheet_name: str = "Sheet1"):
-        for row in rows_data:
-            self.append_row(sheet_name, row, worksheet_name)
+        """Appends many rows, saving once."""
+        if sheet_name not in self.sheets:
+             self.sheets[sheet_name] = {}
+
+        ws_data = self.sheets[sheet_name].get(worksheet_name, [])
+        ws_data.extend(list(row) for row in rows_data)
+        self.sheets[sheet_name][worksheet_name] = ws_data
+        self._save_data()
+        self._log(f"[green]MOCK: Appended {len(rows_data)} rows to {sheet_name}[/green]")
 
     def clear_range(self, sheet_name: str, range_name: str, worksheet_name: str = "Sheet1"):
         pass # Todo
@@ -171,7 +247,19 @@ class MockSheetManager:
             ws_data.pop(idx)
             self.sheets[sheet_name][worksheet_name] = ws_data
             self._save_data()
-            console.print(f"[green]MOCK: Deleted row {row_index}[/green]")
+            self._log(f"[green]MOCK: Deleted row {row_index}[/green]")
+
+    def delete_rows(self, sheet_name: str, row_indices: list, worksheet_name: str = "Sheet1"):
+        """Deletes many rows (1-based indices), saving once."""
+        if sheet_name not in self.sheets or not row_indices: return
+        ws_data = self.sheets[sheet_name].get(worksheet_name, [])
+
+        for idx in sorted({i - 1 for i in row_indices}, reverse=True):
+            if 0 <= idx < len(ws_data):
+                ws_data.pop(idx)
+        self.sheets[sheet_name][worksheet_name] = ws_data
+        self._save_data()
+        self._log(f"[green]MOCK: Deleted {len(set(row_indices))} rows in {sheet_name}[/green]")
 
 
 class MockWorksheet:
@@ -0,0 +1,229 @@
+"""
+Metrics - a small in-process registry rendered in the Prometheus text format.
+
+Counters and histograms are recorded inline (a dict lookup and a few integer
+additions under a lock, cheap enough to leave on everywhere). Values that
+already live elsewhere (session counts, job queue depth, outbound client and
+enrichment cache stats) are read by collector callbacks only when `/metrics`
+is scraped.
+"""
+import bisect
+import functools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .timing import span
+
+# Latency buckets (seconds) shared by every histogram
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# A collected sample: (metric name, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels (label values passed positionally)."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, dict(zip(self.labelnames, labels)), value) for labels, value in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def time(self, *labels: str) -> "_Timer":
+        """Context manager observing the duration of its block."""
+        return _Timer(self, labels)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        out: List[Sample] = []
+        for labels, counts, total in items:
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                out.append((f"{self.name}_bucket", {**base, "le": _format_value(bound)}, cumulative))
+            out.append((f"{self.name}_sum", base, total))
+            out.append((f"{self.name}_count", base, cumulative))
+        return out
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class Registry:
+    """Holds metrics and scrape-time collectors; renders the exposition text."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        # name -> (kind, help, callback returning samples)
+        self._collectors: Dict[str, Tuple[str, str, Callable[[], Iterable[Sample]]]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing  # module reloads re-register the same metric
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, name: str, kind: str, help: str, callback: Callable[[], Iterable[Sample]]):
+        """Register a callback producing samples for `name` at scrape time."""
+        with self._lock:
+            self._collectors[name] = (kind, help, callback)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for name, (kind, help, callback) in collectors:
+            try:
+                samples = list(callback())
+            except Exception as e:
+                print(f"[Metrics] Collector {name} failed: {e}")
+                continue
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# -----------------------------------------------------------------------------
+# Metrics recorded inline across the codebase
+# -----------------------------------------------------------------------------
+
+HTTP_REQUESTS = registry.counter(
+    "crm_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+HTTP_LATENCY = registry.histogram(
+    "crm_http_request_seconds", "HTTP request latency by route.", ("method", "route"))
+
+SHEETS_CALLS = registry.counter(
+    "crm_sheets_calls_total", "SheetManager calls by method and outcome.", ("method", "outcome"))
+SHEETS_LATENCY = registry.histogram(
+    "crm_sheets_call_seconds", "SheetManager call latency (including retries) by method.", ("method",))
+GOOGLE_RATE_LIMITED = registry.counter(
+    "crm_google_rate_limited_total", "Google API rate-limit responses (429/503) by call.", ("call",))
+
+CACHE_LOOKUPS = registry.counter(
+    "crm_cache_lookups_total", "CRMManager worksheet cache lookups by result (hit, miss, expired).",
+    ("worksheet", "result"))
+CACHE_AGE = registry.histogram(
+    "crm_cache_hit_age_seconds", "Age of worksheet data served from the CRMManager cache.", ("worksheet",),
+    buckets=(1, 2, 5, 10, 15, 20, 25, 30, 60))
+
+
+def timed_call(calls: Counter, latency: Histogram, name: Optional[str] = None, span_name: Optional[str] = None):
+    """
+    Decorator counting calls (ok/error) and observing their latency; with
+    `span_name`, the time also goes into that request timing span.
+    """
+    def decorator(func: Callable):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                if span_name is None:
+                    result = func(*args, **kwargs)
+                else:
+                    with span(span_name):
+                        result = func(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                latency.observe(time.perf_counter() - started, label)
+                calls.inc(label, outcome)
+        return wrapper
+    return decorator
+
+
+sheets_metrics = timed_call(SHEETS_CALLS, SHEETS_LATENCY, span_name="sheets")
@@ -0,0 +1,316 @@
+"""
+Outbound clients - one shared, pooled path for calls to OpenAI and Brave Search.
+
+All outbound API traffic runs on a single background asyncio loop with async
+clients (httpx / AsyncOpenAI) that keep connections alive between calls.
+Every call goes through its provider's concurrency semaphore, has a timeout
+(and optionally an absolute deadline), and is counted in per-provider
+latency/error metrics.
+
+Sync code (services, worker threads) uses the blocking wrappers (`chat`,
+`get_json`, `run_many`); fan-out like batch scoring submits many calls at
+once and lets the loop overlap them instead of tying up a thread per call.
+
+Base URLs come from the environment (`OPENAI_BASE_URL`, `BRAVE_SEARCH_URL`),
+so tests can point everything at a local fake HTTP server.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from .metrics import registry
+from .timing import span
+
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # None = api.openai.com
+BRAVE_SEARCH_URL = os.getenv("BRAVE_SEARCH_URL", "https://api.search.brave.com/res/v1/web/search")
+
+CONNECT_TIMEOUT = 5.0  # seconds
+POOL_MAX_CONNECTIONS = int(os.getenv("OUTBOUND_MAX_CONNECTIONS", "32"))
+POOL_MAX_KEEPALIVE = 16
+KEEPALIVE_EXPIRY = 30.0
+
+# Per-provider defaults: (max concurrent calls, timeout seconds)
+PROVIDER_DEFAULTS = {
+    "openai": (int(os.getenv("OPENAI_CONCURRENCY", "8")), float(os.getenv("OPENAI_TIMEOUT", "30"))),
+    "brave": (int(os.getenv("BRAVE_CONCURRENCY", "4")), float(os.getenv("BRAVE_TIMEOUT", "10"))),
+}
+
+# Latency histogram bucket upper bounds (seconds)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call's deadline passed before (or while) it ran."""
+
+
+class _Provider:
+    """Concurrency limit and metrics for one upstream API."""
+
+    def __init__(self, name: str, concurrency: int, timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.semaphore: Optional[asyncio.Semaphore] = None  # created on the loop
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, seconds: float, error: bool = False, timed_out: bool = False):
+        with self.lock:
+            self.requests += 1
+            self.errors += error
+            self.timeouts += timed_out
+            self.latency_sum += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self.latency_buckets[i] += 1
+                    break
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "in_flight": self.in_flight,
+                "concurrency": self.concurrency,
+                "latency_seconds_sum": round(self.latency_sum, 3),
+                "latency_buckets": dict(zip(LATENCY_BUCKETS, self.latency_buckets)),
+                "avg_latency_ms": round(self.latency_sum * 1000 / self.requests, 1) if self.requests else 0.0,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+
+class OutboundClients:
+    """Shared event loop, pooled async clients and per-provider limits."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._openai: Dict[str, Any] = {}  # api key -> AsyncOpenAI
+        self.providers = {name: _Provider(name, *defaults) for name, defaults in PROVIDER_DEFAULTS.items()}
+
+    # -------------------------------------------------------------------------
+    # Loop & clients (all created lazily)
+    # -------------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name="outbound-loop", daemon=True)
+                self._thread.start()
+                self._loop = loop
+            return self._loop
+
+    def _http_client(self) -> httpx.AsyncClient:
+        """Pooled keep-alive HTTP client. Only called on the loop."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(None, connect=CONNECT_TIMEOUT),  # per-call timeouts are applied on top
+                limits=httpx.Limits(
+                    max_connections=POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self._http
+
+    def _openai_client(self, api_key: str):
+        """AsyncOpenAI sharing the pooled HTTP client. Only called on the loop."""
+        client = self._openai.get(api_key)
+        if client is None:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(api_key=api_key, base_url=OPENAI_BASE_URL, http_client=self._http_client())
+            self._openai[api_key] = client
+        return client
+
+    def close(self, timeout: float = 5.0):
+        """Close pooled connections and stop the loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def _close():
+            if self._http is not None:
+                await self._http.aclose()
+            self._http = None
+            self._openai.clear()
+            for p in self.providers.values():
+                p.semaphore = None  # bound to this loop
+
+        try:
+            asyncio.run_coroutine_threadsafe(_close(), loop).result(timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+
+    # -------------------------------------------------------------------------
+    # Core: run a call under its provider's limits
+    # -------------------------------------------------------------------------
+
+    async def _guarded(self, provider: str, make_call: Callable[[], Awaitable[Any]],
+                       timeout: Optional[float], deadline: Optional[float]) -> Any:
+        p = self.providers[provider]
+        if p.semaphore is None:
+            p.semaphore = asyncio.Semaphore(p.concurrency)
+        limit = timeout or p.timeout
+
+        async with p.semaphore:
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    p.record(0.0, error=True, timed_out=True)
+                    raise DeadlineExceeded(f"{provider} call deadline passed while queued")
+                limit = min(limit, remaining)
+            with p.lock:
+                p.in_flight += 1
+            started = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(make_call(), timeout=limit)
+            except asyncio.TimeoutError:
+                p.record(time.perf_counter() - started, error=True, timed_out=True)
+                raise DeadlineExceeded(f"{provider} call timed out after {limit:.1f}s")
+            except Exception:
+                p.record(time.perf_counter() - started, error=True)
+                raise
+            finally:
+                with p.lock:
+                    p.in_flight -= 1
+            p.record(time.perf_counter() - started)
+            return result
+
+    def _submit(self, coro) -> "asyncio.Future":
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Blocking outbound call made from the outbound loop itself")
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run(self, provider: str, make_call: Callable[[], Awaitable[Any]],
+            timeout: Optional[float] = None, deadline: Optional[float] = None) -> Any:
+        """Run one call on the shared loop and block until it finishes."""
+        with span("outbound"):
+            return self._submit(self._guarded(provider, make_call, timeout, deadline)).result()
+
+    def run_many(self, provider: str, make_calls: List[Callable[[], Awaitable[Any]]],
+                 timeout: Optional[float] = None, deadline: Optional[float] = None) -> List[Any]:
+        """
+        Run many calls concurrently (bounded by the provider's semaphore).
+        Returns results in order; a failed call's slot holds its exception.
+        """
+        async def _all():
+            return await asyncio.gather(
+                *(self._guarded(provider, make_call, timeout, deadline) for make_call in make_calls),
+                return_exceptions=True,
+            )
+        if not make_calls:
+            return []
+        with span("outbound"):
+            return self._submit(_all()).result()
+
+    # -------------------------------------------------------------------------
+    # Provider helpers
+    # -------------------------------------------------------------------------
+
+    def chat_call(self, api_key: str, **kwargs) -> Callable[[], Awaitable[Any]]:
+        """Factory for an OpenAI chat completion, for use with `run`/`run_many`."""
+        async def _call():
+            response = await self._openai_client(api_key).chat.completions.create(**kwargs)
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                p = self.providers["openai"]
+                with p.lock:
+                    p.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+                    p.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+            return response
+        return _call
+
+    def chat(self, api_key: str, timeout: Optional[float] = None, deadline: Optional[float] = None, **kwargs):
+        """Blocking OpenAI chat completion through the shared client."""
+        return self.run("openai", self.chat_call(api_key, **kwargs), timeout, deadline)
+
+    def get_json(self, provider: str, url: str, headers: Optional[Dict[str, str]] = None,
+                 params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+                 deadline: Optional[float] = None) -> Any:
+        """Blocking GET returning parsed JSON; raises for HTTP errors."""
+        async def _call():
+            response = await self._http_client().get(url, headers=headers, params=params)
+            response.raise_for_status()
+            return response.json()
+        return self.run(provider, _call, timeout, deadline)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {name: p.snapshot() for name, p in self.providers.items()}
+
+
+outbound = OutboundClients()
+
+
+def _provider_samples(name: str, key: str):
+    return lambda: [(name, {"provider": p}, m[key]) for p, m in outbound.metrics().items()]
+
+
+def _latency_samples():
+    samples = []
+    for provider, m in outbound.metrics().items():
+        cumulative = 0
+        for bound, count in m["latency_buckets"].items():
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else str(bound)
+            samples.append(("crm_outbound_request_seconds_bucket", {"provider": provider, "le": le}, cumulative))
+        samples.append(("crm_outbound_request_seconds_sum", {"provider": provider}, m["latency_seconds_sum"]))
+        samples.append(("crm_outbound_request_seconds_count", {"provider": provider}, cumulative))
+    return samples
+
+
+def _token_samples():
+    samples = []
+    for provider, m in outbound.metrics().items():
+        samples.append(("crm_outbound_tokens_total", {"provider": provider, "kind": "prompt"}, m["prompt_tokens"]))
+        samples.append(("crm_outbound_tokens_total", {"provider": provider, "kind": "completion"}, m["completion_tokens"]))
+    return samples
+
+
+registry.collector("crm_outbound_requests_total", "counter", "Outbound API calls by provider.",
+                   _provider_samples("crm_outbound_requests_total", "requests"))
+registry.collector("crm_outbound_errors_total", "counter", "Failed outbound API calls (including timeouts).",
+                   _provider_samples("crm_outbound_errors_total", "errors"))
+registry.collector("crm_outbound_timeouts_total", "counter", "Outbound API calls that hit their timeout or deadline.",
+                   _provider_samples("crm_outbound_timeouts_total", "timeouts"))
+registry.collector("crm_outbound_in_flight", "gauge", "Outbound API calls currently running.",
+                   _provider_samples("crm_outbound_in_flight", "in_flight"))
+registry.collector("crm_outbound_request_seconds", "histogram", "Outbound API call latency by provider.",
+                   _latency_samples)
+registry.collector("crm_outbound_tokens_total", "counter", "LLM tokens used, by provider and kind.",
+                   _token_samples)
+
+
+class LLMClient:
+    """Per-API-key handle the services hold; every call goes through `outbound`."""
+
+    def __init__(self, api_key: str, clients: OutboundClients = outbound):
+        self.api_key = api_key
+        self.clients = clients
+
+    def chat(self, timeout: Optional[float] = None, deadline: Optional[float] = None, **kwargs):
+        """One chat completion (blocking)."""
+        return self.clients.chat(self.api_key, timeout=timeout, deadline=deadline, **kwargs)
+
+    def chat_many(self, requests: List[Dict[str, Any]], timeout: Optional[float] = None,
+                  deadline: Optional[float] = None) -> List[Any]:
+        """Many chat completions concurrently; failed slots hold the exception."""
+        calls = [self.clients.chat_call(self.api_key, **kwargs) for kwargs in requests]
+        return self.clients.run_many("openai", calls, timeout, deadline)
@@ -0,0 +1,179 @@
+"""
+Profiling helpers for the debug endpoints.
+
+- `SamplingProfiler` walks every thread's stack at a fixed interval and
+  counts collapsed stacks (`root;...;leaf count`), the input format of
+  flamegraph.pl, speedscope and inferno. Sampling from a side thread costs
+  the worker little, so it is safe to run against production traffic.
+- `pstats_summary` renders a cProfile run as the usual pstats text.
+- `start_tracemalloc` / `tracemalloc_diff` compare the heap against a
+  baseline snapshot to show which allocation sites are growing.
+
+Only one sampling run may be active per process at a time.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+DEFAULT_INTERVAL = 0.01  # seconds between samples (100 Hz)
+MAX_PROFILE_SECONDS = 300
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "10"))
+
+# Leaf frames of threads parked waiting for work; dropped unless idle=True
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+}
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if path.startswith(_ROOT):
+        path = os.path.relpath(path, _ROOT)
+    elif "site-packages" in path:
+        path = path.split("site-packages" + os.sep, 1)[1]
+    else:
+        path = os.path.basename(path)
+    # ';' separates frames in the collapsed format
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a sampling run is requested while another is in progress."""
+
+
+class SamplingProfiler:
+    """Samples every thread's Python stack and aggregates collapsed stacks."""
+
+    _running = threading.Lock()
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, idle: bool = False):
+        self.interval = interval
+        self.idle = idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def _sample(self, own_id: int, names: Dict[int, str]):
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            code = frame.f_code
+            if not self.idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, f"thread-{thread_id}"))
+            labels.reverse()
+            self.stacks[";".join(labels)] += 1
+        self.samples += 1
+
+    def run(self, seconds: float) -> "SamplingProfiler":
+        """Sample for `seconds` from the calling thread; raises ProfilerBusy if already running."""
+        if not self._running.acquire(blocking=False):
+            raise ProfilerBusy("A profiling run is already in progress")
+        try:
+            own_id = threading.get_ident()
+            deadline = time.perf_counter() + min(seconds, MAX_PROFILE_SECONDS)
+            names: Dict[int, str] = {}
+            while True:
+                started = time.perf_counter()
+                if started >= deadline:
+                    break
+                if self.samples % 100 == 0:  # threads come and go; refresh names now and then
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                self._sample(own_id, names)
+                time.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
+        finally:
+            self._running.release()
+        return self
+
+    def collapsed(self) -> str:
+        """The samples in collapsed-stack format, heaviest stacks first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def pstats_summary(profiler: cProfile.Profile, limit: int = 40, sort: str = "cumulative") -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+# -----------------------------------------------------------------------------
+# tracemalloc
+# -----------------------------------------------------------------------------
+
+_baseline: Optional[tracemalloc.Snapshot] = None
+_baseline_at: Optional[float] = None
+
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def start_tracemalloc() -> Dict[str, Any]:
+    """Start tracing if needed and take a fresh baseline snapshot."""
+    global _baseline, _baseline_at
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        print(f"[Profiling] tracemalloc started ({TRACEMALLOC_FRAMES} frames)")
+    _baseline = _snapshot()
+    _baseline_at = time.time()
+    current, peak = tracemalloc.get_traced_memory()
+    return {"tracing": True, "baseline_at": _baseline_at,
+            "traced_mb": round(current / 1e6, 2), "peak_mb": round(peak / 1e6, 2)}
+
+
+def stop_tracemalloc():
+    global _baseline, _baseline_at
+    _baseline = _baseline_at = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        print("[Profiling] tracemalloc stopped")
+
+
+def tracemalloc_diff(limit: int = 25, group_by: str = "lineno") -> Dict[str, Any]:
+    """
+    Allocation sites that grew the most since the baseline.
+    Raises ValueError if no baseline was taken.
+    """
+    if _baseline is None or not tracemalloc.is_tracing():
+        raise ValueError("No tracemalloc baseline; take a snapshot first")
+    stats = _snapshot().compare_to(_baseline, group_by)
+    current, peak = tracemalloc.get_traced_memory()
+    top: List[Dict[str, Any]] = []
+    for stat in stats[:limit]:
+        top.append({
+            "where": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback][:TRACEMALLOC_FRAMES],
+            "size_diff_kb": round(stat.size_diff / 1024, 1),
+            "size_kb": round(stat.size / 1024, 1),
+            "count_diff": stat.count_diff,
+            "count": stat.count,
+        })
+    return {
+        "baseline_at": _baseline_at,
+        "seconds_since_baseline": round(time.time() - _baseline_at, 1),
+        "traced_mb": round(current / 1e6, 2),
+        "peak_mb": round(peak / 1e6, 2),
+        "group_by": group_by,
+        "top": top,
+    }
@@ -0,0 +1,92 @@
+"""
+Startup report - how long cold imports of the API and CLI take, and why.
+
+Each target is imported in a fresh interpreter with `python -X importtime`
+(several runs, median kept), so the numbers match what a new container or a
+CLI invocation pays. The report lists the slowest modules by cumulative
+import time and flags heavy dependencies that should only be imported when
+first used (numpy, the OpenAI SDK, googleapiclient).
+"""
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# name -> (module imported, budget in ms)
+TARGETS = {
+    "api": ("api.server", float(os.getenv("STARTUP_BUDGET_API_MS", "1200"))),
+    "cli": ("src.main", float(os.getenv("STARTUP_BUDGET_CLI_MS", "500"))),
+}
+DEFAULT_RUNS = 3
+# Loaded on first use only; importing any of these at startup is a regression
+DEFERRED_MODULES = ("numpy", "openai", "googleapiclient")
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self us, cumulative us, depth) per `-X importtime` line."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:  # the header line
+            continue
+    return rows
+
+
+def import_profile(module: str) -> List[Tuple[str, int, int, int]]:
+    """Import `module` in a fresh interpreter and return its import timings."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr.splitlines()[-1] if result.stderr else ''}")
+    return _parse_importtime(result.stderr)
+
+
+def measure(module: str, runs: int = DEFAULT_RUNS, top: int = 15) -> Dict[str, Any]:
+    """Median cold import time of `module`, its slowest imports and any deferred modules it loads."""
+    profiles = [import_profile(module) for _ in range(runs)]
+    totals = [next((cum for name, _, cum, _ in rows if name == module), 0) for rows in profiles]
+    median_run = profiles[totals.index(sorted(totals)[len(totals) // 2])]
+    # The target's import tree: the lines just before it that are nested deeper
+    end = next(i for i, row in enumerate(median_run) if row[0] == module)
+    start = end
+    while start > 0 and median_run[start - 1][3] > median_run[end][3]:
+        start -= 1
+    tree = median_run[start:end]
+    # Its direct imports and theirs, slowest first
+    slowest = sorted((row for row in tree if row[3] <= median_run[end][3] + 2),
+                     key=lambda row: row[2], reverse=True)[:top]
+    loaded = {name.split(".")[0] for name, _, _, _ in tree}
+    return {
+        "module": module,
+        "import_ms": round(statistics.median(totals) / 1000, 1),
+        "runs_ms": [round(t / 1000, 1) for t in totals],
+        "slowest": [{"module": name, "cumulative_ms": round(cum / 1000, 1), "self_ms": round(own / 1000, 1)}
+                    for name, own, cum, _ in slowest],
+        "deferred_loaded": sorted(m for m in DEFERRED_MODULES if m in loaded),
+    }
+
+
+def report(targets: Optional[Sequence[str]] = None, runs: int = DEFAULT_RUNS, top: int = 15,
+           budgets: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Measure each target against its budget; `ok` is False if any is over or loads a deferred module."""
+    out: Dict[str, Any] = {"python": sys.version.split()[0], "targets": {}}
+    for name in targets or TARGETS:
+        module, budget = TARGETS[name]
+        if budgets and budgets.get(name) is not None:
+            budget = budgets[name]
+        result = measure(module, runs, top)
+        result["budget_ms"] = budget
+        result["over_budget"] = result["import_ms"] > budget
+        out["targets"][name] = result
+    out["ok"] = not any(t["over_budget"] or t["deferred_loaded"] for t in out["targets"].values())
+    return out
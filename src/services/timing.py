@@ -0,0 +1,88 @@
+"""
+Request timing - request-scoped spans for the Server-Timing header.
+
+The API middleware starts a `RequestTimer` per request and keeps it in a
+context variable, which follows the request into the threadpool. Code on the
+hot paths wraps its work in `span("sheets")`, `span("decode")` and so on;
+outside a request (CLI, background jobs) a span costs one context lookup.
+
+A span that is already open is not counted again when nested (e.g. a
+SheetManager method calling `get_sheet`), so span totals never exceed the
+wall time they cover.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+_current: ContextVar[Optional["RequestTimer"]] = ContextVar("request_timer", default=None)
+
+
+class RequestTimer:
+    """Accumulated duration and count per span name for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, List[float]] = {}  # name -> [seconds, count]
+        self.active: set = set()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            entry = self.spans.get(name)
+            if entry is None:
+                self.spans[name] = [seconds, 1]
+            else:
+                entry[0] += seconds
+                entry[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def breakdown(self) -> Tuple[float, Dict[str, Tuple[float, int]]]:
+        """(total ms, {span: (ms, count)}) with the unaccounted rest as "logic"."""
+        total = self.elapsed()
+        with self._lock:
+            spans = {name: (seconds * 1000, int(count)) for name, (seconds, count) in self.spans.items()}
+        accounted = sum(ms for ms, _ in spans.values())
+        spans["logic"] = (max(0.0, total * 1000 - accounted), 1)
+        return total * 1000, spans
+
+
+class span:
+    """Context manager adding its duration to the current request's `name` span."""
+
+    __slots__ = ("name", "timer", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timer: Optional[RequestTimer] = None
+
+    def __enter__(self):
+        timer = _current.get()
+        if timer is not None and self.name not in timer.active:
+            timer.active.add(self.name)
+            self.timer = timer
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.timer is not None:
+            self.timer.active.discard(self.name)
+            self.timer.add(self.name, time.perf_counter() - self.started)
+            self.timer = None
+        return False
+
+
+def begin_request():
+    """Start timing a request; returns (timer, token) for `end_request`."""
+    timer = RequestTimer()
+    return timer, _current.set(timer)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_timer() -> Optional[RequestTimer]:
+    return _current.get()
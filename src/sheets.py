@@ -1,9 +1,10 @@
 import gspread
 from rich.table import Table
 from rich.console import Console
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from .retry import sheets_api_retry
+from .services.metrics import sheets_metrics
 
 console = Console()
 
@@ -13,6 +14,7 @@ class SheetManager:
         self.gc = gc
         self._sh_cache = {}  # Cache for opened Spreadsheet objects
 
+    @sheets_metrics
     @sheets_api_retry
     def list_files(self):
         """Lists the 50 most recently modified spreadsheets."""
@@ -45,6 +47,7 @@ class SheetManager:
             # Fallback to default if custom request fails (compatibility)
             return self.gc.list_spreadsheet_files()
 
+    @sheets_metrics
     @sheets_api_retry
     def get_sheet(self, name_or_url: str):
         """Opens a spreadsheet by name, URL, or ID (cached)."""
@@ -70,6 +73,16 @@ class SheetManager:
             console.print(f"[red]Spreadsheet '{name_or_url}' not found.[/red]")
             return None
 
+    @sheets_metrics
+    @sheets_api_retry
+    def list_worksheets(self, sheet_name: str) -> List[str]:
+        """Titles of the worksheets in a spreadsheet, in tab order."""
+        sh = self.get_sheet(sheet_name)
+        if not sh:
+            raise gspread.exceptions.SpreadsheetNotFound(sheet_name)
+        return [ws.title for ws in sh.worksheets()]
+
+    @sheets_metrics
     @sheets_api_retry
     def read_data(self, sheet_name: str, worksheet_name: str = "Sheet1"):
         """Reads all records from a worksheet."""
@@ -97,6 +110,7 @@ class SheetManager:
             console.print(f"[red]Worksheet '{worksheet_name}' not found in '{sheet_name}'.[/red]")
             return None
 
+    @sheets_metrics
     @sheets_api_retry
     def create_sheet(self, title: str):
         """Creates a new spreadsheet."""
@@ -104,6 +118,7 @@ class SheetManager:
         console.print(f"[green]Created new sheet: {sh.title} ({sh.url})[/green]")
         return sh
 
+    @sheets_metrics
     @sheets_api_retry
     def update_cell(self, sheet_name: str, cell_address: str, value: str, worksheet_name: str = "Sheet1"):
         """Updates a single cell in a worksheet."""
@@ -116,6 +131,7 @@ class SheetManager:
         except Exception as e:
             console.print(f"[red]Error updating cell: {e}[/red]")
 
+    @sheets_metrics
     @sheets_api_retry
     def update_row(self, sheet_name: str, row_index: int, row_data: list, worksheet_name: str = "Sheet1"):
         """Updates an entire row efficiently."""
@@ -138,6 +154,50 @@ class SheetManager:
             # Important: re-raise to upper layers!
             raise e
 
+    @sheets_metrics
+    @sheets_api_retry
+    def update_rows(self, sheet_name: str, rows: Dict[int, list], worksheet_name: str = "Sheet1"):
+        """Updates many rows (keyed by 1-based row index) in a single batch request."""
+        if not rows:
+            return
+        sh = self.get_sheet(sheet_name)
+        if not sh:
+            raise gspread.exceptions.SpreadsheetNotFound(sheet_name)
+
+        ws = sh.worksheet(worksheet_name)
+        ws.batch_update([
+            {"range": f"A{row_index}", "values": [row_data]}
+            for row_index, row_data in sorted(rows.items())
+        ])
+        console.print(f"[green]Updated {len(rows)} rows in {sheet_name} (Batch)[/green]")
+
+    @sheets_metrics
+    @sheets_api_retry
+    def update_range(self, sheet_name: str, range_name: str, values: List[list], worksheet_name: str = "Sheet1"):
+        """Writes a block of values (e.g. one or two whole columns) in a single request."""
+        sh = self.get_sheet(sheet_name)
+        if not sh:
+            raise gspread.exceptions.SpreadsheetNotFound(sheet_name)
+
+        ws = sh.worksheet(worksheet_name)
+        ws.update(range_name=range_name, values=values)
+        console.print(f"[green]Updated range {range_name} in {sheet_name} ({len(values)} rows)[/green]")
+
+    @sheets_metrics
+    @sheets_api_retry
+    def update_ranges(self, sheet_name: str, ranges: Dict[str, List[list]], worksheet_name: str = "Sheet1"):
+        """Writes several blocks of values (A1 range -> values) in a single batch request."""
+        if not ranges:
+            return
+        sh = self.get_sheet(sheet_name)
+        if not sh:
+            raise gspread.exceptions.SpreadsheetNotFound(sheet_name)
+
+        ws = sh.worksheet(worksheet_name)
+        ws.batch_update([{"range": range_name, "values": values} for range_name, values in ranges.items()])
+        console.print(f"[green]Updated {len(ranges)} ranges in {sheet_name} (Batch)[/green]")
+
+    @sheets_metrics
     @sheets_api_retry
     def append_row(self, sheet_name: str, row_data: list, worksheet_name: str = "Sheet1"):
         """Appends a single row to the worksheet."""
@@ -149,6 +209,7 @@ class SheetManager:
         ws.append_row(row_data)
         console.print(f"[green]Appended row to {sheet_name}: {row_data!r}[/green]")
 
+    @sheets_metrics
     @sheets_api_retry
     def append_rows(self, sheet_name: str, rows_data: list, worksheet_name: str = "Sheet1"):
         """Appends multiple rows to the worksheet in one batch."""
@@ -161,6 +222,7 @@ class SheetManager:
         except Exception as e:
             console.print(f"[red]Error appending rows: {e}[/red]")
             
+    @sheets_metrics
     @sheets_api_retry
     def clear_range(self, sheet_name: str, range_name: str, worksheet_name: str = "Sheet1"):
         """Clears a specific range of cells."""
@@ -173,6 +235,7 @@ class SheetManager:
         except Exception as e:
             console.print(f"[red]Error clearing range: {e}[/red]")
 
+    @sheets_metrics
     @sheets_api_retry
     def delete_row(self, sheet_name: str, row_index: int, worksheet_name: str = "Sheet1"):
         """Deletes a specific row."""
@@ -184,3 +247,29 @@ class SheetManager:
             console.print(f"[green]Deleted row {row_index} in {sheet_name}[/green]")
         except Exception as e:
             console.print(f"[red]Error deleting row: {e}[/red]")
+
+    @sheets_metrics
+    @sheets_api_retry
+    def delete_rows(self, sheet_name: str, row_indices: List[int], worksheet_name: str = "Sheet1"):
+        """Deletes many rows (1-based indices, in any order) in a single batch request."""
+        if not row_indices:
+            return
+        sh = self.get_sheet(sheet_name)
+        if not sh:
+            raise gspread.exceptions.SpreadsheetNotFound(sheet_name)
+
+        ws = sh.worksheet(worksheet_name)
+        # Contiguous runs, bottom first, so earlier deletes don't shift later ones
+        runs: List[List[int]] = []
+        for row_index in sorted(set(row_indices), reverse=True):
+            if runs and runs[-1][0] == row_index + 1:
+                runs[-1][0] = row_index
+            else:
+                runs.append([row_index, row_index])
+        sh.batch_update({"requests": [
+            {"deleteDimension": {"range": {
+                "sheetId": ws.id, "dimension": "ROWS", "startIndex": start - 1, "endIndex": end,
+            }}}
+            for start, end in runs
+        ]})
+        console.print(f"[green]Deleted {len(set(row_indices))} rows in {sheet_name} (Batch)[/green]")
@@ -0,0 +1,57 @@
+"""Aggregates over the hot worksheets plus their archive tiers."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.crm.manager import CRMManager, ACTIVITIES_WS, LEADS_WS, OPPS_WS
+from src.crm.models import Activity, Lead, Opportunity, PipelineStage
+from src.services.local_json import MockSheetManager
+
+SHEET = "Archive Test"
+
+
+YEAR = datetime.now().year - 2
+
+
+def _days_since(month: int) -> int:
+    return (datetime.now() - datetime(YEAR, month, 1)).days
+
+
+def _opp(i: int, closed: datetime) -> Opportunity:
+    return Opportunity(opp_id=f"OPP{i:05d}", lead_id=f"{i:08d}", title=f"Deal {i}", value=1000.0 * i,
+                       stage=PipelineStage.CLOSED_WON, closed_at=closed, updated_at=closed)
+
+
+@pytest.fixture
+def sm():
+    leads = [Lead(lead_id=f"{i:08d}", company_name=f"Company {i}", contact_name=f"Contact {i}") for i in range(1, 4)]
+    opps = [_opp(1, datetime(YEAR, 3, 1)), _opp(2, datetime(YEAR, 9, 1)), _opp(3, datetime.now() - timedelta(days=1))]
+    return MockSheetManager(persist=False, sheets={SHEET: {
+        LEADS_WS: [Lead.headers()] + [lead.to_row() for lead in leads],
+        OPPS_WS: [Opportunity.headers()] + [opp.to_row() for opp in opps],
+        ACTIVITIES_WS: [Activity.headers()],
+    }})
+
+
+def test_summary_counts_archived_deals(sm):
+    crm = CRMManager(sm, SHEET)
+    before = crm.get_pipeline_summary()
+    assert crm.archive(closed_after_days=180)["total"] == 2
+
+    after = crm.get_pipeline_summary()
+    assert len(crm.get_opportunities()) == 1
+    assert after["closed_won_value"] == before["closed_won_value"] == 6000.0
+    assert after["total_opportunities"] == 3
+
+
+def test_archive_run_elsewhere_expires_cached_archives(sm):
+    reader, archiver = CRMManager(sm, SHEET), CRMManager(sm, SHEET)
+    archiver.archive(closed_after_days=_days_since(6))  # deal 1 only
+    assert reader.get_pipeline_summary()["closed_won_value"] == 6000.0  # archive tier now cached
+
+    archiver.archive(closed_after_days=180)  # deal 2, into the same yearly archive
+    # The reader's hot Opportunities cache expires; its archive tiers have a much longer TTL
+    reader.CACHE_TTL = 0
+    summary = reader.get_pipeline_summary()
+    assert summary["closed_won_value"] == 6000.0
+    assert summary["total_opportunities"] == 3
@@ -0,0 +1,67 @@
+"""Change event channels: resumption, and what a channel keeps alive after its subscribers leave."""
+import asyncio
+
+from src.crm.events import ChangeHub
+
+KEY = "sheet-1"
+
+
+async def _drain(stream, count: int):
+    return [await stream.__anext__() for _ in range(count)]
+
+
+def test_resume_from_last_event_id():
+    async def run():
+        hub = ChangeHub()
+        stream = hub.subscribe(KEY)
+        await _drain(stream, 1)  # retry hint
+        hub.publish(KEY, {"entity": "lead", "action": "created", "id": "1"})
+        frame = (await _drain(stream, 1))[0]
+        await stream.aclose()
+        event_id = frame.split(b"\n", 1)[0][len(b"id: "):].decode()
+
+        hub.publish(KEY, {"entity": "lead", "action": "created", "id": "2"})
+        resumed = hub.subscribe(KEY, last_event_id=event_id)
+        frames = await _drain(resumed, 2)
+        await resumed.aclose()
+        return frames
+
+    frames = asyncio.run(run())
+    assert b'"id":"2"' in frames[1] and b"resync" not in frames[1]
+
+
+def test_last_subscriber_leaving_releases_poll():
+    async def run():
+        hub = ChangeHub()
+        stream = hub.subscribe(KEY, poll=lambda: None)
+        await _drain(stream, 1)
+        channel = hub._channels[KEY]
+        assert channel.poll is not None and hub.subscriber_count(KEY) == 1
+        await stream.aclose()
+        return hub, channel
+
+    hub, channel = asyncio.run(run())
+    assert channel.poll is None and channel.watcher is None
+    assert hub.subscriber_count(KEY) == 0
+
+
+def test_idle_channel_is_dropped_and_resumers_resync():
+    async def run():
+        hub = ChangeHub(idle_seconds=0)
+        stream = hub.subscribe(KEY, poll=lambda: None)
+        await _drain(stream, 1)
+        hub.publish(KEY, {"entity": "lead", "action": "created", "id": "1"})
+        frame = (await _drain(stream, 1))[0]
+        await stream.aclose()
+
+        hub.publish("other-sheet", {"entity": "lead", "action": "created", "id": "x"})
+        assert KEY not in hub._channels
+
+        event_id = frame.split(b"\n", 1)[0][len(b"id: "):].decode()
+        resumed = hub.subscribe(KEY, last_event_id=event_id)
+        frames = await _drain(resumed, 2)
+        await resumed.aclose()
+        return frames
+
+    frames = asyncio.run(run())
+    assert frames[1].startswith(b"event: resync")
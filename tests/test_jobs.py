@@ -0,0 +1,145 @@
+"""Job queue: priorities, dedupe, retries, deferral and restart recovery."""
+import time
+
+import pytest
+
+from src.services import jobs
+from src.services.jobs import JobDeferred, JobQueue, DONE, FAILED, QUEUED, RUNNING, PRIORITY_HIGH, PRIORITY_LOW
+
+SHEET = "jobs-sheet"
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = JobQueue(str(tmp_path / "jobs.sqlite3"), workers=1)
+    yield q
+    q.stop()
+
+
+def _wait(q: JobQueue, job_id: str, statuses=(DONE, FAILED), timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = q.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {q.get(job_id)['status']}")
+
+
+def test_higher_priority_runs_first(queue):
+    ran = []
+    queue.register("noop", lambda job, ctx: ran.append(job["target"]))
+    low = queue.enqueue("noop", SHEET, "low", priority=PRIORITY_LOW)
+    queue.enqueue("noop", SHEET, "normal")
+    high = queue.enqueue("noop", SHEET, "high", priority=PRIORITY_HIGH)
+
+    queue.start()
+    _wait(queue, low["id"])
+    assert ran == ["high", "normal", "low"]
+    assert queue.get(high["id"])["status"] == DONE
+
+
+def test_queued_duplicate_is_merged_and_promoted(queue):
+    queue.register("noop", lambda job, ctx: None)
+    first = queue.enqueue("noop", SHEET, "1", priority=PRIORITY_LOW)
+    again = queue.enqueue("noop", SHEET, "1", priority=PRIORITY_HIGH)
+    assert again["id"] == first["id"] and again["priority"] == PRIORITY_HIGH
+    assert queue.stats(SHEET)[QUEUED] == 1
+
+
+def test_dedupe_key_covers_the_payload(queue):
+    queue.register("bulk", lambda job, ctx: None)
+    forced = queue.enqueue("bulk", SHEET, payload={"force": True, "lead_ids": ["1", "2"]})
+    same = queue.enqueue("bulk", SHEET, payload={"lead_ids": ["1", "2"], "force": True})
+    other = queue.enqueue("bulk", SHEET, payload={"force": False, "lead_ids": ["1", "2"]})
+    assert same["id"] == forced["id"]
+    assert other["id"] != forced["id"]
+    assert queue.stats(SHEET)[QUEUED] == 2
+
+
+def test_failures_retry_with_backoff(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "RETRY_BASE_DELAY", 0.1)
+    calls = []
+
+    def flaky(job, ctx):
+        calls.append(time.time())
+        if len(calls) < 3:
+            raise RuntimeError("boom")
+        return {"ok": True}
+
+    queue.register("flaky", flaky)
+    job = queue.enqueue("flaky", SHEET)
+    queue.start()
+    job = _wait(queue, job["id"])
+
+    assert job["status"] == DONE and job["attempts"] == 2 and job["result"] == {"ok": True}
+    assert calls[1] - calls[0] >= 0.1
+    assert calls[2] - calls[1] >= 0.2
+
+
+def test_job_fails_after_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "RETRY_BASE_DELAY", 0.01)
+    queue.register("broken", lambda job, ctx: 1 / 0)
+    job = queue.enqueue("broken", SHEET)
+    queue.start()
+    job = _wait(queue, job["id"])
+    assert job["status"] == FAILED and job["attempts"] == queue.max_attempts
+    assert "division by zero" in job["error"]
+
+
+def test_deferred_job_waits_without_using_an_attempt(queue):
+    def waiting(job, ctx):
+        raise JobDeferred("no session")
+
+    queue.register("waiting", waiting)
+    job = queue.enqueue("waiting", SHEET)
+    queue.start()
+    deadline = time.time() + 5
+    while queue.get(job["id"])["error"] is None and time.time() < deadline:
+        time.sleep(0.01)
+    job = queue.get(job["id"])
+
+    assert job["attempts"] == 0 and job["error"] == "no session"
+    assert job["run_after"] >= time.time() + jobs.DEFER_DELAY - 5
+
+
+def test_job_deferred_too_long_fails(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_DEFER_AGE", 0)
+
+    def waiting(job, ctx):
+        raise JobDeferred("no session")
+
+    queue.register("waiting", waiting)
+    job = queue.enqueue("waiting", SHEET)
+    time.sleep(0.01)
+    queue.start()
+    job = _wait(queue, job["id"])
+    assert job["status"] == FAILED and job["attempts"] == 0
+    assert "no session" in job["error"]
+
+
+def test_running_jobs_are_requeued_on_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    crashed = JobQueue(path, workers=1)
+    crashed.register("noop", lambda job, ctx: None)
+    job = crashed.enqueue("noop", SHEET, "1")
+    with crashed._lock:
+        assert crashed._claim()["id"] == job["id"]
+    assert crashed.get(job["id"])["status"] == RUNNING
+
+    ran = []
+    restarted = JobQueue(path, workers=1)
+    restarted.register("noop", lambda job, ctx: ran.append((job["target"], ctx)))
+    try:
+        restarted.start()
+        assert _wait(restarted, job["id"])["status"] == DONE
+    finally:
+        restarted.stop()
+    assert ran == [("1", None)]  # the enqueuing context did not survive the restart
+
+
+def test_handlers_defer_without_a_session():
+    from api.jobs import _resolve_session
+
+    with pytest.raises(JobDeferred):
+        _resolve_session({"sheet": SHEET}, None)
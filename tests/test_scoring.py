@@ -0,0 +1,68 @@
+"""Bulk LLM scoring and the vectorized rescore sharing the score columns."""
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from src.crm import scoring
+from src.crm.manager import CRMManager, ACTIVITIES_WS, LEADS_WS, OPPS_WS
+from src.crm.models import Activity, Lead, Opportunity
+from src.crm.score_fingerprints import ScoreFingerprintStore
+from src.crm.win_model import WinModelStore
+from src.services.local_json import MockSheetManager
+
+SHEET = "Scoring Test"
+LLM_SCORE = 93
+
+
+class FakeLLM:
+    """Answers every batch scoring request with the same score for each lead."""
+
+    def __init__(self):
+        self.scored = []
+
+    def chat_many(self, requests):
+        responses = []
+        for request in requests:
+            lead_ids = re.findall(r'"lead_id": "([^"]+)"', request["messages"][1]["content"])
+            self.scored.extend(lead_ids)
+            content = json.dumps({"results": [
+                {"lead_id": lead_id, "score": LLM_SCORE, "heat_level": "Hot", "reasoning": "fake"}
+                for lead_id in lead_ids
+            ]})
+            responses.append(SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))]))
+        return responses
+
+
+@pytest.fixture
+def crm(tmp_path, monkeypatch):
+    llm = FakeLLM()
+    monkeypatch.setattr(scoring.scoring_service, "client", llm)
+    monkeypatch.setattr(scoring.scoring_service, "fingerprints", ScoreFingerprintStore(str(tmp_path / "fp.sqlite3")))
+    monkeypatch.setattr(scoring.scoring_service, "models", WinModelStore(str(tmp_path / "models"), None))
+    leads = [Lead(lead_id=f"{i:08d}", company_name=f"Company {i}", contact_name=f"Contact {i}") for i in range(1, 6)]
+    sm = MockSheetManager(persist=False, sheets={SHEET: {
+        LEADS_WS: [Lead.headers()] + [lead.to_row() for lead in leads],
+        OPPS_WS: [Opportunity.headers()],
+        ACTIVITIES_WS: [Activity.headers()],
+    }})
+    return CRMManager(sm, SHEET), llm
+
+
+def test_unchanged_leads_are_not_rescored(crm):
+    crm, llm = crm
+    assert crm.score_leads()["scored"] == 5
+    assert crm.score_leads()["scored"] == 0
+    assert len(llm.scored) == 5
+
+
+def test_score_after_rescore_restores_llm_scores(crm):
+    crm, llm = crm
+    crm.score_leads()
+    assert crm.rescore_leads()["changed"] == 5
+    assert all(lead.score != LLM_SCORE for lead in crm.get_leads())
+
+    assert crm.score_leads()["scored"] == 5
+    assert all(lead.score == LLM_SCORE for lead in crm.get_leads())
+    assert len(llm.scored) == 10
@@ -0,0 +1,108 @@
+"""Worksheet snapshots: writes on top of a warm start, versions and retention."""
+import os
+
+import pytest
+
+from src.crm.manager import CRMManager, LEADS_WS, OPPS_WS
+from src.crm.models import Lead, Opportunity
+from src.crm.snapshots import SnapshotStore
+from src.services.local_json import MockSheetManager
+
+SHEET = "Snapshot Test"
+
+
+def _lead(i: int) -> Lead:
+    return Lead(lead_id=f"{i:08d}", company_name=f"Company {i}", contact_name=f"Contact {i}")
+
+
+def _opp(i: int) -> Opportunity:
+    return Opportunity(opp_id=f"OPP{i:05d}", lead_id=f"{i:08d}", title=f"Deal {i}", value=1000.0 * i)
+
+
+@pytest.fixture
+def warm_crm(tmp_path, monkeypatch):
+    """
+    A manager whose Leads/Opportunities come from snapshots taken before row 3
+    (the second record) was deleted in the sheet. Background revalidation is
+    off, so the stale snapshot is what the manager holds when it writes.
+    """
+    sm = MockSheetManager(persist=False, sheets={SHEET: {
+        LEADS_WS: [Lead.headers()] + [_lead(i).to_row() for i in range(1, 9)],
+        OPPS_WS: [Opportunity.headers()] + [_opp(i).to_row() for i in range(1, 9)],
+    }})
+    store = SnapshotStore(str(tmp_path))
+    CRMManager(sm, SHEET, snapshots=store).get_leads()
+    CRMManager(sm, SHEET, snapshots=store).get_opportunities()
+
+    sm.delete_row(SHEET, 3, LEADS_WS)
+    sm.delete_row(SHEET, 3, OPPS_WS)
+
+    monkeypatch.setattr(CRMManager, "_revalidate", lambda self, worksheet, snapshot: None)
+    crm = CRMManager(sm, SHEET, snapshots=store)
+    assert len(crm.get_leads()) == 8  # served from the snapshot
+    return sm, crm
+
+
+def _ids(sm: MockSheetManager, worksheet: str):
+    return [row[0] for row in sm.sheets[SHEET][worksheet][1:]]
+
+
+def test_update_lead_uses_fresh_rows(warm_crm):
+    sm, crm = warm_crm
+    lead = next(l for l in crm.get_leads() if l.lead_id == "00000005")
+    lead.company_name = "Renamed"
+    assert crm.update_lead(lead)
+
+    ids = _ids(sm, LEADS_WS)
+    assert len(ids) == len(set(ids)) == 7
+    rows = {row[0]: row for row in sm.sheets[SHEET][LEADS_WS][1:]}
+    assert rows["00000005"][1] == "Renamed"
+    assert rows["00000006"][1] == "Company 6"
+
+
+def test_delete_lead_uses_fresh_rows(warm_crm):
+    sm, crm = warm_crm
+    assert crm.delete_lead("00000005")
+    assert _ids(sm, LEADS_WS) == ["00000001", "00000003", "00000004", "00000006", "00000007", "00000008"]
+
+
+def test_update_opportunity_uses_fresh_rows(warm_crm):
+    sm, crm = warm_crm
+    opp = crm.get_opportunity("OPP00005")
+    opp.title = "Renamed"
+    assert crm.update_opportunity(opp)
+
+    rows = {row[0]: row for row in sm.sheets[SHEET][OPPS_WS][1:]}
+    assert len(rows) == 7
+    assert rows["OPP00005"][2] == "Renamed"
+    assert rows["OPP00006"][2] == "Deal 6"
+
+
+def test_reads_after_write_see_the_sheet(warm_crm):
+    sm, crm = warm_crm
+    crm.update_lead(next(l for l in crm.get_leads() if l.lead_id == "00000005"))
+    assert [l.lead_id for l in crm.get_leads()] == _ids(sm, LEADS_WS)
+
+
+def test_save_keeps_only_the_latest_version(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.save("key1", LEADS_WS, [["lead_id"], ["1"]], SHEET)
+    store.save("key1", LEADS_WS, [["lead_id"], ["1"], ["2"]], SHEET)
+
+    files = [p for p in (tmp_path / "key1").iterdir() if p.suffix == ".snap"]
+    assert len(files) == 1 and files[0].name.startswith(f"{LEADS_WS}@")
+    assert store.load("key1", LEADS_WS) == [["lead_id"], ["1"], ["2"]]
+    assert store.worksheets("key1") == [LEADS_WS]
+
+
+def test_prune_removes_expired_snapshots_and_index_entries(tmp_path):
+    store = SnapshotStore(str(tmp_path), retention=3600)
+    store.save("old", LEADS_WS, [["lead_id"]], "Old Sheet")
+    store.save("new", LEADS_WS, [["lead_id"]], "New Sheet")
+    for path in (tmp_path / "old").iterdir():
+        os.utime(path, (0, 0))
+
+    assert store.prune() == 1
+    assert store.keys() == ["new"]
+    assert store.resolve("Old Sheet") is None
+    assert store.resolve("New Sheet") == "new"
@@ -0,0 +1,101 @@
+"""Delta sync: change log cursors, epochs, and the manager's own writes."""
+import pytest
+from fastapi.testclient import TestClient
+
+from api.deps import get_crm_session
+from api.server import app
+from src.crm import manager
+from src.crm.manager import CRMManager, ACTIVITIES_WS, LEADS_WS, OPPS_WS
+from src.crm.models import Activity, Lead, Opportunity
+from src.services.local_json import MockSheetManager
+
+SHEET = "Sync Test"
+
+
+def _lead(i: int) -> Lead:
+    return Lead(lead_id=f"{i:08d}", company_name=f"Company {i}", contact_name=f"Contact {i}")
+
+
+@pytest.fixture
+def crm():
+    sm = MockSheetManager(persist=False, sheets={SHEET: {
+        LEADS_WS: [Lead.headers()] + [_lead(i).to_row() for i in range(1, 4)],
+        OPPS_WS: [Opportunity.headers()] + [
+            Opportunity(opp_id="OPP00001", lead_id="00000001", title="Deal 1", value=1000.0).to_row()],
+        ACTIVITIES_WS: [Activity.headers()],
+    }})
+    crm = CRMManager(sm, SHEET)
+    crm.CACHE_TTL = 0  # every sync refetches, as after the TTL in production
+    return sm, crm
+
+
+@pytest.fixture
+def client(crm):
+    app.dependency_overrides[get_crm_session] = lambda: crm[1]
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_crm_session, None)
+
+
+def _rename(crm: CRMManager, lead_id: str, name: str):
+    lead = crm.get_lead(lead_id)
+    lead.company_name = name
+    assert crm.update_lead(lead)
+
+
+def test_sync_returns_changes_after_the_cursor(crm):
+    _, crm = crm
+    cursor = crm.changes_since(0)["version"]
+    _rename(crm, "00000002", "Renamed")
+
+    changes = crm.changes_since(cursor)
+    assert not changes["full_resync"]
+    assert [lead["company_name"] for lead in changes["leads"]["upserted"]] == ["Renamed"]
+    assert crm.changes_since(changes["version"])["leads"] == {"upserted": [], "deleted": []}
+
+
+def test_cursor_older_than_the_log_forces_full_resync(monkeypatch, crm):
+    sm, _ = crm
+    monkeypatch.setattr(manager, "CHANGE_LOG_SIZE", 3)
+    crm = CRMManager(sm, SHEET)
+    old = crm.changes_since(0)["version"]
+    for i in range(4):
+        _rename(crm, "00000001", f"Name {i}")
+    recent = crm._change_log[0][0] - 1  # still covered by the first entry left in the log
+
+    assert crm.changes_since(old)["full_resync"]
+    assert not crm.changes_since(recent)["full_resync"]
+
+
+def test_cursor_from_another_epoch_forces_full_resync(crm, client):
+    _, crm = crm
+    body = client.get("/api/sync", params={"since": 0}).json()
+    assert body["full_resync"] and body["epoch"] == manager.SNAPSHOT_EPOCH  # a new client loads everything
+
+    _rename(crm, "00000001", "Renamed")
+    same = client.get("/api/sync", params={"since": body["version"], "epoch": body["epoch"]}).json()
+    assert not same["full_resync"] and len(same["leads"]["upserted"]) == 1
+
+    other = client.get("/api/sync", params={"since": body["version"], "epoch": "deadbeef"}).json()
+    assert other["full_resync"] and "leads" not in other
+    assert other["epoch"] == manager.SNAPSHOT_EPOCH
+
+
+def test_own_writes_are_not_reported_again_as_sheet_edits(crm):
+    sm, crm = crm
+    cursor = crm.changes_since(0)["version"]
+    opp = crm.get_opportunity("OPP00001")
+    opp.title = "Renamed"
+    assert crm.update_opportunity(opp)
+    logged = len(crm._change_log)
+
+    # Sheets hands the row back reformatted ("1000.0" -> "1000")
+    row = sm.sheets[SHEET][OPPS_WS][1]
+    row[4] = "1000"
+    changes = crm.changes_since(cursor)
+    assert len(crm._change_log) == logged
+    assert [o["title"] for o in changes["opportunities"]["upserted"]] == ["Renamed"]
+
+    # An edit made in the sheet afterwards is still picked up
+    row[2] = "Edited in the sheet"
+    changes = crm.changes_since(changes["version"])
+    assert [o["title"] for o in changes["opportunities"]["upserted"]] == ["Edited in the sheet"]